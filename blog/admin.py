@@ -1,11 +1,12 @@
 from django.contrib import admin
+from core.admin_scaling import CachedAllValuesFieldListFilter
 from .models import BlogPost
 
 
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'published', 'created_at', 'updated_at']
-    list_filter = ['published', 'created_at', 'tags']
+    list_display = ['title', 'published', 'view_count', 'created_at', 'updated_at']
+    list_filter = ['published', 'created_at', ('tags', CachedAllValuesFieldListFilter)]
     search_fields = ['title', 'content', 'tags']
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ['published']
@@ -0,0 +1,81 @@
+"""
+Save-time analysis of blog post content.
+
+``analyze`` renders the markdown once, with anchor IDs on headings, and
+derives everything the templates need from it: sanitized HTML, a word count,
+a reading time, a plain-text excerpt and a table of contents. It is a pure
+function of the markdown text, so the bulk recompute command can run it in
+worker processes.
+
+``markdown`` and ``bleach`` (with html5lib) take ~80ms to import, so they
+are loaded on the first ``analyze`` call rather than when the models are,
+which keeps them out of web worker and management command start-up.
+"""
+import functools
+import html
+import math
+import re
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+TOC_DEPTH = '2-4'
+
+EXTRA_TAGS = {
+    'p', 'br', 'hr', 'pre', 'span', 'img', 'del', 'sup', 'sub',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+}
+EXTRA_ATTRIBUTES = {
+    **{f'h{level}': ['id'] for level in range(1, 7)},
+    'img': ['src', 'alt', 'title'],
+    'code': ['class'],
+    'span': ['class'],
+    'th': ['align'],
+    'td': ['align'],
+}
+
+NON_PROSE_RE = re.compile(r'<(h[1-6]|pre)[^>]*>.*?</\1>', re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _flatten_toc(tokens):
+    for token in tokens:
+        yield {'level': token['level'], 'id': token['id'], 'name': html.unescape(token['name'])}
+        yield from _flatten_toc(token['children'])
+
+
+def _plain_text(rendered):
+    return ' '.join(html.unescape(TAG_RE.sub(' ', rendered)).split())
+
+
+@functools.cache
+def _allowed():
+    from bleach.sanitizer import ALLOWED_ATTRIBUTES, ALLOWED_TAGS
+
+    return ALLOWED_TAGS | EXTRA_TAGS, {**ALLOWED_ATTRIBUTES, **EXTRA_ATTRIBUTES}
+
+
+def analyze(content):
+    """Return ``content_html``, ``word_count``, ``reading_time``, ``generated_excerpt`` and ``toc``."""
+    import bleach
+    import markdown
+
+    md = markdown.Markdown(
+        extensions=['toc', 'fenced_code', 'tables'],
+        extension_configs={'toc': {'toc_depth': TOC_DEPTH}},
+    )
+    tags, attributes = _allowed()
+    rendered = bleach.clean(md.convert(content or ''), tags=tags, attributes=attributes)
+    words = _plain_text(rendered).split()
+    # Headings and code blocks make for a poor excerpt; use the prose only.
+    body_words = _plain_text(NON_PROSE_RE.sub(' ', rendered)).split()
+    excerpt = ' '.join(body_words[:EXCERPT_WORDS])
+    if len(body_words) > EXCERPT_WORDS:
+        excerpt += '…'
+    return {
+        'content_html': rendered,
+        'word_count': len(words),
+        'reading_time': max(1, math.ceil(len(words) / WORDS_PER_MINUTE)),
+        'generated_excerpt': excerpt[:500],
+        'toc': list(_flatten_toc(md.toc_tokens)),
+    }
@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from blog.content import analyze
+from blog.models import ANALYSIS_FIELDS, BlogPost
+
+
+def iter_post_batches(batch_size):
+    """Yield ``(pk, content)`` batches of all posts using a keyset cursor."""
+    last_pk = 0
+    while True:
+        batch = list(
+            BlogPost.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'content')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+class Command(BaseCommand):
+    help = 'Recompute word counts, reading times, excerpts and tables of contents for every blog post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (1 = run in this process)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts read and written per batch')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'] or 1)
+        started = time.monotonic()
+        total = 0
+        
+        def write(batch, analyses):
+            posts = []
+            for (pk, _), analysis in zip(batch, analyses):
+                post = BlogPost(pk=pk)
+                post.apply_analysis(analysis)
+                posts.append(post)
+            BlogPost.objects.bulk_update(posts, ANALYSIS_FIELDS)
+            return len(posts)
+        
+        if workers == 1:
+            for batch in iter_post_batches(options['batch_size']):
+                total += write(batch, map(analyze, (content for _, content in batch)))
+        else:
+            # The main process owns the database; workers only render markdown.
+            # Each batch is submitted before the previous one is written, so
+            # reads and writes overlap with rendering.
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = None
+                for batch in iter_post_batches(options['batch_size']):
+                    chunksize = max(1, len(batch) // (workers * 4))
+                    analyses = pool.map(analyze, [content for _, content in batch], chunksize=chunksize)
+                    if pending:
+                        total += write(*pending)
+                    pending = (batch, analyses)
+                if pending:
+                    total += write(*pending)
+        
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {total} posts with {workers} worker(s) in {elapsed:.2f}s ({rate:.1f} posts/s).'
+        ))
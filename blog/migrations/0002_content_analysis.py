@@ -0,0 +1,112 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:07
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of blog.content.analyze as it was when these fields were
+# added, so later changes to the app module can't change or break this
+# migration; the recompute_blog_content command applies newer versions.
+EXTRA_TAGS = {
+    'p', 'br', 'hr', 'pre', 'span', 'img', 'del', 'sup', 'sub',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+}
+EXTRA_ATTRIBUTES = {
+    **{f'h{level}': ['id'] for level in range(1, 7)},
+    'img': ['src', 'alt', 'title'],
+    'code': ['class'],
+    'span': ['class'],
+    'th': ['align'],
+    'td': ['align'],
+}
+NON_PROSE_RE = re.compile(r'<(h[1-6]|pre)[^>]*>.*?</\1>', re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def flatten_toc(tokens):
+    for token in tokens:
+        yield {'level': token['level'], 'id': token['id'], 'name': html.unescape(token['name'])}
+        yield from flatten_toc(token['children'])
+
+
+def plain_text(rendered):
+    return ' '.join(html.unescape(TAG_RE.sub(' ', rendered)).split())
+
+
+def analyze(content):
+    import bleach
+    import markdown
+    from bleach.sanitizer import ALLOWED_ATTRIBUTES, ALLOWED_TAGS
+
+    md = markdown.Markdown(
+        extensions=['toc', 'fenced_code', 'tables'],
+        extension_configs={'toc': {'toc_depth': '2-4'}},
+    )
+    rendered = bleach.clean(
+        md.convert(content or ''),
+        tags=ALLOWED_TAGS | EXTRA_TAGS,
+        attributes={**ALLOWED_ATTRIBUTES, **EXTRA_ATTRIBUTES},
+    )
+    words = plain_text(rendered).split()
+    body_words = plain_text(NON_PROSE_RE.sub(' ', rendered)).split()
+    excerpt = ' '.join(body_words[:40])
+    if len(body_words) > 40:
+        excerpt += '…'
+    return {
+        'content_html': rendered,
+        'word_count': len(words),
+        'reading_time': max(1, math.ceil(len(words) / 200)),
+        'generated_excerpt': excerpt[:500],
+        'toc': list(flatten_toc(md.toc_tokens)),
+    }
+
+
+def analyze_posts(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    fields = ['content_html', 'word_count', 'reading_time', 'generated_excerpt', 'toc']
+    posts = []
+    for post in BlogPost.objects.only('content').iterator():
+        analysis = analyze(post.content)
+        for field in fields:
+            setattr(post, field, analysis[field])
+        posts.append(post)
+    BlogPost.objects.bulk_update(posts, fields, batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='generated_excerpt',
+            field=models.TextField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(analyze_posts, migrations.RunPython.noop),
+    ]
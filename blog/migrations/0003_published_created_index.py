@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_content_analysis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['published', '-created_at'], name='blog_blogpo_publish_88de0c_idx'),
+        ),
+    ]
@@ -1,6 +1,34 @@
 from django.db import models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
 from django.utils.text import slugify
 
+from .content import analyze
+
+
+ANALYSIS_FIELDS = ['content_html', 'word_count', 'reading_time', 'generated_excerpt', 'toc']
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def published(self):
+        # On SQLite, published=True compiles to a bare column test that the
+        # (published, created_at) index cannot serve; IN (True) can.
+        return self.filter(published__in=[True])
+    
+    def created_between(self, start, end):
+        """Posts created in ``[start, end)``, as a plain range on the index."""
+        return self.filter(created_at__gte=start, created_at__lt=end)
+    
+    def month_counts(self):
+        """Number of published posts per month, newest first, from one TruncMonth aggregate."""
+        return (
+            self.published()
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(count=Count('id'))
+            .order_by('-month')
+        )
+
 
 class BlogPost(models.Model):
     """Model for blog posts with markdown support."""
@@ -14,19 +42,74 @@ class BlogPost(models.Model):
     published = models.BooleanField(default=False)
     tags = models.CharField(max_length=200, blank=True, help_text="Comma-separated tags")
     
+    # Derived from ``content`` on save; see blog.content.analyze.
+    content_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutes")
+    generated_excerpt = models.TextField(max_length=500, blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = BlogPostQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Blog Post"
         verbose_name_plural = "Blog Posts"
+        indexes = [
+            models.Index(fields=['published', '-created_at']),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so signals can tell a publish/unpublish apart
+        # from an edit, and save can skip analysis when the content is unchanged.
+        if 'published' in field_names:
+            instance._loaded_published = values[field_names.index('published')]
+        if 'content' in field_names:
+            instance._loaded_content = values[field_names.index('content')]
+        return instance
+    
+    def _content_changed(self):
+        if 'content' in self.get_deferred_fields():
+            # Not loaded, so not assigned either, and a save won't write it.
+            return False
+        return self._state.adding or getattr(self, '_loaded_content', None) != self.content
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get('update_fields')
+        writes_content = update_fields is None or 'content' in update_fields
+        if writes_content and self._content_changed():
+            self.apply_analysis(analyze(self.content))
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *ANALYSIS_FIELDS}
         super().save(*args, **kwargs)
+        if writes_content and 'content' not in self.get_deferred_fields():
+            self._loaded_content = self.content
     
     def __str__(self):
         return self.title
     
+    @property
+    def summary(self):
+        """The author's excerpt, or the one generated from the content."""
+        return self.excerpt or self.generated_excerpt
+    
+    def apply_analysis(self, analysis):
+        for field in ANALYSIS_FIELDS:
+            setattr(self, field, analysis[field])
+    
+    def social_card_fields(self):
+        """What the Open Graph card draws (see core.social)."""
+        return {
+            'kicker': f'Blog · {self.reading_time} min read',
+            'title': self.title,
+            'labels': self.tag_list,
+        }
+    
     @property
     def tag_list(self):
         """Return tags as a list."""
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate
+from core.edge import purge_instance_on_commit
+from core.social import queue_render
+from .models import BlogPost
+
+
+@receiver(post_save, sender=BlogPost)
+def invalidate_archive_on_publish(sender, instance, created, **kwargs):
+    previously = None if created else getattr(instance, '_loaded_published', None)
+    if instance.published != previously and (instance.published or previously is not None):
+        invalidate('blog-archive')
+    instance._loaded_published = instance.published
+
+
+@receiver(post_delete, sender=BlogPost)
+def invalidate_archive_on_delete(sender, instance, **kwargs):
+    if instance.published:
+        invalidate('blog-archive')
+
+
+@receiver([post_save, post_delete], sender=BlogPost)
+def purge_edge_cache(sender, instance, **kwargs):
+    purge_instance_on_commit(sender, instance)
+
+
+@receiver(post_save, sender=BlogPost)
+def render_social_card(sender, instance, **kwargs):
+    queue_render(sender, instance)
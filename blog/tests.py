@@ -1,3 +1,132 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from core.testing import TemporaryMediaMixin
+
+from .content import analyze
+from .models import BlogPost
+from .views import archive_months
+
+CONTENT = """# Scaling Django
+
+Caching is the cheapest **win** you will find. """ + 'word ' * 400 + """
+
+## Database Indexes
+
+Index what you filter on.
+
+### Composite & Partial
+
+Order matters.
+
+## Caching
+
+```python
+cache.get('key')
+```
+"""
+
+
+class ContentAnalysisTests(TemporaryMediaMixin, TestCase):
+    def test_save_stores_counts_excerpt_and_toc(self):
+        post = BlogPost.objects.create(title='Scaling', content=CONTENT, published=True)
+        self.assertEqual(post.reading_time, 3)
+        self.assertGreater(post.word_count, 400)
+        self.assertTrue(post.generated_excerpt.startswith('Caching is the cheapest win'))
+        self.assertTrue(post.generated_excerpt.endswith('…'))
+        self.assertEqual(post.summary, post.generated_excerpt)
+        self.assertEqual(
+            [(h['level'], h['id'], h['name']) for h in post.toc],
+            [(2, 'database-indexes', 'Database Indexes'), (3, 'composite-partial', 'Composite & Partial'), (2, 'caching', 'Caching')],
+        )
+        self.assertIn('<h2 id="database-indexes">', post.content_html)
+
+    def test_author_excerpt_wins_and_html_is_sanitized(self):
+        post = BlogPost.objects.create(title='Unsafe', content='Hi <script>alert(1)</script>', excerpt='Mine')
+        self.assertEqual(post.summary, 'Mine')
+        self.assertNotIn('<script>', post.content_html)
+
+    def test_partial_saves_skip_analysis_unless_content_changes(self):
+        post = BlogPost.objects.create(title='Short', content='One two three.')
+        post.published = True
+        post.save(update_fields=['published'])
+        post.content = 'One two three four five.'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 5)
+
+    def test_full_saves_skip_analysis_unless_content_changes(self):
+        BlogPost.objects.create(title='Short', content='One two three.')
+        post = BlogPost.objects.get()
+        with mock.patch('blog.models.analyze', wraps=analyze) as analyzed:
+            post.title = 'Renamed'
+            post.save()
+            BlogPost.objects.only('title').get().save()
+            self.assertEqual(analyzed.call_count, 0)
+            post.content = 'One two three four.'
+            post.save()
+            post.save()
+            self.assertEqual(analyzed.call_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 4)
+
+    def test_detail_renders_toc_and_reading_time(self):
+        post = BlogPost.objects.create(title='Scaling', content=CONTENT, published=True)
+        response = self.client.get(reverse('blog:blog_detail', args=[post.slug]))
+        self.assertContains(response, 'href="#database-indexes"')
+        self.assertContains(response, '3 min read')
+
+    def test_recompute_command_uses_a_process_pool(self):
+        BlogPost.objects.bulk_create([BlogPost(title=f'Post {i}', slug=f'post-{i}', content=CONTENT) for i in range(7)])
+        out = StringIO()
+        call_command('recompute_blog_content', workers=2, batch_size=3, stdout=out)
+        self.assertIn('Recomputed 7 posts with 2 worker(s)', out.getvalue())
+        self.assertFalse(BlogPost.objects.filter(word_count=0).exists())
+        self.assertEqual(BlogPost.objects.first().toc[0]['id'], 'database-indexes')
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        dates = [(2023, 11, 5), (2024, 2, 1), (2024, 2, 20), (2024, 3, 9)]
+        self.posts = []
+        for i, (year, month, day) in enumerate(dates):
+            post = BlogPost.objects.create(title=f'Post {i}', content='Text', published=True)
+            created = timezone.make_aware(datetime.datetime(year, month, day, 12))
+            BlogPost.objects.filter(pk=post.pk).update(created_at=created)
+            self.posts.append(post)
+        BlogPost.objects.create(title='Draft', content='Text')
+        cache.clear()
+
+    def test_month_and_year_archives(self):
+        response = self.client.get(reverse('blog:blog_month_archive', args=[2024, 2]))
+        self.assertEqual([p.title for p in response.context['posts']], ['Post 2', 'Post 1'])
+        response = self.client.get(reverse('blog:blog_year_archive', args=[2024]))
+        self.assertEqual(len(response.context['posts']), 3)
+        self.assertEqual(self.client.get(reverse('blog:blog_month_archive', args=[2024, 13])).status_code, 404)
+        self.assertEqual(self.client.get('/blog/99999999999999999999/').status_code, 404)
+
+    def test_widget_counts_are_cached_and_follow_publishing(self):
+        response = self.client.get(reverse('blog:blog_list'))
+        archive = response.context['archive']
+        self.assertEqual([(y['year'], y['count']) for y in archive], [(2024, 3), (2023, 1)])
+        self.assertEqual([(m['date'].month, m['count']) for m in archive[0]['months']], [(3, 1), (2, 2)])
+
+        with self.assertNumQueries(0):
+            archive_months()
+
+        post = BlogPost.objects.get(pk=self.posts[0].pk)
+        post.title = 'Edited'
+        post.save()
+        with self.assertNumQueries(0):
+            archive_months()
 
-# Create your tests here.
+        post.published = False
+        post.save()
+        self.assertEqual([(y['year'], y['count']) for y in archive_months()], [(2024, 3)])
@@ -5,6 +5,8 @@ app_name = 'blog'
 
 urlpatterns = [
     path('', views.blog_list, name='blog_list'),
+    path('<int:year>/', views.blog_year_archive, name='blog_year_archive'),
+    path('<int:year>/<int:month>/', views.blog_month_archive, name='blog_month_archive'),
     path('<slug:slug>/', views.blog_detail, name='blog_detail'),
 ]
 
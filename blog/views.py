@@ -1,34 +1,121 @@
+import datetime
+
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
+from django.utils import timezone
+from core.analytics import beacon_url
+from core.cache import cached, versioned_key
+from core.edge import tag
+from core.social import card_meta
 from .models import BlogPost
 
+POSTS_PER_PAGE = 5
+ARCHIVE_PER_PAGE = 20
+# Archive pages list titles and dates only.
+ARCHIVE_FIELDS = ['title', 'slug', 'created_at', 'reading_time']
+
+
+def archive_months():
+    """Published post counts grouped by year then month, cached until a post is (un)published."""
+    def compute():
+        years = []
+        for row in BlogPost.objects.month_counts():
+            month = timezone.localtime(row['month']) if timezone.is_aware(row['month']) else row['month']
+            if not years or years[-1]['year'] != month.year:
+                years.append({'year': month.year, 'count': 0, 'months': []})
+            years[-1]['count'] += row['count']
+            years[-1]['months'].append({'date': month.date(), 'count': row['count']})
+        return years
+
+    return cached(versioned_key('blog-archive', 'months'), compute, settings.BLOG_ARCHIVE_CACHE_TIMEOUT)
+
+
+def popular_posts(limit=5):
+    """Most viewed published posts, cached until the next view-count flush."""
+    return cached(
+        versioned_key('views', 'popular-posts', limit),
+        lambda: list(
+            BlogPost.objects.published()
+            .filter(view_count__gt=0)
+            .order_by('-view_count')
+            .only('title', 'slug', 'view_count')[:limit]
+        ),
+        settings.POPULAR_POSTS_CACHE_TIMEOUT,
+    )
+
 
 def blog_list(request):
     """List view for blog posts with pagination."""
-    posts = BlogPost.objects.filter(published=True)
-    paginator = Paginator(posts, 5)  # Show 5 posts per page
+    # Cards show the precomputed summary, so the post bodies are not loaded.
+    posts = BlogPost.objects.published().defer('content', 'content_html', 'toc')
+    paginator = Paginator(posts, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    tag(request, BlogPost)
     
     context = {
         'page_obj': page_obj,
         'posts': page_obj,
+        'archive': archive_months(),
+        'popular_posts': popular_posts(),
     }
     return render(request, 'blog/blog_list.html', context)
 
 
+def _archive(request, start, end, heading, selected):
+    posts = BlogPost.objects.published().created_between(start, end).only(*ARCHIVE_FIELDS)
+    page_obj = Paginator(posts, ARCHIVE_PER_PAGE).get_page(request.GET.get('page'))
+    tag(request, BlogPost)
+    context = {
+        'page_obj': page_obj,
+        'posts': page_obj,
+        'heading': heading,
+        'archive': archive_months(),
+        'selected': selected,
+    }
+    return render(request, 'blog/blog_archive.html', context)
+
+
+def _month_start(year, month):
+    try:
+        return timezone.make_aware(datetime.datetime(year, month, 1))
+    except (ValueError, OverflowError):
+        raise Http404('Invalid date')
+
+
+def blog_year_archive(request, year):
+    """Published posts from one year."""
+    start = _month_start(year, 1)
+    end = _month_start(year + 1, 1)
+    return _archive(request, start, end, str(year), {'year': year})
+
+
+def blog_month_archive(request, year, month):
+    """Published posts from one month."""
+    start = _month_start(year, month)
+    end = _month_start(year + month // 12, month % 12 + 1)
+    return _archive(request, start, end, start.strftime('%B %Y'), {'year': year, 'month': month})
+
+
 def blog_detail(request, slug):
     """Detail view for individual blog posts."""
     post = get_object_or_404(BlogPost, slug=slug, published=True)
-    
     # Get related posts (same tags)
-    related_posts = BlogPost.objects.filter(
+    related_posts = list(BlogPost.objects.filter(
         published=True,
         tags__in=post.tag_list
-    ).exclude(id=post.id)[:3]
+    ).exclude(id=post.id)[:3])
+    popular = popular_posts()
+    tag(request, post, *related_posts, *popular)
     
     context = {
         'post': post,
         'related_posts': related_posts,
+        'archive': archive_months(),
+        'popular_posts': popular,
+        'social_card': card_meta(post),
+        'view_beacon_url': beacon_url(post),
     }
-    return render(request, 'blog/blog_detail.html', context)
\ No newline at end of file
+    return render(request, 'blog/blog_detail.html', context)
@@ -1,11 +1,176 @@
 from django.contrib import admin
-from .models import ContactSubmission
+from django.db.models.functions import Length, Lower
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from . import profiling, spam
+from .admin_scaling import CachedAllValuesFieldListFilter, LargeTableAdmin
+from .models import ArchiveBatch, ContactSubmission, RequestProfile, SlowQuery, Task
 
 
 @admin.register(ContactSubmission)
-class ContactSubmissionAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'subject', 'submitted_at', 'read']
-    list_filter = ['read', 'submitted_at']
-    search_fields = ['name', 'email', 'subject']
+class ContactSubmissionAdmin(LargeTableAdmin, admin.ModelAdmin):
+    list_display = ['name', 'email', 'subject', 'submitted_at', 'read', 'is_spam']
+    list_filter = ['read', 'is_spam', 'submitted_at']
+    prefix_search_fields = [Lower('email'), Lower('name'), Lower('subject')]
+    search_help_text = "Email, name or subject starting with"
     readonly_fields = ['submitted_at']
-    list_editable = ['read']
\ No newline at end of file
+    list_editable = ['read']
+    actions = ['mark_as_spam', 'mark_as_not_spam']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Submissions keep the address as typed; search the lower-cased columns.
+        return super().get_search_results(request, queryset, search_term.lower())
+    
+    @admin.action(description="Mark selected submissions as spam")
+    def mark_as_spam(self, request, queryset):
+        queryset.update(is_spam=True)
+        spam.train_from_submissions()
+    
+    @admin.action(description="Mark selected submissions as not spam")
+    def mark_as_not_spam(self, request, queryset):
+        queryset.update(is_spam=False)
+        spam.train_from_submissions()
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_at', 'started_at', 'finished_at', 'wait', 'runtime']
+    list_filter = ['status', ('name', CachedAllValuesFieldListFilter)]
+    search_fields = ['name']
+    readonly_fields = [f.name for f in Task._meta.fields]
+    actions = ['retry']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description="Retry selected tasks now")
+    def retry(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(status=Task.QUEUED, run_at=timezone.now(), attempts=0, last_error='')
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['path', 'method', 'status_code', 'duration_ms', 'query_count', 'query_ms', 'trigger', 'created_at', 'downloads']
+    list_filter = ['trigger', 'status_code', 'created_at']
+    search_fields = ['path']
+    fields = [
+        'created_at', 'method', 'path', 'status_code', 'trigger', 'duration_ms', 'query_count', 'query_ms',
+        'sample_interval_ms', 'sample_count', 'template_timings', 'downloads',
+    ]
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/speedscope/', self.admin_site.admin_view(self.download), {'fmt': 'speedscope'}, name='core_requestprofile_speedscope'),
+            path('<int:pk>/collapsed/', self.admin_site.admin_view(self.download), {'fmt': 'collapsed'}, name='core_requestprofile_collapsed'),
+        ] + super().get_urls()
+    
+    def download(self, request, pk, fmt):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            return HttpResponse(status=403)
+        if fmt == 'speedscope':
+            response = HttpResponse(profiling.to_speedscope(profile), content_type='application/json')
+            filename = f'profile-{pk}.speedscope.json'
+        else:
+            response = HttpResponse(profile.stacks + '\n', content_type='text/plain; charset=utf-8')
+            filename = f'profile-{pk}.collapsed.txt'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @admin.display(description="Download")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">speedscope</a> · <a href="{}">collapsed</a>',
+            reverse('admin:core_requestprofile_speedscope', args=[obj.pk]),
+            reverse('admin:core_requestprofile_collapsed', args=[obj.pk]),
+        )
+    
+    @admin.display(description="Templates")
+    def template_timings(self, obj):
+        if not obj.templates:
+            return '-'
+        rows = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+            ((t['name'], t['count'], f"{t['total_ms']:.1f}", f"{t['self_ms']:.1f}") for t in obj.templates),
+        )
+        return format_html('<table><tr><th>Template</th><th>Renders</th><th>Total ms</th><th>Self ms</th></tr>{}</table>', rows)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['short_sql', 'count', 'mean_ms', 'max_ms', 'total_ms', 'view', 'origin', 'last_seen']
+    list_filter = [('view', CachedAllValuesFieldListFilter), 'vendor']
+    search_fields = ['sql', 'view', 'origin']
+    fields = [
+        'sql', 'params_shape', 'vendor', 'view', 'origin', 'count', 'mean_ms', 'max_ms', 'total_ms',
+        'first_seen', 'last_seen', 'query_plan', 'explained_at',
+    ]
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.display(description="SQL")
+    def short_sql(self, obj):
+        return obj.sql[:120]
+    
+    @admin.display(description="Mean ms", ordering='total_ms')
+    def mean_ms(self, obj):
+        return f'{obj.mean_ms:.1f}'
+    
+    @admin.display(description="Query plan")
+    def query_plan(self, obj):
+        # Deleting a row makes its next occurrence capture a fresh plan.
+        return format_html('<pre>{}</pre>', obj.explain) if obj.explain else '-'
+
+
+@admin.register(ArchiveBatch)
+class ArchiveBatchAdmin(admin.ModelAdmin):
+    list_display = ['policy', 'model', 'rows', 'first_pk', 'last_pk', 'size', 'archived_at', 'download_link']
+    list_filter = ['policy', 'archived_at']
+    fields = ['policy', 'model', 'rows', 'first_pk', 'last_pk', 'size', 'archived_at', 'download_link']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        # The archived data is only read for a download.
+        return super().get_queryset(request).defer('data').annotate(size_bytes=Length('data'))
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download), name='core_archivebatch_download'),
+        ] + super().get_urls()
+    
+    def download(self, request, pk):
+        batch = get_object_or_404(ArchiveBatch, pk=pk)
+        if not self.has_view_permission(request, batch):
+            return HttpResponse(status=403)
+        response = HttpResponse(bytes(batch.data), content_type='application/gzip')
+        response['Content-Disposition'] = f'attachment; filename="{batch.policy}-{batch.pk}.jsonl.gz"'
+        return response
+    
+    @admin.display(description="Size", ordering='size_bytes')
+    def size(self, obj):
+        return f'{obj.size_bytes / 1024:.1f} KiB'
+    
+    @admin.display(description="Download")
+    def download_link(self, obj):
+        return format_html('<a href="{}">jsonl.gz</a>', reverse('admin:core_archivebatch_download', args=[obj.pk]))
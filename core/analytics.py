@@ -0,0 +1,164 @@
+"""
+Buffered page-view counting.
+
+A hit is a single atomic ``incr`` on a per-object counter in the cache, so
+detail views never write to the database. Counters are folded into each
+model's ``view_count`` column in batches: ``flush_view_counts`` reads the
+counters with one ``get_many``, applies them in one ``bulk_update`` (a single
+``UPDATE ... CASE`` per batch) and then ``decr``s each counter by the amount
+it applied, so hits that land during a flush are kept for the next one.
+
+A flush only reads the counters hit since the previous one, so its cost
+follows the traffic rather than the table size. The cache has no sets, so
+the dirty list is numbered slots: hits fall in the current epoch
+(``views:epoch``), the first hit of an object in an epoch appends it to that
+epoch's slots, and a flush starts a new epoch and reads the slots of the one
+it closes and the one before, so a hit that raced the previous flush is
+picked up by the next one. Counters themselves are never dropped.
+
+Detail pages are cached at the edge (``core.edge``), so rendering one is
+not a view: each page sends a ``navigator.sendBeacon`` POST to
+``beacon_url(instance)``, which ``core.views.view_beacon`` counts. Warmup
+renders and clients without JavaScript don't count.
+
+With a shared cache (Redis, memcached) the counters are shared by every
+worker and any one of them, or ``manage.py flush_view_counts`` from cron,
+can flush. With the default LocMem cache each worker buffers and flushes
+its own hits. Either way the flush lock is taken with ``cache.add`` so only
+one flush runs per ``VIEW_COUNT_FLUSH_INTERVAL``.
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+
+from .cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+FLUSH_LOCK_KEY = 'views:flush-lock'
+EPOCH_KEY = 'views:epoch'
+
+
+def _counter_key(label, pk):
+    return f'views:{label}:{pk}'
+
+
+def _slots_key(epoch):
+    return f'views:dirty:{epoch}'
+
+
+def _marker_key(epoch, label, pk):
+    return f'views:marked:{epoch}:{label}:{pk}'
+
+
+def _incr(key):
+    """``incr`` that creates a missing key; counts survive a racing creator."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, None):
+            return 1
+        return cache.incr(key)
+
+
+def _epoch():
+    epoch = cache.get(EPOCH_KEY)
+    if epoch is None:
+        cache.add(EPOCH_KEY, 0, None)
+        epoch = cache.get(EPOCH_KEY, 0)
+    return epoch
+
+
+def _mark_dirty(label, pk):
+    """Add an object to the current epoch's dirty slots, once per epoch."""
+    epoch = _epoch()
+    if cache.add(_marker_key(epoch, label, pk), 1, None):
+        slot = _incr(_slots_key(epoch))
+        cache.set(f'{_slots_key(epoch)}:{slot}', (label, pk), None)
+
+
+def tracked_model(label):
+    """The ``VIEW_COUNT_MODELS`` model with ``label`` (``app_label.model_name``), or None."""
+    for name in settings.VIEW_COUNT_MODELS:
+        model = apps.get_model(name)
+        if model._meta.label_lower == label:
+            return model
+    return None
+
+
+def beacon_url(instance):
+    """URL a detail page POSTs to so its view is counted."""
+    return reverse('core:view_beacon', args=[instance._meta.label_lower, instance.pk])
+
+
+def record_view(instance):
+    """Count one view of ``instance`` and flush the buffer if it is due."""
+    label = instance._meta.label_lower
+    _incr(_counter_key(label, instance.pk))
+    _mark_dirty(label, instance.pk)
+    interval = settings.VIEW_COUNT_FLUSH_INTERVAL
+    if interval and cache.add(FLUSH_LOCK_KEY, 1, interval):
+        try:
+            flush_view_counts()
+        except Exception:
+            # Counters stay in the cache and are retried on the next flush.
+            logger.exception('Flushing view counts failed')
+
+
+def _take_dirty():
+    """Start a new epoch and return the ``(label, pk)`` pairs hit in the last two."""
+    epoch = _epoch()
+    try:
+        cache.incr(EPOCH_KEY)
+    except ValueError:
+        cache.set(EPOCH_KEY, epoch + 1, None)
+    dirty = set()
+    for closed in (epoch - 1, epoch):
+        slots = cache.get(_slots_key(closed)) or 0
+        slot_keys = [f'{_slots_key(closed)}:{i}' for i in range(1, slots + 1)]
+        pairs = cache.get_many(slot_keys).values()
+        dirty.update(pairs)
+        if closed < epoch:
+            # Read for the second and last time.
+            cache.delete_many(
+                slot_keys + [_slots_key(closed)] + [_marker_key(closed, label, pk) for label, pk in pairs]
+            )
+    return dirty
+
+
+def flush_view_counts(batch_size=500):
+    """Write buffered hits to ``view_count`` for every tracked model and return the number applied."""
+    dirty = {}
+    for label, pk in _take_dirty():
+        dirty.setdefault(label, []).append(pk)
+    total = 0
+    for name in settings.VIEW_COUNT_MODELS:
+        model = apps.get_model(name)
+        label = model._meta.label_lower
+        keys = {_counter_key(label, pk): pk for pk in dirty.get(label, ())}
+        counts = {key: count for key, count in cache.get_many(list(keys)).items() if count}
+        if not counts:
+            continue
+
+        objs = []
+        for key, count in counts.items():
+            obj = model(pk=keys[key])
+            obj.view_count = F('view_count') + count
+            objs.append(obj)
+        with transaction.atomic():
+            model.objects.bulk_update(objs, ['view_count'], batch_size=batch_size)
+        for key, count in counts.items():
+            try:
+                cache.decr(key, count)
+            except ValueError:
+                pass
+        total += sum(counts.values())
+    if total:
+        # Listings built from view counts are cached under the 'views' namespace.
+        invalidate('views')
+    return total
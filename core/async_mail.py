@@ -0,0 +1,43 @@
+"""Non-blocking email delivery for async views."""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import EmailMessage, send_mail
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+async def asend_mail(subject, message, from_email, recipient_list):
+    """
+    Async counterpart of ``django.core.mail.send_mail``.
+
+    With the SMTP backend the message is delivered with aiosmtplib so the
+    event loop is never blocked on the relay. Any other backend (console,
+    locmem in tests, ...) is called through ``sync_to_async``.
+    """
+    if settings.EMAIL_BACKEND != SMTP_BACKEND:
+        return await sync_to_async(send_mail)(
+            subject=subject,
+            message=message,
+            from_email=from_email,
+            recipient_list=recipient_list,
+            fail_silently=False,
+        )
+
+    # Imported here: with its ssl and email dependencies it adds ~35ms to the
+    # start-up of every process that loads the URLconf.
+    import aiosmtplib
+
+    email = EmailMessage(subject, message, from_email, recipient_list)
+    await aiosmtplib.send(
+        email.message(),
+        sender=email.from_email,
+        recipients=email.recipients(),
+        hostname=settings.EMAIL_HOST,
+        port=settings.EMAIL_PORT,
+        username=settings.EMAIL_HOST_USER or None,
+        password=settings.EMAIL_HOST_PASSWORD or None,
+        use_tls=settings.EMAIL_USE_SSL,
+        start_tls=settings.EMAIL_USE_TLS,
+        timeout=settings.EMAIL_TIMEOUT or 60,
+    )
+    return 1
@@ -0,0 +1,60 @@
+"""
+Minimal registry for in-process benchmarks.
+
+Apps define scenarios in a ``benchmarks`` module using ``@register`` and
+``manage.py benchmark`` runs them against a throwaway test database. A
+scenario receives a ``scale`` factor and returns a list of ``Result``.
+"""
+import time
+
+from django.utils.module_loading import autodiscover_modules
+
+_registry = {}
+
+
+def register(name):
+    """Register a benchmark scenario under ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_benchmarks():
+    autodiscover_modules('benchmarks')
+    return dict(sorted(_registry.items()))
+
+
+class Result:
+    """Timing for ``count`` operations that took ``seconds`` in total."""
+
+    def __init__(self, label, count, seconds, **extra):
+        self.label = label
+        self.count = count
+        self.seconds = seconds
+        self.extra = extra
+
+    @property
+    def per_op_us(self):
+        return self.seconds / self.count * 1e6 if self.count else 0.0
+
+    @property
+    def ops_per_second(self):
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        line = (
+            f'{self.label:<64} {self.count:>8} ops {self.seconds:>9.3f}s '
+            f'{self.per_op_us:>10.1f} us/op {self.ops_per_second:>10.1f} ops/s'
+        )
+        if self.extra:
+            line += '  ' + ' '.join(f'{key}={value}' for key, value in self.extra.items())
+        return line
+
+
+def timed(label, count, func, **extra):
+    """Call ``func`` ``count`` times and return a Result."""
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return Result(label, count, time.perf_counter() - started, **extra)
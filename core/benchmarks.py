@@ -0,0 +1,372 @@
+import asyncio
+import copy
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection, connections
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.test import AsyncClient, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from . import analytics, spam
+from .benchmark import Result, register, timed
+from .models import ContactSubmission
+from .testing import LocalSMTPServer
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _aged_token():
+    return signing.dumps(time.time() - 60, salt=spam.FORM_TOKEN_SALT)
+
+
+@register('contact_spam')
+def contact_spam_flood(scale):
+    """Cost per rejected contact POST for each spam-filter layer under a flood."""
+    count = int(1000 * scale)
+    client = Client()
+    url = reverse('core:contact')
+    base = {'name': 'Bot', 'email': 'bot@example.com', 'subject': 'Offer'}
+    ips = (f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}' for i in itertools.count(1))
+
+    ContactSubmission.objects.bulk_create(
+        [ContactSubmission(name='x', email='x@example.com', subject='Cheap pills', message=f'buy cheap pills casino bonus now {i}', is_spam=True) for i in range(50)]
+        + [ContactSubmission(name='y', email='y@example.com', subject='Project', message=f'hello, I enjoyed your talk about django {i}', is_spam=False) for i in range(50)]
+    )
+    spam.train_from_submissions()
+
+    scenarios = [
+        ('rate limited (same IP)', lambda: {
+            'data': dict(base, message='hi', form_token=_aged_token()), 'REMOTE_ADDR': '10.255.255.255'}),
+        ('missing time-to-submit token', lambda: {
+            'data': dict(base, message='hi'), 'REMOTE_ADDR': next(ips)}),
+        ('duplicate message', lambda: {
+            'data': dict(base, message='the same message every time', form_token=_aged_token()), 'REMOTE_ADDR': next(ips)}),
+        ('bayesian score', lambda: {
+            'data': dict(base, message=f'buy cheap pills casino bonus {time.perf_counter_ns()}', form_token=_aged_token()), 'REMOTE_ADDR': next(ips)}),
+    ]
+
+    results = []
+    for label, make_request in scenarios:
+        cache.clear()
+        spam.train_from_submissions()
+        requests = [make_request() for _ in range(count)]
+        iterator = iter(requests)
+
+        def post():
+            kwargs = next(iterator)
+            client.post(url, kwargs.pop('data'), **kwargs)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = timed(label, count, post)
+        result.extra['db_writes'] = sum(q['sql'].lstrip().upper().startswith(WRITE_PREFIXES) for q in queries.captured_queries)
+        results.append(result)
+    return results
+
+
+@register('contact_concurrency')
+def contact_concurrency(scale):
+    """Throughput of the contact view behind a slow SMTP relay: sync WSGI workers vs one ASGI event loop."""
+    count = int(40 * scale)
+    workers = 4
+    latency = 0.1
+    url = reverse('core:contact')
+
+    def payload(i):
+        return {
+            'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Hello',
+            'message': f'Benchmark message {i} {time.perf_counter_ns()}', 'form_token': _aged_token(),
+        }
+
+    results = []
+    with LocalSMTPServer(latency=latency) as server, override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.port, EMAIL_USE_TLS=False,
+        EMAIL_HOST_USER='owner@example.com', EMAIL_HOST_PASSWORD='',
+        CONTACT_RATE_LIMIT=count * 10,
+    ):
+        # WSGI: every request occupies one of a fixed number of sync workers for its full duration.
+        cache.clear()
+        client = Client()
+
+        def post_sync(i):
+            client.post(url, payload(i), REMOTE_ADDR='10.1.0.1')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(post_sync, range(count)))
+        results.append(Result(
+            f'WSGI, {workers} sync workers', count, time.perf_counter() - started,
+            smtp_latency=latency, delivered=len(server.messages),
+        ))
+
+        # ASGI: all requests share one event loop and overlap while waiting on SMTP.
+        cache.clear()
+        async_client = AsyncClient()
+
+        async def post_all():
+            await asyncio.gather(*[async_client.post(url, payload(i), REMOTE_ADDR='10.1.0.2') for i in range(count)])
+
+        delivered = len(server.messages)
+        started = time.perf_counter()
+        async_to_sync(post_all)()
+        results.append(Result(
+            'ASGI, 1 event loop', count, time.perf_counter() - started,
+            smtp_latency=latency, delivered=len(server.messages) - delivered,
+        ))
+    return results
+
+
+@register('templates')
+def template_render(scale):
+    """Render time per template: plain loaders, cached loader, cached loader + chrome fragment cache."""
+    from blog.models import BlogPost
+    from portfolio.models import Project
+    from public_profile.models import PressMention, SpeakingEngagement
+    from .forms import ContactForm
+
+    count = int(200 * scale)
+    post = BlogPost.objects.create(title='Benchmark post', content='Body text. ' * 200, tags='Django, Python', published=True)
+    project = Project.objects.create(title='Benchmark project', description='Description. ' * 100, short_description='Short', technology_stack='Django, Python')
+    engagement = SpeakingEngagement.objects.create(title='Talk', event_date='2025-01-01', location='Online')
+    mention = PressMention.objects.create(title='Mention', publication='Daily', published_date='2025-01-01')
+    page = Paginator([post] * 10, 5).get_page(1)
+    pages = [
+        ('core/home.html', {}),
+        ('core/about.html', {}),
+        ('core/contact.html', {'form': ContactForm()}),
+        ('blog/blog_list.html', {'page_obj': page, 'posts': page}),
+        ('blog/blog_detail.html', {'post': post, 'related_posts': [post] * 3}),
+        ('portfolio/portfolio_list.html', {'projects': [project] * 6, 'featured_projects': [project] * 2, 'card_cache_timeout': 3600}),
+        ('portfolio/portfolio_detail.html', {'project': project, 'related_projects': [project] * 3}),
+        ('public_profile/media_kit.html', {}),
+        ('public_profile/speaking_engagements.html', {'engagements': [engagement] * 10}),
+        ('public_profile/press_mentions.html', {'mentions': [mention] * 10}),
+    ]
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+
+    plain = copy.deepcopy(settings.TEMPLATES)
+    plain[0]['OPTIONS']['loaders'] = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+    cached = copy.deepcopy(plain)
+    cached[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', plain[0]['OPTIONS']['loaders'])]
+    configurations = [
+        ('plain loaders', {'TEMPLATES': plain, 'CHROME_CACHE_TIMEOUT': 0}),
+        ('cached loader', {'TEMPLATES': cached, 'CHROME_CACHE_TIMEOUT': 0}),
+        ('cached loader + fragments', {'TEMPLATES': cached, 'CHROME_CACHE_TIMEOUT': 3600}),
+    ]
+
+    results = []
+    for name, context in pages:
+        for label, overrides in configurations:
+            with override_settings(**overrides):
+                cache.clear()
+                render_to_string(name, context, request)  # warm loader and fragment caches
+                results.append(timed(f'{name} [{label}]', count, lambda: render_to_string(name, context, request)))
+    return results
+
+
+@register('view_counts')
+def view_counts(scale):
+    """Page-view counting: buffered cache counters vs a per-hit UPDATE, and both paced at 1000 hits/s."""
+    from blog.models import BlogPost
+
+    count = int(20_000 * scale)
+    posts = BlogPost.objects.bulk_create(
+        [BlogPost(title=f'Post {i}', slug=f'post-{i}', content='Text', published=True) for i in range(200)]
+    )
+    targets = itertools.cycle(posts)
+
+    def naive_hit():
+        post = next(targets)
+        BlogPost.objects.filter(pk=post.pk).update(view_count=F('view_count') + 1)
+
+    def paced(label, hit, rate=1000, seconds=3 * scale, threads=8):
+        """Issue ``rate`` hits per second from a thread pool and report latency and errors."""
+        total = int(rate * seconds)
+        latencies, errors = [], []
+        start = time.perf_counter()
+
+        def run(worker):
+            try:
+                for i in range(worker, total, threads):
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    began = time.perf_counter()
+                    try:
+                        hit()
+                    except Exception as e:
+                        errors.append(e)
+                    latencies.append(time.perf_counter() - began)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(run, range(threads)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return Result(
+            label, total, elapsed,
+            p50_us=round(latencies[len(latencies) // 2] * 1e6),
+            p99_us=round(latencies[int(len(latencies) * 0.99)] * 1e6),
+            errors=len(errors),
+        )
+
+    results = []
+    with override_settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+        cache.clear()
+        results.append(timed('record_view (cache incr, no flush)', count, lambda: analytics.record_view(next(targets))))
+        started = time.perf_counter()
+        flushed = analytics.flush_view_counts()
+        results.append(Result(f'flush {len(posts)} counters (bulk_update CASE)', 1, time.perf_counter() - started, hits=flushed))
+        results.append(timed('per-hit UPDATE view_count = view_count + 1', count, naive_hit))
+
+    BlogPost.objects.update(view_count=0)
+    with override_settings(VIEW_COUNT_FLUSH_INTERVAL=1):
+        cache.clear()
+        results.append(paced('paced 1000 hits/s: record_view, flush every 1s', lambda: analytics.record_view(next(targets))))
+        analytics.flush_view_counts()
+        stored = sum(BlogPost.objects.values_list('view_count', flat=True))
+        results[-1].extra['stored'] = stored
+    results.append(paced('paced 1000 hits/s: per-hit UPDATE', naive_hit))
+    return results
+
+
+SESSION_ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+]
+MESSAGE_STORAGES = [
+    'django.contrib.messages.storage.fallback.FallbackStorage',
+    'django.contrib.messages.storage.cookie.CookieStorage',
+]
+
+
+@register('sessions')
+def session_queries(scale):
+    """Queries per anonymous request on a cached page for each session engine and message storage."""
+    from importlib import import_module
+
+    from django.contrib import messages
+    from django.http import HttpResponse
+    from portfolio.models import Project
+
+    count = int(500 * scale)
+    Project.objects.bulk_create(
+        [Project(title=f'Project {i}', slug=f'project-{i}', description='Text', short_description='Short', technology_stack='Django') for i in range(20)]
+    )
+    url = reverse('portfolio:portfolio_list')
+
+    def measure(label, client):
+        client.get(url)  # fill the listing and fragment caches
+        with CaptureQueriesContext(connection) as queries:
+            result = timed(label, count, lambda: client.get(url))
+        result.extra['queries_per_request'] = round(len(queries) / count, 2)
+        result.extra['session_queries'] = sum('django_session' in q['sql'] for q in queries.captured_queries)
+        return result
+
+    results = []
+    for engine in SESSION_ENGINES:
+        name = engine.rsplit('.', 1)[1]
+        with override_settings(SESSION_ENGINE=engine):
+            cache.clear()
+            results.append(measure(f'{name}: no cookies', Client()))
+            # A visitor still carrying a session, e.g. from an earlier flash
+            # message that spilled out of the messages cookie.
+            store = import_module(engine).SessionStore()
+            store['_messages'] = '[]'
+            store.save()
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+            results.append(measure(f'{name}: session cookie', client))
+
+    # Where flash messages that don't fit the 2kB cookie go. The cookie is
+    # compressed, so the text must not be.
+    factory = RequestFactory()
+    flashes = [os.urandom(500).hex() for _ in range(3)]
+    for storage_path in MESSAGE_STORAGES:
+        with override_settings(MESSAGE_STORAGE=storage_path, SESSION_ENGINE=SESSION_ENGINES[0]):
+            from django.contrib.messages.storage import default_storage
+
+            def flash():
+                request = factory.get(url)
+                request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+                request._messages = default_storage(request)
+                for text in flashes:
+                    messages.info(request, text)
+                request._messages.update(HttpResponse())
+                # As SessionMiddleware does.
+                if request.session.modified:
+                    request.session.save()
+
+            with CaptureQueriesContext(connection) as queries:
+                result = timed(f"{storage_path.rsplit('.', 1)[1]}: 3 x 1kB flash messages", count, flash)
+            result.extra['session_queries'] = sum('django_session' in q['sql'] for q in queries.captured_queries)
+            results.append(result)
+    return results
+
+
+@register('profiling')
+def profiling_overhead(scale):
+    """Request cost with the profiling middleware off, on but not sampling, and profiling every request."""
+    from .models import RequestProfile
+
+    count = int(300 * scale)
+    url = reverse('core:about')
+    results = []
+    for label, overrides in [
+        ('profiling disabled (middleware removed)', {'PROFILING_ENABLED': False}),
+        ('enabled, request not sampled', {'PROFILING_ENABLED': True, 'PROFILING_SAMPLE_RATE': 0}),
+        ('enabled, every request profiled (5ms samples)', {'PROFILING_ENABLED': True, 'PROFILING_SAMPLE_RATE': 1, 'PROFILING_INTERVAL': 0.005}),
+    ]:
+        with override_settings(**overrides):
+            # Middleware is set up per handler, so each setting needs its own client.
+            client = Client()
+            client.get(url)
+            results.append(timed(label, count, lambda: client.get(url)))
+    results[-1].extra['profiles_stored'] = RequestProfile.objects.count()
+    return results
+
+
+@register('retention')
+def retention_throughput(scale):
+    """Retention at 100k contact submissions, half expired: rows/s per archive and batch size, then VACUUM/ANALYZE."""
+    import tempfile
+
+    from . import retention
+
+    count = int(100_000 * scale)
+    policy = retention.POLICIES['contact_submissions']
+    message = 'I would like to talk about a project. ' * 12
+    results = []
+    with tempfile.TemporaryDirectory() as directory, override_settings(RETENTION_ARCHIVE_DIR=directory, RETENTION_CONTACT_READ_DAYS=180):
+        for archive, batch_size in [('none', 1000), ('table', 200), ('table', 1000), ('table', 5000), ('file', 1000)]:
+            ContactSubmission.objects.all().delete()
+            ContactSubmission.objects.bulk_create(
+                [ContactSubmission(name=f'Visitor {i}', email=f'visitor{i}@example.com', subject='Hello', message=message) for i in range(count)],
+                batch_size=5000,
+            )
+            first = ContactSubmission.objects.order_by('pk').values_list('pk', flat=True)[0]
+            ContactSubmission.objects.filter(pk__lt=first + count // 2).update(read=True, submitted_at=F('submitted_at') - timedelta(days=365))
+            run = retention.apply(policy, archive=archive, batch_size=batch_size)
+            results.append(Result(
+                f'archive={archive} batch={batch_size}', run.rows, run.seconds,
+                batches=run.batches, archived_kib=round(run.archived_bytes / 1024),
+            ))
+        started = time.perf_counter()
+        statements = retention.compact([ContactSubmission], vacuum=True, analyze=True)
+        results.append(Result('; '.join(statements), 1, time.perf_counter() - started))
+    return results
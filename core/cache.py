@@ -0,0 +1,116 @@
+"""
+Namespace-versioned cache keys.
+
+Every key built with ``versioned_key`` embeds the current version of its
+namespace, so a whole family of entries (all filter/page combinations of a
+listing, say) is invalidated at once by ``invalidate`` without having to
+know the individual keys. Stale entries simply age out.
+
+``cached`` wraps the get/compute/set pattern so that an expiring entry does
+not send every worker to recompute it at once:
+
+* single flight: on a miss only the caller that wins ``cache.add`` on a
+  lock key computes; the others poll briefly for its result. With a shared
+  backend (Redis, memcached) this holds across processes and hosts.
+* early expiration: each entry remembers how long it took to compute, and
+  readers volunteer to refresh it before it expires with a probability
+  that grows as expiry nears and with the cost of recomputing (the XFetch
+  rule), so refreshes are spread out instead of landing on one instant.
+* stale-while-revalidate: entries outlive their timeout by
+  ``CACHE_STALE_TIMEOUT``; while one caller refreshes an expired entry the
+  others keep serving the old value instead of waiting.
+
+Invalidation is unaffected: ``invalidate`` moves ``versioned_key`` to a new
+key, so a stale value is never served after its data changed.
+"""
+import math
+import random
+import time
+import uuid
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+# How long a recompute may hold its lock before another caller takes over.
+LOCK_TIMEOUT = 30
+# How long callers wait for someone else's recompute on a cold miss.
+LOCK_WAIT = 5
+POLL_INTERVAL = 0.05
+
+
+def _version_key(namespace):
+    return f'ns-version:{namespace}'
+
+
+def namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), time.time_ns(), None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, str(namespace_version(namespace)), *map(str, parts)])
+
+
+def invalidate(namespace):
+    cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+class Entry(NamedTuple):
+    value: Any
+    expires: float
+    cost: float
+
+
+def _compute(key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    cost = time.monotonic() - started
+    timeout = timeout(value) if callable(timeout) else timeout
+    cache.set(key, Entry(value, time.time() + timeout, cost), timeout + settings.CACHE_STALE_TIMEOUT)
+    return value
+
+
+def _locked_compute(key, compute, timeout):
+    """Compute and store the value if no one else is; return ``(True, value)`` or ``(False, None)``."""
+    lock, token = f'{key}:lock', uuid.uuid4().hex
+    if not cache.add(lock, token, LOCK_TIMEOUT):
+        return False, None
+    try:
+        return True, _compute(key, compute, timeout)
+    finally:
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+
+def cached(key, compute, timeout, beta=1.0):
+    """
+    Return the value cached under ``key``, calling ``compute()`` to (re)build
+    it with at most one caller doing so at a time. ``timeout`` is in seconds
+    or a function of the computed value; ``beta`` above 1 favours earlier
+    refreshes.
+    """
+    entry = cache.get(key)
+    if isinstance(entry, Entry):
+        # 1 - random() is in (0, 1], so the log is defined and <= 0.
+        if time.time() - entry.cost * beta * math.log(1 - random.random()) < entry.expires:
+            return entry.value
+        # Due for a refresh: one caller recomputes, the rest serve what's there.
+        refreshed, value = _locked_compute(key, compute, timeout)
+        return value if refreshed else entry.value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while True:
+        computed, value = _locked_compute(key, compute, timeout)
+        if computed:
+            return value
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, Entry):
+            return entry.value
+        if time.monotonic() > deadline:
+            # The lock holder is stuck or gone; don't fail the request over it.
+            return _compute(key, compute, timeout)
@@ -0,0 +1,10 @@
+from django.conf import settings
+
+
+def site_chrome(request):
+    """Timeout and version for the cached navigation/footer fragments in base.html, and the public site URL."""
+    return {
+        'site_url': settings.SITE_URL.rstrip('/'),
+        'chrome_cache_timeout': settings.CHROME_CACHE_TIMEOUT,
+        'chrome_cache_version': settings.CHROME_CACHE_VERSION,
+    }
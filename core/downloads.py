@@ -0,0 +1,94 @@
+"""
+File downloads with HTTP range support.
+
+``ranged_file_response`` serves a file from disk with ``Accept-Ranges``,
+answers a single ``Range: bytes=...`` with 206 (or 416 when it can't be
+satisfied) and honours ``If-Range`` and ``If-None-Match`` against the
+given ETag, so interrupted downloads resume where they stopped. Requests
+for several ranges at once get the whole file, which RFC 9110 allows.
+"""
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single byte range, ``None`` to ignore it, or ``False`` if unsatisfiable."""
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes.
+        start, end = max(0, size - int(last)), size - 1
+        if int(last) == 0:
+            return False
+    if start >= size:
+        return False
+    return start, end
+
+
+class _RangeReader:
+    """Streams ``length`` bytes of an open file from ``start``, closing it when the response is closed."""
+
+    def __init__(self, f, start, length):
+        self.f = f
+        self.start = start
+        self.length = length
+
+    def __iter__(self):
+        self.f.seek(self.start)
+        length = self.length
+        while length > 0:
+            chunk = self.f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.f.close()
+
+
+def ranged_file_response(request, path, etag, content_type, filename):
+    """
+    Serve ``path`` as an attachment, honouring conditional and single
+    byte-range requests. Raises ``FileNotFoundError`` if ``path`` is gone.
+    """
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        # One handle for the size and the body: the file may be replaced and
+        # unlinked at any moment, but an open file stays readable.
+        f = open(path, 'rb')
+        size = os.fstat(f.fileno()).st_size
+        byte_range = None
+        header = request.headers.get('Range')
+        if header and request.method == 'GET' and request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range(header, size)
+        if byte_range is False:
+            f.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(_RangeReader(f, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(f, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
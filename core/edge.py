@@ -0,0 +1,147 @@
+"""
+Edge (CDN / reverse proxy) caching.
+
+``EdgeCacheMiddleware`` marks anonymous GET and HEAD responses as shareable
+(``s-maxage`` plus ``stale-while-revalidate``) and sends a ``Surrogate-Key``
+header naming the model instances a view registered with ``tag``. Saving or
+deleting one of those instances purges its keys through the configured
+``EDGE_PURGER`` once the transaction commits.
+
+A response stays private when it could differ between visitors. That covers
+requests carrying a session or messages cookie, responses that set cookies,
+pages that displayed flash messages or embedded a CSRF token (forms), and
+views that set their own ``Cache-Control`` (``never_cache``, say).
+Anonymous pages then no longer need ``Vary: Cookie``. The edge should pass
+requests that carry the session or messages cookie to the origin, so signed
+in visitors and pending flash messages bypass the cached copy.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+
+
+def model_key(model):
+    """Key shared by every page that lists instances of ``model``."""
+    return model._meta.label_lower
+
+
+def instance_key(instance):
+    return f'{model_key(instance)}:{instance.pk}'
+
+
+def tag(request, *objects):
+    """Name the models (listing pages) or instances (detail pages) a response renders."""
+    keys = request.__dict__.setdefault('_surrogate_keys', {})
+    for obj in objects:
+        keys[model_key(obj) if isinstance(obj, type) else instance_key(obj)] = None
+
+
+def _private_reason(request, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return 'method or status'
+    if response.has_header('Cache-Control'):
+        return 'view set Cache-Control'
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or CookieStorage.cookie_name in request.COOKIES:
+        return 'session or messages cookie'
+    if response.cookies:
+        return 'sets cookies'
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return 'embeds a CSRF token'
+    storage = getattr(request, '_messages', None)
+    if storage is not None and storage.used:
+        return 'displayed flash messages'
+    return None
+
+
+class EdgeCacheMiddleware(MiddlewareMixin):
+    """
+    Add shared-cache headers to anonymous public pages.
+
+    Must come before the session, CSRF and messages middleware so it sees
+    the cookies and ``Vary`` headers they add.
+    """
+
+    def process_response(self, request, response):
+        max_age = settings.EDGE_CACHE_MAX_AGE
+        if not max_age:
+            return response
+        if _private_reason(request, response):
+            if not response.has_header('Cache-Control'):
+                patch_cache_control(response, private=True)
+            return response
+
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            s_maxage=max_age,
+            stale_while_revalidate=settings.EDGE_CACHE_STALE_WHILE_REVALIDATE,
+        )
+        # Reading user or messages touches the session, which adds Vary: Cookie
+        # even though nothing above depends on it for a cookieless request.
+        vary = [v.strip() for v in response.get('Vary', '').split(',') if v.strip().lower() not in ('', 'cookie')]
+        del response['Vary']
+        if vary:
+            patch_vary_headers(response, vary)
+        keys = getattr(request, '_surrogate_keys', None)
+        if keys:
+            response[SURROGATE_KEY_HEADER] = ' '.join(keys)
+        return response
+
+
+class NullPurger:
+    """Default purger: no edge cache, nothing to purge."""
+
+    def purge(self, keys):
+        pass
+
+
+class HTTPPurger:
+    """
+    Send ``PURGE`` to ``EDGE_PURGE_URL`` with the keys in a ``Surrogate-Key`` header.
+
+    This is what Varnish (with a small VCL ``ban`` on ``obj.http.Surrogate-Key``)
+    and the local stand-in in ``core.testing`` expect.
+    """
+
+    def __init__(self, url=None, timeout=None):
+        self.url = url or settings.EDGE_PURGE_URL
+        self.timeout = timeout or settings.EDGE_PURGE_TIMEOUT
+
+    def purge(self, keys):
+        # urllib.request costs ~30ms to import; only processes that purge pay it.
+        import urllib.request
+
+        request = urllib.request.Request(self.url, method='PURGE', headers={SURROGATE_KEY_HEADER: ' '.join(keys)})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def get_purger():
+    return import_string(settings.EDGE_PURGER)()
+
+
+def purge(keys):
+    """Purge ``keys`` at the edge; a failed purge is logged and left to s-maxage."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+    try:
+        get_purger().purge(keys)
+    except Exception:
+        logger.exception('Edge purge failed for %s', ' '.join(keys))
+
+
+def purge_instance_on_commit(sender, instance, **kwargs):
+    """``post_save``/``post_delete`` receiver purging the instance and every listing of its model."""
+    keys = [instance_key(instance), model_key(sender)]
+    transaction.on_commit(lambda: purge(keys))
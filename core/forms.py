@@ -1,14 +1,21 @@
 from django import forms
+from django.conf import settings
+from . import spam
 from .models import ContactSubmission
 
 
 class ContactForm(forms.ModelForm):
-    """Contact form with honeypot spam protection."""
+    """Contact form with layered spam protection (see ``core.spam``)."""
     honeypot = forms.CharField(
         required=False,
         widget=forms.HiddenInput(),
         label=''
     )
+    form_token = forms.CharField(
+        required=False,
+        widget=forms.HiddenInput(),
+        label=''
+    )
     
     class Meta:
         model = ContactSubmission
@@ -33,17 +40,35 @@ class ContactForm(forms.ModelForm):
             }),
         }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound:
+            self.initial['form_token'] = spam.make_form_token()
+    
+    def clean_form_token(self):
+        """Reject forms submitted faster than a human could, or long after rendering."""
+        token = self.cleaned_data.get('form_token')
+        error = spam.check_form_token(token)
+        if error:
+            raise forms.ValidationError(error)
+        return token
+    
     def clean_honeypot(self):
         """Check honeypot field for spam."""
         honeypot = self.cleaned_data.get('honeypot')
         if honeypot:
             raise forms.ValidationError('Spam detected')
         return honeypot
-
-
-
-
-
-
-
-
+    
+    def clean(self):
+        """Run the cache-backed and statistical checks once the fields are valid."""
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        
+        text = f"{cleaned_data['subject']} {cleaned_data['message']}"
+        if spam.is_duplicate(cleaned_data['message']):
+            raise forms.ValidationError('This message has already been sent.')
+        if spam.spam_score(text) >= settings.CONTACT_SPAM_THRESHOLD:
+            raise forms.ValidationError('Spam detected')
+        return cleaned_data
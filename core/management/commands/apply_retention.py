@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import retention
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete rows past their retention period in small batches, then optionally VACUUM/ANALYZE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies', nargs='*', help=f"Policies to apply (default: all of {', '.join(retention.POLICIES)})")
+        parser.add_argument('--archive', choices=retention.ARCHIVES, help='Where removed rows go (default: RETENTION_ARCHIVE)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows archived and deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be removed')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards (SQLite: the whole database)')
+        parser.add_argument('--analyze', action='store_true', help='Refresh planner statistics afterwards')
+
+    def handle(self, *args, **options):
+        unknown = set(options['policies']) - set(retention.POLICIES)
+        if unknown:
+            raise CommandError(f"Unknown polic{'ies' if len(unknown) > 1 else 'y'}: {', '.join(sorted(unknown))}")
+        policies = [retention.POLICIES[name] for name in options['policies'] or retention.POLICIES]
+        archive = options['archive'] or settings.RETENTION_ARCHIVE
+
+        for policy in policies:
+            run = retention.apply(
+                policy, archive=archive, batch_size=options['batch_size'], sleep=options['sleep'], dry_run=options['dry_run'],
+            )
+            if options['dry_run']:
+                self.stdout.write(f'{policy.name}: {run.rows} row(s) would be removed.')
+                continue
+            line = (
+                f'{policy.name}: moved {run.rows} row(s) (+{run.related_rows} related) in {run.batches} batch(es), '
+                f'{run.seconds:.2f}s, {run.rows_per_second:.0f} rows/s'
+            )
+            if archive != 'none':
+                line += f', {run.archived_bytes / 1024:.0f} KiB archived to {run.path or "ArchiveBatch"}'
+            self.stdout.write(self.style.SUCCESS(line + '.'))
+
+        if not options['dry_run'] and (options['vacuum'] or options['analyze']):
+            for statement in retention.compact([policy.get_model() for policy in policies], options['vacuum'], options['analyze']):
+                self.stdout.write(f'Ran {statement}')
@@ -0,0 +1,45 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from core.benchmark import get_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Run registered performance benchmarks against a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: all)')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply the workload size of each benchmark')
+        parser.add_argument('--list', action='store_true', help='List available benchmarks and exit')
+
+    def handle(self, *args, **options):
+        benchmarks = get_benchmarks()
+        if options['list']:
+            for name, func in benchmarks.items():
+                summary = (func.__doc__ or '').strip().split('\n')[0]
+                self.stdout.write(f'{name:<24} {summary}')
+            return
+        
+        names = options['names'] or list(benchmarks)
+        unknown = set(names) - set(benchmarks)
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+        
+        # Benchmarks deliberately trigger 4xx responses; keep the report readable.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        
+        # Production-like settings, but never touch the real database or send real email.
+        with override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=['*'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                for name in names:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+                    for result in benchmarks[name](options['scale']):
+                        self.stdout.write(str(result))
+            finally:
+                teardown_databases(old_config, verbosity=0)
@@ -0,0 +1,40 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in small batches, so the session table is never locked for long'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Cookie and cache sessions expire by themselves.
+            store.clear_expired()
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no session rows; nothing to delete.')
+            return
+
+        Session = store.get_model_class()
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = batches = 0
+        started = time.monotonic()
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            # Session has no relations, so this is a single DELETE per batch.
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired session(s) in {batches} batch(es) ({elapsed:.2f}s).'
+        ))
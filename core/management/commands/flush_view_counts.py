@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.analytics import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Write page views buffered in the cache to the view_count columns'
+
+    def handle(self, *args, **options):
+        hits = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {hits} buffered views.'))
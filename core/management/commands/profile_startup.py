@@ -0,0 +1,38 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+from core.startup import cold_start
+
+
+class Command(BaseCommand):
+    help = 'Cold-start the WSGI app in a fresh process and report import time, time to first response and RSS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help="Request served after the import ('' to skip)")
+        parser.add_argument('--runs', type=int, default=3, help='Cold starts to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Packages and modules to list')
+
+    def handle(self, *args, **options):
+        runs = [cold_start(options['path']) for _ in range(max(1, options['runs']))]
+        # Module breakdowns come from the median run by import time.
+        runs.sort(key=lambda run: run.import_seconds)
+        median = runs[len(runs) // 2]
+        top = options['top']
+        
+        self.stdout.write(f"{'self ms':>9}  package")
+        for package, self_us in median.by_package()[:top]:
+            self.stdout.write(f'{self_us / 1000:9.1f}  {package}')
+        self.stdout.write('')
+        self.stdout.write(f"{'cum. ms':>9}  module")
+        for item in median.slowest(top):
+            self.stdout.write(f'{item.cumulative_us / 1000:9.1f}  {item.module}')
+        self.stdout.write('')
+        
+        summary = (
+            f"wsgi import {statistics.median(r.import_seconds for r in runs) * 1000:.0f}ms, "
+            f"peak RSS {statistics.median(r.rss_kb for r in runs) / 1024:.1f}MB"
+        )
+        if options['path']:
+            first = statistics.median(r.first_response_seconds for r in runs)
+            summary += f", first response to {options['path']} {first * 1000:.0f}ms ({median.status})"
+        self.stdout.write(self.style.SUCCESS(f'{summary} (median of {len(runs)} cold start(s)).'))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.profiling import PROFILE_HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed header value that makes the profiling middleware profile a request'
+
+    def handle(self, *args, **options):
+        token = make_token()
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write(self.style.WARNING('PROFILING_ENABLED is off; requests will not be profiled.'))
+        self.stdout.write(token)
+        self.stdout.write(
+            f"Valid for {settings.PROFILING_TOKEN_MAX_AGE}s. For example:\n"
+            f"  curl -sI -H '{PROFILE_HEADER}: {token}' {settings.SITE_URL}/about/\n"
+            "The response's X-Profile-Id names the stored profile in the admin."
+        )
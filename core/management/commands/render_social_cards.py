@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from core.social import CARD_DIR, card_key, card_name, render_card
+
+
+class Command(BaseCommand):
+    help = 'Render missing Open Graph cards for every model in SOCIAL_CARD_MODELS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (1 = run in this process)')
+        parser.add_argument('--force', action='store_true', help='Redraw cards that already exist')
+        parser.add_argument('--prune', action='store_true', help='Delete stored cards no instance uses any more')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'] or 1)
+        started = time.monotonic()
+        
+        wanted = {}
+        for label in settings.SOCIAL_CARD_MODELS:
+            for instance in apps.get_model(label)._default_manager.iterator():
+                fields = instance.social_card_fields()
+                wanted[card_name(card_key(fields))] = fields
+        todo = [name for name in wanted if options['force'] or not default_storage.exists(name)]
+        
+        render = partial(
+            render_card,
+            fmt=settings.SOCIAL_CARD_FORMAT,
+            site_name=settings.SOCIAL_CARD_SITE_NAME,
+            font=settings.SOCIAL_CARD_FONT,
+        )
+        fields = [wanted[name] for name in todo]
+        if workers == 1:
+            images = map(render, fields)
+        else:
+            # Workers only draw; this process owns storage and the database.
+            pool = ProcessPoolExecutor(max_workers=workers)
+            images = pool.map(render, fields, chunksize=max(1, len(fields) // (workers * 4)))
+        try:
+            for name, content in zip(todo, images):
+                default_storage.delete(name)
+                default_storage.save(name, ContentFile(content))
+        finally:
+            if workers > 1:
+                pool.shutdown()
+        
+        pruned = 0
+        if options['prune'] and default_storage.exists(CARD_DIR):
+            for directory in default_storage.listdir(CARD_DIR)[0]:
+                for filename in default_storage.listdir(f'{CARD_DIR}/{directory}')[1]:
+                    name = f'{CARD_DIR}/{directory}/{filename}'
+                    if name not in wanted:
+                        default_storage.delete(name)
+                        pruned += 1
+        
+        elapsed = time.monotonic() - started
+        rate = len(todo) / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(todo)} of {len(wanted)} cards with {workers} worker(s) in {elapsed:.2f}s '
+            f'({rate:.1f} cards/s); pruned {pruned}.'
+        ))
@@ -0,0 +1,63 @@
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.taskqueue import Worker
+
+logger = logging.getLogger(__name__)
+
+# Longest pause, in seconds, after repeated errors outside a task.
+MAX_ERROR_BACKOFF = 60
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Tasks run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='thread for I/O-bound tasks (email, HTTP), process for CPU-bound ones (images)')
+        parser.add_argument('--batch-size', type=int, default=0, help='Tasks claimed at once (default: 2 x concurrency)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once no task is due instead of polling')
+
+    def handle(self, *args, **options):
+        stopping = []
+        # Finish the batch in hand on SIGTERM/SIGINT; a second signal exits at once.
+        def stop(signum, frame):
+            if stopping:
+                raise KeyboardInterrupt
+            stopping.append(signum)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        
+        started = time.monotonic()
+        with Worker(options['concurrency'], options['pool'], options['batch_size'] or None) as worker:
+            self.stdout.write(f'Worker {worker.worker_id} running with {worker.concurrency} {options["pool"]}(s).')
+            errors = 0
+            while not stopping:
+                try:
+                    claimed = worker.run_once()
+                except Exception:
+                    # A locked database or a dropped connection while claiming
+                    # or recording; tasks already claimed are requeued when
+                    # their lease runs out.
+                    errors += 1
+                    logger.exception('Worker loop failed (%d in a row)', errors)
+                    close_old_connections()
+                    time.sleep(min(MAX_ERROR_BACKOFF, max(options['poll_interval'], 0.1) * 2 ** errors))
+                    continue
+                errors = 0
+                if not claimed:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+        
+        elapsed = time.monotonic() - started
+        summary = f'Ran {worker.processed} task(s), {worker.failed} failed attempt(s), in {elapsed:.2f}s'
+        latency = worker.latency_summary()
+        if latency:
+            summary += f"; pickup latency p50 {latency['p50'] * 1000:.0f}ms, p95 {latency['p95'] * 1000:.0f}ms, max {latency['max'] * 1000:.0f}ms"
+        self.stdout.write(self.style.SUCCESS(summary + '.'))
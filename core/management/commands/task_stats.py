@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+from django.utils import timezone
+from core.models import Task
+from core.taskqueue import latency_stats
+
+
+class Command(BaseCommand):
+    help = 'Show queue depth and task latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='Window of finished tasks to measure')
+        parser.add_argument('--warn-after', type=int, default=300,
+                            help='Warn when a task has been due for longer than this many seconds')
+
+    def handle(self, *args, **options):
+        counts = dict(Task.objects.order_by().values_list('status').annotate(n=Count('id')))
+        self.stdout.write('  '.join(f'{label}: {counts.get(status, 0)}' for status, label in Task.STATUS_CHOICES))
+        now = timezone.now()
+        due = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).aggregate(count=Count('id'), oldest=Min('run_at'))
+        self.stdout.write(f"Due now: {due['count']}")
+        if due['oldest'] and (now - due['oldest']).total_seconds() > options['warn_after']:
+            # Emails and renders wait in the queue until a worker picks them up.
+            self.stderr.write(self.style.WARNING(
+                f"Oldest due task has waited {(now - due['oldest']).total_seconds():.0f}s. "
+                f"Is a worker running? Start one with: manage.py run_worker"
+            ))
+        
+        stats = latency_stats(timezone.now() - timedelta(minutes=options['minutes']))
+        if not stats:
+            self.stdout.write(f"No tasks finished in the last {options['minutes']} minutes.")
+        for label, values in stats.items():
+            self.stdout.write(
+                f"{label:>10}: n={values['count']}  p50 {values['p50'] * 1000:.0f}ms  "
+                f"p95 {values['p95'] * 1000:.0f}ms  max {values['max'] * 1000:.0f}ms"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core import spam
+
+
+class Command(BaseCommand):
+    help = 'Retrain the contact form spam classifier from submissions marked as spam'
+
+    def handle(self, *args, **options):
+        classifier = spam.train_from_submissions()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Trained on {classifier.spam_docs} spam and {classifier.ham_docs} legitimate submissions '
+                f'({classifier.vocabulary} tokens).'
+            )
+        )
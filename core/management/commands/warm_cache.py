@@ -0,0 +1,43 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from core.warmup import public_urls, warm
+
+
+class Command(BaseCommand):
+    help = 'Render every public page once to fill the caches, and report per-URL render times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Pages rendered in parallel')
+        parser.add_argument('--top', type=int, default=0, help='Only list the N slowest pages (0 = all)')
+        parser.add_argument('--slow', type=float, default=500, help='Flag pages slower than this many milliseconds')
+
+    def handle(self, *args, **options):
+        urls = public_urls()
+        started = time.monotonic()
+        results = warm(urls, threads=options['threads'])
+        elapsed = time.monotonic() - started
+        
+        # Slowest first, so the report doubles as a slow-page list.
+        results.sort(key=lambda r: r.seconds, reverse=True)
+        shown = results[:options['top']] if options['top'] else results
+        self.stdout.write(f"{'ms':>9}  {'status':>6}  {'bytes':>9}  url")
+        for result in shown:
+            line = f'{result.seconds * 1000:9.1f}  {result.status:>6}  {result.size:>9}  {result.url}'
+            if result.status != 200:
+                line = self.style.ERROR(line)
+            elif result.seconds * 1000 > options['slow']:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+        
+        times = sorted(r.seconds * 1000 for r in results)
+        failed = sum(1 for r in results if r.status != 200)
+        summary = f'Warmed {len(results)} pages with {options["threads"]} thread(s) in {elapsed:.2f}s'
+        if times:
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            summary += f' (median {statistics.median(times):.1f}ms, p95 {p95:.1f}ms, slowest {times[-1]:.1f}ms)'
+        if failed:
+            self.stdout.write(self.style.ERROR(f'{summary}; {failed} did not return 200.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}.'))
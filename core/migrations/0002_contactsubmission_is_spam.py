@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='is_spam',
+            field=models.BooleanField(default=False, help_text='Marked as spam; used to train the contact spam filter'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('trigger', models.CharField(choices=[('sampled', 'Random sample'), ('header', 'Signed header')], max_length=10)),
+                ('duration_ms', models.FloatField()),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('query_ms', models.FloatField(default=0)),
+                ('sample_interval_ms', models.FloatField()),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('stacks', models.TextField(blank=True, help_text="Collapsed stacks: one 'outer;...;inner count' line per distinct stack")),
+                ('templates', models.JSONField(blank=True, default=list, help_text='Per-template render counts and times')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('sql', models.TextField(help_text='Normalized SQL: literals and IN lists collapsed')),
+                ('params_shape', models.CharField(blank=True, help_text='Parameter types, not values', max_length=200)),
+                ('vendor', models.CharField(max_length=20)),
+                ('view', models.CharField(blank=True, help_text='View of the most recent occurrence', max_length=200)),
+                ('origin', models.CharField(blank=True, help_text='Project code that issued the most recent occurrence', max_length=300)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('total_ms', models.FloatField()),
+                ('max_ms', models.FloatField()),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('explain', models.TextField(blank=True)),
+                ('explained_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ['-total_ms'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='core_contac_submitt_8bf967_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['email'], name='core_contac_email_44c0bc_idx'),
+        ),
+    ]
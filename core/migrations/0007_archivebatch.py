@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_contactsubmission_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy', models.CharField(max_length=50)),
+                ('model', models.CharField(help_text='Label of the model the policy removes rows from', max_length=100)),
+                ('first_pk', models.BigIntegerField()),
+                ('last_pk', models.BigIntegerField()),
+                ('rows', models.PositiveIntegerField(help_text="Rows of the policy's model; related rows are archived with them")),
+                ('data', models.BinaryField(help_text='gzip of the rows serialized one per line; restore with loaddata')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Archive batches',
+                'ordering': ['-archived_at', '-id'],
+                'indexes': [models.Index(fields=['model', 'first_pk'], name='core_archiv_model_f0b9e3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_archivebatch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contactsubmission',
+            name='core_contac_email_44c0bc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='contact_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='contact_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(django.db.models.functions.text.Lower('subject'), name='contact_subject_lower_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class ContactSubmission(models.Model):
@@ -9,11 +11,148 @@ class ContactSubmission(models.Model):
     message = models.TextField()
     submitted_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
+    is_spam = models.BooleanField(default=False, help_text="Marked as spam; used to train the contact spam filter")
     
     class Meta:
         ordering = ['-submitted_at']
         verbose_name = "Contact Submission"
         verbose_name_plural = "Contact Submissions"
+        indexes = [
+            # Keyset pages of the admin changelist.
+            models.Index(fields=['-submitted_at', '-id']),
+            # Its case-insensitive prefix search.
+            models.Index(Lower('email'), name='contact_email_lower_idx'),
+            models.Index(Lower('name'), name='contact_name_lower_idx'),
+            models.Index(Lower('subject'), name='contact_subject_lower_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.name} - {self.subject}"
\ No newline at end of file
+        return f"{self.name} - {self.subject}"
+
+
+class Task(models.Model):
+    """A unit of deferred work, run by ``manage.py run_worker`` (see core/taskqueue.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=200, help_text="Registered task name")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not run before this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Claiming scans due tasks in run_at order; also serves lease reaping.
+            models.Index(fields=['status', 'run_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+    
+    @property
+    def wait(self):
+        """Time from being due to being picked up on the last attempt."""
+        if self.started_at:
+            return self.started_at - self.run_at
+    
+    @property
+    def runtime(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+
+
+class RequestProfile(models.Model):
+    """A sampled request's stack profile and timings (see core/profiling.py)."""
+    SAMPLED = 'sampled'
+    HEADER = 'header'
+    TRIGGER_CHOICES = [
+        (SAMPLED, 'Random sample'),
+        (HEADER, 'Signed header'),
+    ]
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    query_ms = models.FloatField(default=0)
+    sample_interval_ms = models.FloatField()
+    sample_count = models.PositiveIntegerField(default=0)
+    stacks = models.TextField(blank=True, help_text="Collapsed stacks: one 'outer;...;inner count' line per distinct stack")
+    templates = models.JSONField(default=list, blank=True, help_text="Per-template render counts and times")
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+
+
+class SlowQuery(models.Model):
+    """Statements over ``SLOW_QUERY_THRESHOLD_MS``, one row per SQL fingerprint (see core/querylog.py)."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField(help_text="Normalized SQL: literals and IN lists collapsed")
+    params_shape = models.CharField(max_length=200, blank=True, help_text="Parameter types, not values")
+    vendor = models.CharField(max_length=20)
+    view = models.CharField(max_length=200, blank=True, help_text="View of the most recent occurrence")
+    origin = models.CharField(max_length=300, blank=True, help_text="Project code that issued the most recent occurrence")
+    count = models.PositiveIntegerField(default=1)
+    total_ms = models.FloatField()
+    max_ms = models.FloatField()
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    explain = models.TextField(blank=True)
+    explained_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-total_ms']
+        verbose_name_plural = "Slow queries"
+    
+    def __str__(self):
+        return self.sql[:80]
+    
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count
+
+
+
+class ArchiveBatch(models.Model):
+    """Rows moved out of a hot table by a retention policy, as gzipped JSON Lines (see core/retention.py)."""
+    policy = models.CharField(max_length=50)
+    model = models.CharField(max_length=100, help_text="Label of the model the policy removes rows from")
+    first_pk = models.BigIntegerField()
+    last_pk = models.BigIntegerField()
+    rows = models.PositiveIntegerField(help_text="Rows of the policy's model; related rows are archived with them")
+    data = models.BinaryField(help_text="gzip of the rows serialized one per line; restore with loaddata")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-archived_at', '-id']
+        verbose_name_plural = "Archive batches"
+        indexes = [
+            models.Index(fields=['model', 'first_pk']),
+        ]
+    
+    def __str__(self):
+        return f"{self.policy}: {self.rows} row(s), pk {self.first_pk}-{self.last_pk}"
@@ -0,0 +1,315 @@
+"""
+Opt-in request profiling.
+
+With ``PROFILING_ENABLED`` on, ``ProfilingMiddleware`` profiles a random
+``PROFILING_SAMPLE_RATE`` fraction of requests, plus any request carrying a
+valid signed ``X-Profile`` header (``manage.py profiling_token`` prints
+one). Otherwise the middleware removes itself, and an unsampled request
+costs a header lookup and a call to ``random()``.
+
+A profiled request gets:
+
+* a stack sampler: a thread that reads the request's stacks with
+  ``sys._current_frames()`` every ``PROFILING_INTERVAL`` seconds. Under
+  ASGI that covers both the event loop thread (async views) and the
+  request's thread-sensitive worker thread (sync views and the ORM);
+* per-template render counts with inclusive and self time;
+* a query count and total query time.
+
+It is stored as a ``RequestProfile``, with stacks in the collapsed format
+read by ``flamegraph.pl`` and speedscope. The admin offers both that file
+and a native speedscope file for download.
+"""
+import contextvars
+import functools
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_SALT = 'core.profiling'
+# Innermost frames of a thread that is waiting for work, not doing it.
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('thread.py', '_worker'),
+}
+
+_active = contextvars.ContextVar('request_profile', default=None)
+_site_roots = [p for p in sys.path if p.endswith('-packages')]
+
+
+def make_token():
+    return signing.dumps('profile', salt=TOKEN_SALT)
+
+
+def _valid_token(value):
+    try:
+        return signing.loads(value, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename):
+    for root in [str(settings.BASE_DIR), *_site_roots]:
+        if filename.startswith(root):
+            return filename[len(root):].lstrip('/')
+    return '/'.join(Path(filename).parts[-2:])
+
+
+def _label(code):
+    return f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+class Sampler(threading.Thread):
+    """Counts the distinct stacks of ``threads`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, threads, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.threads = threads
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in self.threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                if (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profile:
+    """Everything recorded for one request."""
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.interval = settings.PROFILING_INTERVAL
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.templates = {}
+        self._template_stack = []
+        self._sampler = None
+        self._started = None
+        self.seconds = None
+
+    def start(self, threads):
+        self._started = time.perf_counter()
+        self._sampler = Sampler(threads, self.interval)
+        self._sampler.start()
+
+    def stop(self):
+        self._sampler.stop()
+        self.seconds = time.perf_counter() - self._started
+
+    def _execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+    def watch_queries(self):
+        # Connections are per thread: call from the thread that runs the ORM.
+        for connection in connections.all():
+            connection.execute_wrappers.append(self._execute)
+
+    def unwatch_queries(self):
+        for connection in connections.all():
+            if self._execute in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self._execute)
+
+    def enter_template(self, name):
+        self._template_stack.append([name, time.perf_counter(), 0.0])
+
+    def exit_template(self):
+        name, started, children = self._template_stack.pop()
+        elapsed = time.perf_counter() - started
+        if self._template_stack:
+            self._template_stack[-1][2] += elapsed
+        stats = self.templates.setdefault(name, {'name': name, 'count': 0, 'total_ms': 0.0, 'self_ms': 0.0})
+        stats['count'] += 1
+        # Recursive includes would double count inclusive time; that's rare here.
+        stats['total_ms'] += elapsed * 1000
+        stats['self_ms'] += (elapsed - children) * 1000
+
+    def save(self, request, response):
+        from .models import RequestProfile
+
+        stacks = sorted(self._sampler.stacks.items(), key=lambda item: -item[1])
+        templates = sorted(self.templates.values(), key=lambda t: -t['total_ms'])
+        for stats in templates:
+            stats['total_ms'] = round(stats['total_ms'], 3)
+            stats['self_ms'] = round(stats['self_ms'], 3)
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            status_code=response.status_code,
+            trigger=self.trigger,
+            duration_ms=self.seconds * 1000,
+            query_count=self.queries,
+            query_ms=self.query_seconds * 1000,
+            sample_interval_ms=self.interval * 1000,
+            sample_count=self._sampler.samples,
+            stacks='\n'.join(f'{stack} {count}' for stack, count in stacks),
+            templates=templates,
+        )
+        # Keep only the newest PROFILING_KEEP profiles.
+        cutoff = RequestProfile.objects.order_by('-pk').values_list('pk', flat=True)[settings.PROFILING_KEEP:settings.PROFILING_KEEP + 1]
+        if cutoff:
+            RequestProfile.objects.filter(pk__lte=cutoff[0]).delete()
+        return profile
+
+
+def _instrument_templates():
+    """Wrap ``Template._render`` once; it only records while a profile is active."""
+    from django.template.base import Template
+
+    if getattr(Template._render, 'profiled', False):
+        return
+    render = Template._render
+
+    @functools.wraps(render)
+    def _render(self, context):
+        profile = _active.get()
+        if profile is None:
+            return render(self, context)
+        profile.enter_template(self.origin.template_name or self.name or '<string>')
+        try:
+            return render(self, context)
+        finally:
+            profile.exit_template()
+
+    _render.profiled = True
+    Template._render = _render
+
+
+def to_speedscope(profile):
+    """A ``RequestProfile`` as a speedscope "sampled" profile, one sample per distinct stack weighted by its time."""
+    frames, index, samples, weights = [], {}, [], []
+    for line in profile.stacks.splitlines():
+        stack, _, count = line.rpartition(' ')
+        sample = []
+        for label in stack.split(';'):
+            if label not in index:
+                index[label] = len(frames)
+                name, _, location = label.rpartition(' (')
+                file, _, line_number = location.rstrip(')').rpartition(':')
+                frames.append({'name': name, 'file': file, 'line': int(line_number)})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(int(count) * profile.sample_interval_ms)
+    title = f'{profile.method} {profile.path}'
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': title,
+        'exporter': 'personal_website',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': title,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    })
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests. Goes first in ``MIDDLEWARE`` so the samples
+    cover the rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _instrument_templates()
+
+    def _trigger(self, request):
+        header = request.headers.get(PROFILE_HEADER)
+        if header and _valid_token(header):
+            from .models import RequestProfile
+            return RequestProfile.HEADER
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            from .models import RequestProfile
+            return RequestProfile.SAMPLED
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profile = Profile(trigger)
+        token = _active.set(profile)
+        profile.watch_queries()
+        profile.start([threading.get_ident()])
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+            profile.unwatch_queries()
+            _active.reset(token)
+        return self._finish(response, profile.save(request, response))
+
+    async def __acall__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+
+        profile = Profile(trigger)
+        token = _active.set(profile)
+        # Sync views and the ORM run in this request's thread-sensitive
+        # thread; find it, and watch its connections there.
+        sync_thread = await sync_to_async(threading.get_ident)()
+        await sync_to_async(profile.watch_queries)()
+        profile.start([threading.get_ident(), sync_thread])
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+            await sync_to_async(profile.unwatch_queries)()
+            _active.reset(token)
+        return self._finish(response, await sync_to_async(profile.save)(request, response))
+
+    def _finish(self, response, saved):
+        if saved.trigger == saved.HEADER:
+            # Tells whoever asked which profile to download.
+            response['X-Profile-Id'] = str(saved.pk)
+        return response
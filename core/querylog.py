@@ -0,0 +1,271 @@
+"""
+Slow query log.
+
+Every database connection gets an execute wrapper (installed from
+``connection_created``) that times each statement. Statements slower than
+``SLOW_QUERY_THRESHOLD_MS`` are recorded as a ``SlowQuery``. A record holds
+one row per normalized SQL fingerprint, so a query run from a loop or with
+different ``IN`` list lengths shows up once. Each record keeps:
+
+* the count plus total and maximum time;
+* the shape of the parameters (their types, never their values);
+* the view being served, via ``QueryLogMiddleware``;
+* the first project frame that issued the query.
+
+The first time a fingerprint is seen, a SELECT is explained with its
+original parameters: ``EXPLAIN QUERY PLAN`` on SQLite, plain ``EXPLAIN``
+elsewhere. Both only plan the query, so this is cheap enough to do inline.
+With ``SLOW_QUERY_EXPLAIN_ANALYZE``, a task (``explain_slow_query``) then
+replaces the plan with ``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL, which
+runs the slow query again, inside a rolled-back savepoint with a statement
+timeout, on the worker rather than in the request. Clearing a record from
+the admin makes the next occurrence explain it again.
+
+Times are for ``cursor.execute``: on SQLite that is the work up to the
+first row, which for sorts, counts and scans is nearly all of it.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_request = contextvars.ContextVar('querylog_request', default=None)
+# Set while recording, so the log's own queries are not logged.
+_recording = contextvars.ContextVar('querylog_recording', default=False)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.I)
+SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals and ``IN`` lists collapsed, so queries differing only in values match."""
+    sql = STRING_RE.sub('%s', sql)
+    sql = NUMBER_RE.sub('%s', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()
+
+
+def params_shape(params, many):
+    if many:
+        return 'executemany'
+    if params is None:
+        return '()'
+    values = params.values() if isinstance(params, dict) else params
+    names = [type(value).__name__ for value in values]
+    # Long IN lists: say how long rather than repeating the type.
+    if len(names) > 6 and len(set(names)) == 1:
+        return f'({names[0]} x {len(names)})'
+    return f"({', '.join(names)})"
+
+
+def _origin():
+    """``path:line in function`` of the innermost project frame outside Django and this module."""
+    root = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and filename != __file__ and '-packages' not in filename:
+            return f'{filename[len(root):].lstrip("/")}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+def _view():
+    request = _request.get()
+    if request is None:
+        return ''
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else request.path[:200]
+
+
+def explain(connection, sql, params, analyze=False):
+    """
+    The query plan for a SELECT, or ``''`` for other statements. ``analyze``
+    runs the query for actual timings where the backend supports it.
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            # Rows are (id, parent, notused, detail); indent by depth.
+            depth = {0: -1}
+            lines = []
+            for node, parent, _, detail in cursor.fetchall():
+                depth[node] = depth.get(parent, -1) + 1
+                lines.append('  ' * depth[node] + detail)
+            return '\n'.join(lines)
+        if connection.vendor == 'postgresql' and analyze:
+            # ANALYZE runs the query: do it in a savepoint that is always
+            # rolled back, with a timeout so a pathological plan can't hang.
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('SET LOCAL statement_timeout = %s', [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS])
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                transaction.set_rollback(True, using=connection.alias)
+            return plan
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+
+
+def explain_analyze(key, sql, params, using):
+    """Replace a record's plan with one with actual timings; run by the ``explain_slow_query`` task."""
+    from .models import SlowQuery
+
+    token = _recording.set(True)
+    try:
+        try:
+            plan = explain(connections[using], sql, params, analyze=True)
+        except Exception as e:
+            plan = f'EXPLAIN ANALYZE failed: {e}'
+        SlowQuery.objects.filter(fingerprint=key).update(explain=plan, explained_at=timezone.now())
+    finally:
+        _recording.reset(token)
+
+
+def _defer_analyze(connection, key, sql, params):
+    from .tasks import explain_slow_query
+
+    try:
+        # Task arguments are JSON; dates and decimals go as strings.
+        params = json.loads(json.dumps(params, cls=DjangoJSONEncoder))
+    except (TypeError, ValueError):
+        return
+    explain_slow_query.defer(key, sql, params, connection.alias)
+
+
+def record(connection, sql, params, many, seconds, origin, view):
+    from .models import SlowQuery
+
+    token = _recording.set(True)
+    try:
+        key = fingerprint(sql)
+        now = timezone.now()
+        ms = seconds * 1000
+        updated = SlowQuery.objects.filter(fingerprint=key).update(
+            count=F('count') + 1,
+            total_ms=F('total_ms') + ms,
+            max_ms=Greatest('max_ms', ms),
+            last_seen=now,
+            view=view,
+            origin=origin,
+        )
+        if updated:
+            return
+        plan = ''
+        if settings.SLOW_QUERY_EXPLAIN and not many:
+            try:
+                plan = explain(connection, sql, params)
+            except Exception as e:
+                plan = f'EXPLAIN failed: {e}'
+        try:
+            with transaction.atomic(using=connection.alias):
+                SlowQuery.objects.create(
+                    fingerprint=key,
+                    sql=normalize(sql),
+                    params_shape=params_shape(params, many),
+                    vendor=connection.vendor,
+                    view=view,
+                    origin=origin,
+                    total_ms=ms,
+                    max_ms=ms,
+                    first_seen=now,
+                    last_seen=now,
+                    explain=plan,
+                    explained_at=now if plan else None,
+                )
+        except IntegrityError:
+            # Another process recorded the same fingerprint first.
+            SlowQuery.objects.filter(fingerprint=key).update(count=F('count') + 1, total_ms=F('total_ms') + ms, last_seen=now)
+            return
+        if plan and settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+            _defer_analyze(connection, key, sql, params)
+    finally:
+        _recording.reset(token)
+
+
+def _safe_record(*args):
+    try:
+        record(*args)
+    except Exception:
+        # Never fail the request over its own diagnostics.
+        logger.exception('Could not record a slow query')
+
+
+class SlowQueryWrapper:
+    """Execute wrapper for one connection; see the module docstring."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None or _recording.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            if seconds * 1000 >= threshold:
+                self._slow(sql, params, many, seconds)
+
+    def _slow(self, sql, params, many, seconds):
+        args = (self.connection, sql, params, many, seconds, _origin(), _view())
+        if self.connection.in_atomic_block:
+            # Writing now would be undone if the surrounding transaction rolls
+            # back, and would fail if it is already broken.
+            transaction.on_commit(lambda: _safe_record(*args), using=self.connection.alias)
+        else:
+            _safe_record(*args)
+
+
+def install(connection):
+    if not any(isinstance(wrapper, SlowQueryWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryWrapper(connection))
+
+
+class QueryLogMiddleware:
+    """Remember the current request so slow queries can name their view."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
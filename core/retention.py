@@ -0,0 +1,216 @@
+"""
+Retention: moving rows that are no longer needed out of hot tables.
+
+Each ``Policy`` names a model and a condition for its expired rows (see the
+``RETENTION_*`` settings; an empty setting disables that part):
+
+* ``contact_submissions``: read submissions older than
+  ``RETENTION_CONTACT_READ_DAYS``, and any older than ``RETENTION_CONTACT_DAYS``;
+* ``inactive_subscribers``: addresses unsubscribed more than
+  ``RETENTION_INACTIVE_SUBSCRIBER_DAYS`` ago, with their campaign deliveries.
+  Never sooner than ``NEWSLETTER_CONFIRM_MAX_AGE``: the row's
+  ``confirmed_at`` is what stops an older confirmation link from
+  resubscribing the address;
+* ``finished_tasks``: task queue rows that finished successfully more than
+  ``RETENTION_TASK_DAYS`` ago. Failed tasks stay for inspection.
+
+``apply`` walks the expired rows in primary key batches. Each batch is
+serialized as JSON Lines (Django's ``jsonl`` format), archived, and deleted
+in its own transaction, so no lock is held for longer than one batch. The
+walk continues from the last primary key instead of starting over, so on
+PostgreSQL it doesn't wade through the dead tuples of earlier batches.
+
+Archives:
+
+* ``table``: one gzipped ``ArchiveBatch`` row per batch, written in the
+  transaction that deletes it;
+* ``file``: one gzip member per batch appended to
+  ``RETENTION_ARCHIVE_DIR/<policy>-<time>.jsonl.gz`` and synced to disk
+  before the batch is deleted;
+* ``none``: delete only.
+
+Both restore with ``manage.py loaddata``: the file as is, a batch once its
+``data`` is saved as a ``.jsonl.gz`` file.
+
+``compact`` then runs ``VACUUM`` and/or ``ANALYZE`` on the affected tables.
+"""
+import gzip
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+ARCHIVES = ('table', 'file', 'none')
+
+
+@dataclass
+class Policy:
+    name: str
+    model: str
+    # Condition for expired rows as of ``now``, or None when disabled.
+    expired: Callable
+    # Reverse relations deleted along with each row; archived with it.
+    related: tuple = ()
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+def _old_submissions(now):
+    condition = Q()
+    if settings.RETENTION_CONTACT_READ_DAYS is not None:
+        condition |= Q(read=True, submitted_at__lt=now - timedelta(days=settings.RETENTION_CONTACT_READ_DAYS))
+    if settings.RETENTION_CONTACT_DAYS is not None:
+        condition |= Q(submitted_at__lt=now - timedelta(days=settings.RETENTION_CONTACT_DAYS))
+    return condition or None
+
+
+def _inactive_subscribers(now):
+    if settings.RETENTION_INACTIVE_SUBSCRIBER_DAYS is None:
+        return None
+    age = max(timedelta(days=settings.RETENTION_INACTIVE_SUBSCRIBER_DAYS), timedelta(seconds=settings.NEWSLETTER_CONFIRM_MAX_AGE))
+    return Q(active=False, unsubscribed_at__lt=now - age)
+
+
+def _finished_tasks(now):
+    if settings.RETENTION_TASK_DAYS is None:
+        return None
+    return Q(status='done', finished_at__lt=now - timedelta(days=settings.RETENTION_TASK_DAYS))
+
+
+POLICIES = {
+    policy.name: policy for policy in [
+        Policy('contact_submissions', 'core.ContactSubmission', _old_submissions),
+        Policy('inactive_subscribers', 'public_profile.NewsletterSubscriber', _inactive_subscribers, related=('deliveries',)),
+        Policy('finished_tasks', 'core.Task', _finished_tasks),
+    ]
+}
+
+
+@dataclass
+class Run:
+    """What ``apply`` did for one policy. ``seconds`` excludes the pauses between batches."""
+    policy: str
+    archive: str
+    rows: int = 0
+    related_rows: int = 0
+    batches: int = 0
+    archived_bytes: int = 0
+    seconds: float = 0.0
+    path: str = ''
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class TableArchive:
+    def __init__(self, policy, now):
+        self.policy = policy
+        self.path = ''
+
+    def write(self, pks, data):
+        from .models import ArchiveBatch
+
+        blob = gzip.compress(data.encode())
+        ArchiveBatch.objects.create(
+            policy=self.policy.name, model=self.policy.model, first_pk=pks[0], last_pk=pks[-1], rows=len(pks), data=blob,
+        )
+        return len(blob)
+
+
+class FileArchive:
+    def __init__(self, policy, now):
+        directory = Path(settings.RETENTION_ARCHIVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = str(directory / f'{policy.name}-{now:%Y%m%d-%H%M%S}.jsonl.gz')
+
+    def write(self, pks, data):
+        # A file of concatenated gzip members is still one gzip file, and one
+        # member per batch means an interrupted run leaves a readable file.
+        blob = gzip.compress(data.encode())
+        with open(self.path, 'ab') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(blob)
+
+
+def apply(policy, archive='table', batch_size=1000, sleep=0.0, now=None, dry_run=False):
+    """Archive and delete the rows ``policy`` considers expired; see the module docstring."""
+    if archive not in ARCHIVES:
+        raise ValueError(f'Unknown archive {archive!r}; expected one of {", ".join(ARCHIVES)}')
+    now = now or timezone.now()
+    model = policy.get_model()
+    run = Run(policy.name, archive)
+    condition = policy.expired(now)
+    if condition is None:
+        return run
+    expired = model._base_manager.filter(condition).order_by('pk')
+    if dry_run:
+        run.rows = expired.count()
+        return run
+
+    sink = {'table': TableArchive, 'file': FileArchive}[archive](policy, now) if archive != 'none' else None
+    last_pk = None
+    while True:
+        started = time.monotonic()
+        candidates = expired if last_pk is None else expired.filter(pk__gt=last_pk)
+        pks = list(candidates.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+        with transaction.atomic():
+            # Lock the batch and check it again: a row may have changed since.
+            objects = list(expired.filter(pk__in=pks).select_for_update())
+            if objects:
+                pks = [obj.pk for obj in objects]
+                if sink is not None:
+                    related = []
+                    for name in policy.related:
+                        relation = model._meta.get_field(name)
+                        related += relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': pks}).order_by('pk')
+                    run.archived_bytes += sink.write(pks, serializers.serialize('jsonl', objects + related))
+                deleted, counts = model._base_manager.filter(pk__in=pks).delete()
+                run.rows += counts.get(model._meta.label, 0)
+                run.related_rows += deleted - counts.get(model._meta.label, 0)
+                run.batches += 1
+        run.seconds += time.monotonic() - started
+        if sleep:
+            time.sleep(sleep)
+    run.path = getattr(sink, 'path', '')
+    return run
+
+
+def compact(models, vacuum=False, analyze=False, using=DEFAULT_DB_ALIAS):
+    """
+    Reclaim space and refresh planner statistics after large deletes. Must
+    run outside a transaction. Returns the statements run. SQLite can only
+    ``VACUUM`` the whole database.
+    """
+    connection = connections[using]
+    tables = [connection.ops.quote_name(model._meta.db_table) for model in models]
+    statements = []
+    if connection.vendor == 'postgresql':
+        if vacuum:
+            statements += [f'VACUUM (ANALYZE) {table}' if analyze else f'VACUUM {table}' for table in tables]
+        elif analyze:
+            statements += [f'ANALYZE {table}' for table in tables]
+    elif connection.vendor == 'sqlite':
+        if vacuum:
+            statements.append('VACUUM')
+        if analyze:
+            statements += [f'ANALYZE {table}' for table in tables]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return statements
@@ -0,0 +1,9 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import querylog
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    querylog.install(connection)
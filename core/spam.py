@@ -0,0 +1,199 @@
+"""
+Layered spam filtering for the contact form.
+
+Checks are ordered cheapest first so that floods are turned away before any
+database or SMTP work: a per-IP rate limit in the cache, a signed
+time-to-submit token, the honeypot, a duplicate-message fingerprint set in
+the cache, and finally a naive Bayes scorer trained from submissions marked
+as spam in the admin.
+"""
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .models import ContactSubmission
+
+FORM_TOKEN_SALT = 'core.contact.form-token'
+MODEL_CACHE_KEY = 'contact:spam-model'
+MODEL_VERSION_CACHE_KEY = 'contact:spam-model-version'
+TOKEN_RE = re.compile(r"[a-z0-9$€£][a-z0-9'$€£.-]*[a-z0-9$€£]")
+
+
+def client_ip(request):
+    """Return the client IP, honouring X-Forwarded-For only when configured to."""
+    if settings.CONTACT_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _rate_key(ip):
+    return f'contact:rate:{ip}:{int(time.time() // settings.CONTACT_RATE_WINDOW)}'
+
+
+def rate_limited(ip):
+    """Count a submission for ``ip`` and return True once it exceeds the window limit."""
+    key, window = _rate_key(ip), settings.CONTACT_RATE_WINDOW
+    cache.add(key, 0, window)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); start a fresh window.
+        cache.set(key, 1, window)
+        count = 1
+    return count > settings.CONTACT_RATE_LIMIT
+
+
+async def arate_limited(ip):
+    """Async variant of ``rate_limited`` for async views."""
+    key, window = _rate_key(ip), settings.CONTACT_RATE_WINDOW
+    await cache.aadd(key, 0, window)
+    try:
+        count = await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, window)
+        count = 1
+    return count > settings.CONTACT_RATE_LIMIT
+
+
+def make_form_token():
+    """Signed timestamp embedded in the form when it is rendered."""
+    return signing.dumps(time.time(), salt=FORM_TOKEN_SALT)
+
+
+def check_form_token(token):
+    """Return an error message if the token is invalid, too fresh or too old."""
+    try:
+        issued = float(signing.loads(token or '', salt=FORM_TOKEN_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        return 'Spam detected'
+    age = time.time() - issued
+    if age < settings.CONTACT_MIN_SUBMIT_SECONDS:
+        return 'Spam detected'
+    if age > settings.CONTACT_MAX_FORM_AGE:
+        return 'This form has expired. Please submit it again.'
+    return None
+
+
+def fingerprint(text):
+    """Stable fingerprint of a message, insensitive to case and whitespace."""
+    normalized = ' '.join(text.lower().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def is_duplicate(text):
+    """
+    Record the message fingerprint and return True if it was already seen.
+
+    Each fingerprint expires on its own after ``CONTACT_DUPLICATE_WINDOW``
+    seconds, so the cache holds a rolling set of recent messages.
+    """
+    key = f'contact:fp:{fingerprint(text)}'
+    return not cache.add(key, 1, settings.CONTACT_DUPLICATE_WINDOW)
+
+
+def tokenize(text):
+    tokens = TOKEN_RE.findall(text.lower())
+    if 'http' in text.lower():
+        tokens.append('__has_link__')
+    return tokens
+
+
+class SpamClassifier:
+    """Naive Bayes over the distinct tokens of a message, with Laplace smoothing."""
+
+    def __init__(self, spam_counts=None, ham_counts=None, spam_docs=0, ham_docs=0):
+        self.spam_counts = spam_counts or {}
+        self.ham_counts = ham_counts or {}
+        self.spam_docs = spam_docs
+        self.ham_docs = ham_docs
+        self._prepare()
+
+    def _prepare(self):
+        self.spam_total = sum(self.spam_counts.values())
+        self.ham_total = sum(self.ham_counts.values())
+        self.vocabulary = len(self.spam_counts.keys() | self.ham_counts.keys()) or 1
+
+    @property
+    def trained(self):
+        return self.spam_docs > 0 and self.ham_docs > 0
+
+    @classmethod
+    def train(cls, samples):
+        """Build a classifier from ``(text, is_spam)`` pairs."""
+        spam_counts, ham_counts = Counter(), Counter()
+        spam_docs = ham_docs = 0
+        for text, is_spam in samples:
+            tokens = set(tokenize(text))
+            if is_spam:
+                spam_counts.update(tokens)
+                spam_docs += 1
+            else:
+                ham_counts.update(tokens)
+                ham_docs += 1
+        return cls(dict(spam_counts), dict(ham_counts), spam_docs, ham_docs)
+
+    def score(self, text):
+        """Probability in [0, 1] that ``text`` is spam; 0.0 when untrained."""
+        if not self.trained:
+            return 0.0
+        log_odds = math.log(self.spam_docs / self.ham_docs)
+        spam_denominator = self.spam_total + self.vocabulary
+        ham_denominator = self.ham_total + self.vocabulary
+        for token in set(tokenize(text)):
+            spam = self.spam_counts.get(token, 0)
+            ham = self.ham_counts.get(token, 0)
+            if spam or ham:
+                log_odds += math.log((spam + 1) / spam_denominator) - math.log((ham + 1) / ham_denominator)
+        log_odds = max(min(log_odds, 50), -50)
+        return 1 / (1 + math.exp(-log_odds))
+
+    def to_dict(self):
+        return {
+            'spam_counts': self.spam_counts,
+            'ham_counts': self.ham_counts,
+            'spam_docs': self.spam_docs,
+            'ham_docs': self.ham_docs,
+        }
+
+
+_loaded = {'version': None, 'classifier': SpamClassifier()}
+
+
+def train_from_submissions():
+    """Retrain from the most recent submissions and publish the model to the cache."""
+    rows = (
+        ContactSubmission.objects.order_by('-submitted_at')
+        .values_list('subject', 'message', 'is_spam')[:settings.CONTACT_SPAM_TRAINING_ROWS]
+    )
+    classifier = SpamClassifier.train((f'{subject} {message}', is_spam) for subject, message, is_spam in rows.iterator())
+    version = time.time_ns()
+    cache.set_many({
+        MODEL_CACHE_KEY: {'version': version, 'model': classifier.to_dict()},
+        MODEL_VERSION_CACHE_KEY: version,
+    }, None)
+    _loaded.update(version=version, classifier=classifier)
+    return classifier
+
+
+def get_classifier():
+    """Return the shared classifier, refetching the per-process copy only when it changed."""
+    version = cache.get(MODEL_VERSION_CACHE_KEY)
+    if version is not None and version == _loaded['version']:
+        return _loaded['classifier']
+    payload = cache.get(MODEL_CACHE_KEY)
+    if payload is None:
+        return train_from_submissions()
+    _loaded.update(version=payload['version'], classifier=SpamClassifier(**payload['model']))
+    return _loaded['classifier']
+
+
+def spam_score(text):
+    return get_classifier().score(text)
@@ -0,0 +1,109 @@
+"""
+Start-up profiling.
+
+``cold_start`` boots the WSGI application in a fresh interpreter run with
+``-X importtime``, optionally serves one request through it, and reports
+how long the import and that first response took, the peak RSS and the
+import time of every module. Running in a child process is the only way
+to see a cold start from inside a process that has already imported
+everything.
+"""
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+# Runs in the child: import the WSGI module, then serve ``path`` if given.
+CHILD = '''
+import io, json, resource, sys, time
+started = time.perf_counter()
+from personal_website.wsgi import application
+imported = time.perf_counter()
+status = None
+if sys.argv[1]:
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+        'SERVER_NAME': sys.argv[2], 'SERVER_PORT': '80', 'HTTP_HOST': sys.argv[2],
+        'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    captured = []
+    body = application(environ, lambda s, headers, exc_info=None: captured.append(s))
+    b''.join(body)
+    body.close()
+    status = captured[0]
+# ru_maxrss survives exec on Linux, so a child of a big process would report
+# its parent's peak; the kernel's own high-water mark is per image.
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+except (OSError, StopIteration):
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'import': imported - started,
+    'first_response': time.perf_counter() - imported if sys.argv[1] else None,
+    'status': status,
+    'rss_kb': rss_kb,
+    'modules': sorted(sys.modules),
+}))
+'''
+
+
+@dataclass
+class Import:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class Profile:
+    import_seconds: float
+    first_response_seconds: float
+    status: str
+    rss_kb: int
+    modules: list
+    imports: list = field(default_factory=list)
+
+    def by_package(self):
+        """Self import time in microseconds per top-level package, largest first."""
+        totals = {}
+        for item in self.imports:
+            package = item.module.split('.', 1)[0]
+            totals[package] = totals.get(package, 0) + item.self_us
+        return sorted(totals.items(), key=lambda item: -item[1])
+
+    def slowest(self, limit=20):
+        return sorted(self.imports, key=lambda item: -item.cumulative_us)[:limit]
+
+
+def _parse_importtime(stderr):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append(Import(name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def cold_start(path='/', host=None):
+    """Cold-start the WSGI app in a child process and serve ``path`` (skipped if empty)."""
+    host = host or (settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != '*' else 'localhost')
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'personal_website.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, path or '', host],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR, check=True,
+    )
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return Profile(
+        import_seconds=data['import'],
+        first_response_seconds=data['first_response'],
+        status=data['status'],
+        rss_kb=data['rss_kb'],
+        modules=data['modules'],
+        imports=_parse_importtime(result.stderr),
+    )
@@ -0,0 +1,254 @@
+"""
+A small database-backed task queue.
+
+Functions decorated with ``@task`` (in an app's ``tasks.py``) are queued
+with ``.defer(...)`` / ``await .adefer(...)``, which inserts a ``Task`` row
+in the caller's transaction, so work is only queued if the data it needs
+is committed with it. ``manage.py run_worker`` runs a ``Worker``.
+
+A worker claims due tasks in batches. On databases with
+``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL, MySQL 8) workers lock
+disjoint rows and never wait on each other. SQLite has no row locks but
+runs one writer at a time, so there a single ``UPDATE ... WHERE id IN
+(SELECT ... LIMIT n) AND status = 'queued'`` claims a batch atomically.
+Each claim takes a lease; tasks whose worker died are requeued when it
+expires. Failures are retried with capped exponential backoff and jitter
+until ``max_attempts``. Claimed tasks run on a thread or process pool.
+"""
+import logging
+import os
+import random
+import socket
+import statistics
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskFunction:
+    """A registered task: call it to run inline, ``defer`` it to queue it."""
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def _task(self, args, kwargs, run_at):
+        return Task(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            run_at=run_at or timezone.now(),
+            max_attempts=self.max_attempts or settings.TASK_MAX_ATTEMPTS,
+        )
+
+    def defer(self, *args, run_at=None, **kwargs):
+        """Queue a call with JSON-serializable arguments; returns the ``Task``."""
+        task = self._task(args, kwargs, run_at)
+        task.save()
+        return task
+
+    async def adefer(self, *args, run_at=None, **kwargs):
+        task = self._task(args, kwargs, run_at)
+        await task.asave()
+        return task
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register ``func`` as a task, named ``module.function`` unless ``name`` is given."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        registry[task_name] = TaskFunction(func, task_name, max_attempts)
+        return registry[task_name]
+    return register(func) if func is not None else register
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(settings.TASK_RETRY_MAX_DELAY, settings.TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def execute(name, args, kwargs):
+    """Run one task in the current thread or process; return the traceback on failure, else ``None``."""
+    try:
+        func = registry[name].func
+        if iscoroutinefunction(func):
+            async_to_sync(func)(*args, **kwargs)
+        else:
+            func(*args, **kwargs)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def _pooled_execute(name, args, kwargs):
+    # Pool threads and processes hold their own connections; drop broken or
+    # expired ones between tasks as the request cycle would.
+    try:
+        return execute(name, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def _init_process():
+    # Spawned (not forked) workers start without Django set up.
+    import django
+    django.setup()
+    autodiscover()
+
+
+class InlineExecutor:
+    """Runs submitted calls immediately in the calling thread (used for tests and debugging)."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class Worker:
+    """
+    Claims and runs tasks. ``pool`` is ``thread``, ``process`` or ``inline``;
+    ``concurrency`` is the pool size and ``batch_size`` how many tasks one
+    claim takes (two per slot by default, so the pool stays busy).
+    """
+
+    def __init__(self, concurrency=4, pool='thread', batch_size=None, lease=None):
+        self.concurrency = max(1, concurrency)
+        self.pool = pool
+        self.batch_size = batch_size or self.concurrency * 2
+        self.lease = timedelta(seconds=lease or settings.TASK_LEASE_SECONDS)
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        self.processed = 0
+        self.failed = 0
+        self.waits = []
+        self._executor = None
+
+    def __enter__(self):
+        autodiscover()
+        if self.pool == 'process':
+            # Children must not share the parent's database connections.
+            connections.close_all()
+            self._executor = ProcessPoolExecutor(self.concurrency, initializer=_init_process)
+        elif self.pool == 'thread':
+            self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix='task')
+        else:
+            self._executor = InlineExecutor()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown(wait=True)
+
+    def reap(self):
+        """Requeue (or fail) tasks whose worker's lease ran out."""
+        now = timezone.now()
+        expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+        expired.filter(attempts__gte=F('max_attempts')).update(
+            status=Task.FAILED, finished_at=now, claimed_by='', last_error='Lease expired',
+        )
+        return expired.update(status=Task.QUEUED, run_at=now, claimed_by='')
+
+    def claim(self):
+        """Atomically mark up to ``batch_size`` due tasks as running for this worker and return them."""
+        now = timezone.now()
+        token = f'{self.worker_id}:{uuid.uuid4().hex[:12]}'
+        due = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).order_by('run_at', 'pk')
+        claimed = dict(
+            status=Task.RUNNING,
+            claimed_by=token,
+            started_at=now,
+            locked_until=now + self.lease,
+            attempts=F('attempts') + 1,
+        )
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                pks = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:self.batch_size])
+                Task.objects.filter(pk__in=pks).update(**claimed)
+            else:
+                Task.objects.filter(pk__in=due.values('pk')[:self.batch_size], status=Task.QUEUED).update(**claimed)
+        return list(Task.objects.filter(claimed_by=token, status=Task.RUNNING).order_by('run_at', 'pk'))
+
+    def complete(self, task, error):
+        now = timezone.now()
+        if error is None:
+            changes = dict(status=Task.DONE, finished_at=now, last_error='', locked_until=None)
+        elif task.attempts < task.max_attempts:
+            changes = dict(status=Task.QUEUED, run_at=now + backoff(task.attempts), last_error=error, locked_until=None)
+        else:
+            changes = dict(status=Task.FAILED, finished_at=now, last_error=error, locked_until=None)
+        # If the lease expired and another worker took the task over, leave its row alone.
+        Task.objects.filter(pk=task.pk, claimed_by=task.claimed_by).update(**changes)
+        if error is None:
+            self.processed += 1
+            self.waits.append((task.started_at - task.run_at).total_seconds())
+        else:
+            self.failed += 1
+            logger.warning('Task %s #%d failed (attempt %d of %d)\n%s', task.name, task.pk, task.attempts, task.max_attempts, error)
+
+    def run_once(self):
+        """Claim one batch, run it to completion and return how many tasks were claimed."""
+        self.reap()
+        tasks = self.claim()
+        run = execute if isinstance(self._executor, InlineExecutor) else _pooled_execute
+        futures = {self._executor.submit(run, t.name, t.args, t.kwargs): t for t in tasks}
+        for future, task in futures.items():
+            self.complete(task, future.result())
+        return len(tasks)
+
+    def latency_summary(self):
+        """Median, p95 and maximum seconds between a task being due and being picked up."""
+        if not self.waits:
+            return None
+        waits = sorted(self.waits)
+        return {
+            'p50': statistics.median(waits),
+            'p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+            'max': waits[-1],
+        }
+
+
+def latency_stats(since):
+    """Queue wait and run time percentiles (seconds) of tasks finished since ``since``."""
+    rows = Task.objects.filter(status=Task.DONE, finished_at__gte=since).values_list('run_at', 'started_at', 'finished_at', 'created_at')
+    waits, runtimes, totals = [], [], []
+    for run_at, started_at, finished_at, created_at in rows.iterator():
+        waits.append((started_at - run_at).total_seconds())
+        runtimes.append((finished_at - started_at).total_seconds())
+        totals.append((finished_at - created_at).total_seconds())
+    stats = {}
+    for label, values in (('wait', waits), ('runtime', runtimes), ('end_to_end', totals)):
+        values.sort()
+        if values:
+            stats[label] = {
+                'count': len(values),
+                'p50': statistics.median(values),
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max': values[-1],
+            }
+    return stats
@@ -0,0 +1,39 @@
+"""Deferred work for the core app, run by ``manage.py run_worker``."""
+from django.conf import settings
+
+from .async_mail import asend_mail
+from .models import ContactSubmission
+from .taskqueue import task
+
+
+@task
+async def send_contact_email(submission_id):
+    """Forward a contact form submission to the site owner."""
+    submission = await ContactSubmission.objects.aget(pk=submission_id)
+    await asend_mail(
+        subject=f"Contact Form: {submission.subject}",
+        message=f"""
+Name: {submission.name}
+Email: {submission.email}
+Subject: {submission.subject}
+
+Message:
+{submission.message}
+        """,
+        from_email=settings.EMAIL_HOST_USER,
+        recipient_list=[settings.EMAIL_HOST_USER],
+    )
+
+
+@task
+def render_social_card(fields):
+    """Draw an Open Graph card ahead of its first request."""
+    from .social import ensure_card
+    ensure_card(fields)
+
+
+@task
+def explain_slow_query(fingerprint, sql, params, using):
+    """Re-explain a newly logged slow query with EXPLAIN ANALYZE, away from the request that ran it."""
+    from .querylog import explain_analyze
+    explain_analyze(fingerprint, sql, params, using)
@@ -0,0 +1,258 @@
+"""Test helpers shared across apps."""
+import http.server
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+
+from django.test import override_settings
+
+
+class TemporaryMediaMixin:
+    """Point MEDIA_ROOT, and so default_storage, at a throwaway directory for the test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+
+def run_tasks():
+    """Run every due task inline, in the test's thread and transaction; return the worker."""
+    from .taskqueue import Worker
+    with Worker(pool='inline') as worker:
+        while worker.run_once():
+            pass
+    return worker
+
+
+ADDRESS_RE = re.compile(r'<([^>]*)>')
+
+
+def _address(command):
+    match = ADDRESS_RE.search(command)
+    return match.group(1) if match else command.split(':', 1)[-1].strip()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib and Django's SMTP backend."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.record_connection()
+        self.reply('220 localhost stand-in SMTP')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250-AUTH PLAIN')
+                self.reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = _address(command), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(_address(command))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(chunk)
+                if server.latency:
+                    time.sleep(server.latency)
+                server.record_message(sender, recipients, b''.join(data))
+                self.reply('250 OK queued')
+            elif verb == 'AUTH':
+                self.reply('235 Authentication successful')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Threaded in-process SMTP stand-in that records every message it accepts.
+
+    ``latency`` (seconds) is added to each DATA command to simulate a slow relay.
+    Use as a context manager; ``port`` is chosen by the OS.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, latency=0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.latency = latency
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_message(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append((sender, recipients, data))
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def get_connection(self, **kwargs):
+        """Return a Django SMTP connection pointed at this server."""
+        from django.core.mail import get_connection
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1',
+            port=self.port,
+            username='',
+            password='',
+            use_tls=False,
+            use_ssl=False,
+            **kwargs
+        )
+
+
+CACHE_CONTROL_RE = re.compile(r'([\w-]+)(?:=(\d+))?')
+
+
+class _PurgeHandler(http.server.BaseHTTPRequestHandler):
+    def do_PURGE(self):
+        purged = self.server.edge.purge(self.headers.get('Surrogate-Key', '').split())
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.send_header('X-Purged', str(purged))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalEdgeCache:
+    """
+    Varnish-like stand-in for the CDN in front of a Django test client.
+
+    ``get`` serves a stored copy while it is within ``s-maxage``, serves it
+    once more and then refetches while within ``stale-while-revalidate``, and
+    otherwise fetches through ``client``. Only 200 responses marked
+    ``public`` with an ``s-maxage`` and no ``Set-Cookie`` are stored, indexed
+    by their ``Surrogate-Key``. Requests carrying a session or messages
+    cookie bypass the store, as the edge config should. Each response gets an
+    ``X-Cache`` header of HIT, STALE, MISS or PASS.
+
+    Use as a context manager; a threaded listener at ``purge_url`` accepts
+    the ``PURGE`` requests sent by ``core.edge.HTTPPurger``. ``clock`` can be
+    replaced to step through the freshness windows.
+    """
+    bypass_cookies = ('sessionid', 'messages')
+
+    def __init__(self, client, clock=time.monotonic):
+        self.client = client
+        self.clock = clock
+        self.store = {}
+        self.fetches = 0
+        self.purges = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def purge_url(self):
+        return 'http://127.0.0.1:%d/' % self._server.server_address[1]
+
+    def __enter__(self):
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _PurgeHandler)
+        self._server.daemon_threads = True
+        self._server.edge = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def purge(self, keys):
+        """Drop every stored page tagged with any of ``keys``; return how many were dropped."""
+        keys = set(keys)
+        with self._lock:
+            self.purges.append(sorted(keys))
+            doomed = [path for path, entry in self.store.items() if keys & entry['keys']]
+            for path in doomed:
+                del self.store[path]
+        return len(doomed)
+
+    def _fetch(self, path):
+        self.fetches += 1
+        response = self.client.get(path)
+        directives = dict(CACHE_CONTROL_RE.findall(response.get('Cache-Control', '')))
+        if (
+            response.status_code == 200
+            and 'public' in directives
+            and directives.get('s-maxage')
+            and not response.cookies
+        ):
+            now = self.clock()
+            with self._lock:
+                self.store[path] = {
+                    'response': response,
+                    'fresh_until': now + int(directives['s-maxage']),
+                    'stale_until': now + int(directives['s-maxage']) + int(directives.get('stale-while-revalidate') or 0),
+                    'keys': set(response.get('Surrogate-Key', '').split()),
+                }
+        return response
+
+    def get(self, path):
+        if any(self.client.cookies.get(name) and self.client.cookies[name].value for name in self.bypass_cookies):
+            response = self.client.get(path)
+            response['X-Cache'] = 'PASS'
+            return response
+        with self._lock:
+            entry = self.store.get(path)
+        now = self.clock()
+        if entry and now < entry['fresh_until']:
+            response, state = entry['response'], 'HIT'
+        elif entry and now < entry['stale_until']:
+            # Varnish revalidates in the background; here it happens right after serving.
+            response, state = entry['response'], 'STALE'
+            self._fetch(path)
+        else:
+            response, state = self._fetch(path), 'MISS'
+        response['X-Cache'] = state
+        return response
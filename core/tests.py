@@ -1,3 +1,951 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+
+from . import admin_scaling, analytics, edge, profiling, querylog, retention, social, spam, startup, taskqueue, warmup
+from .cache import Entry, cached
+from .models import ArchiveBatch, ContactSubmission, RequestProfile, SlowQuery, Task
+from .testing import LocalEdgeCache, LocalSMTPServer, TemporaryMediaMixin, run_tasks
+
+
+def aged_token(seconds=60):
+    return signing.dumps(time.time() - seconds, salt=spam.FORM_TOKEN_SALT)
+
+
+@override_settings(EMAIL_HOST_USER='owner@example.com')
+class ContactSpamFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('core:contact')
+
+    def post(self, ip='10.0.0.1', **data):
+        payload = {
+            'name': 'Ada',
+            'email': 'ada@example.com',
+            'subject': 'Hello',
+            'message': 'I enjoyed your talk about Django.',
+            'form_token': aged_token(),
+        }
+        payload.update(data)
+        return self.client.post(self.url, payload, REMOTE_ADDR=ip)
+
+    def test_valid_submission_is_saved_and_emailed(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+        # The email is queued, not sent in the request.
+        self.assertEqual(len(mail.outbox), 0)
+        run_tasks()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('I enjoyed your talk', mail.outbox[0].body)
+
+    @override_settings(CONTACT_RATE_LIMIT=2)
+    def test_rate_limit_rejects_without_db_writes(self):
+        self.post(message='first')
+        self.post(message='second')
+        with self.assertNumQueries(0):
+            response = self.post(message='third')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(ContactSubmission.objects.count(), 2)
+
+    def test_missing_or_fresh_token_is_rejected(self):
+        self.post(form_token='')
+        self.post(ip='10.0.0.2', form_token=aged_token(seconds=0))
+        self.assertEqual(ContactSubmission.objects.count(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_duplicate_message_is_rejected(self):
+        self.post(ip='10.0.0.1')
+        with self.assertNumQueries(0):
+            self.post(ip='10.0.0.2', message='  i ENJOYED your talk   about django. ')
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_trained_classifier_rejects_spam(self):
+        ContactSubmission.objects.bulk_create(
+            [ContactSubmission(name='x', email='x@example.com', subject='Offer', message=f'cheap pills casino bonus {i}', is_spam=True) for i in range(10)]
+            + [ContactSubmission(name='y', email='y@example.com', subject='Hello', message=f'question about your django talk {i}') for i in range(10)]
+        )
+        spam.train_from_submissions()
+
+        self.post(subject='Offer', message='cheap casino bonus pills today')
+        self.post(ip='10.0.0.2', message='A question about your Django talk')
+
+        self.assertEqual(ContactSubmission.objects.filter(is_spam=False).count(), 11)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_USE_TLS=False,
+    EMAIL_HOST_USER='owner@example.com',
+    EMAIL_HOST_PASSWORD='secret',
+)
+class AsyncContactTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_slow_smtp_is_kept_out_of_requests(self):
+        latency = 0.3
+        with LocalSMTPServer(latency=latency) as server:
+            with self.settings(EMAIL_PORT=server.port):
+                started = time.monotonic()
+                responses = await asyncio.gather(*[
+                    self.async_client.post(reverse('core:contact'), {
+                        'name': 'Ada',
+                        'email': 'ada@example.com',
+                        'subject': 'Hello',
+                        'message': f'Message number {i}',
+                        'form_token': aged_token(),
+                    }, REMOTE_ADDR=f'10.0.1.{i}')
+                    for i in range(5)
+                ])
+                elapsed = time.monotonic() - started
+                self.assertEqual(len(server.messages), 0)
+                await sync_to_async(run_tasks)()
+
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertEqual(len(server.messages), 5)
+        self.assertEqual(await ContactSubmission.objects.acount(), 5)
+        self.assertLess(elapsed, latency)
+
+
+class SpamClassifierTests(TestCase):
+    def test_untrained_classifier_scores_zero(self):
+        self.assertEqual(spam.SpamClassifier().score('anything'), 0.0)
+
+    def test_scores_separate_classes(self):
+        classifier = spam.SpamClassifier.train([
+            ('win money now', True),
+            ('free money offer', True),
+            ('meeting about the project', False),
+            ('question about your project', False),
+        ])
+        self.assertGreater(classifier.score('free money'), 0.8)
+        self.assertLess(classifier.score('project question'), 0.2)
+
+
+@override_settings(CHROME_CACHE_TIMEOUT=3600, CHROME_CACHE_VERSION='test')
+class ChromeFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_navigation_is_cached_per_language_and_auth_state(self):
+        from django.contrib.auth.models import User
+        from django.core.cache.utils import make_template_fragment_key
+
+        self.client.get(reverse('core:home'))
+        anonymous_key = make_template_fragment_key('site_nav', ['test', 'en-us', False])
+        self.assertIn('href="/about/"', cache.get(anonymous_key))
+
+        user = User.objects.create_user('reader', password='pw')
+        self.client.force_login(user)
+        self.client.get(reverse('core:home'))
+        self.assertIsNotNone(cache.get(make_template_fragment_key('site_nav', ['test', 'en-us', True])))
+
+    def test_cached_chrome_renders_identically(self):
+        first = self.client.get(reverse('core:about')).content
+        second = self.client.get(reverse('core:about')).content
+        self.assertEqual(first, second)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class ViewCountTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        from blog.models import BlogPost
+        from portfolio.models import Project
+        cache.clear()
+        self.posts = [BlogPost.objects.create(title=f'Post {i}', content='Text', published=True) for i in range(3)]
+        self.project = Project.objects.create(title='Tool', description='d', short_description='s', technology_stack='Go')
+
+    def test_hits_are_buffered_then_flushed_in_one_update_per_model(self):
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                analytics.record_view(self.posts[0])
+            analytics.record_view(self.posts[1])
+            analytics.record_view(self.project)
+
+        # One batched UPDATE per model, inside a transaction.
+        with self.assertNumQueries(6):
+            self.assertEqual(analytics.flush_view_counts(), 5)
+        self.assertEqual([p.view_count for p in type(self.posts[0]).objects.order_by('pk')], [3, 1, 0])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.view_count, 1)
+
+        analytics.record_view(self.posts[0])
+        self.assertEqual(analytics.flush_view_counts(), 1)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].view_count, 4)
+
+    def test_flush_reads_only_objects_hit_since_the_last_one(self):
+        analytics.record_view(self.posts[1])
+        analytics.flush_view_counts()
+        # Nothing hit since: no query at all, however large the tables.
+        with self.assertNumQueries(0):
+            self.assertEqual(analytics.flush_view_counts(), 0)
+
+        analytics.record_view(self.posts[2])
+        with self.assertNumQueries(3):
+            self.assertEqual(analytics.flush_view_counts(), 1)
+        self.assertEqual([p.view_count for p in type(self.posts[0]).objects.order_by('pk')], [0, 1, 1])
+
+    def test_hit_during_a_flush_is_kept_for_the_next(self):
+        analytics.record_view(self.posts[0])
+        real_get_many = cache.get_many
+
+        def get_many(keys):
+            # A hit lands after the flush read the counters, in the epoch it opened.
+            values = real_get_many(keys)
+            if analytics._counter_key('blog.blogpost', self.posts[0].pk) in keys:
+                analytics.record_view(self.posts[0])
+            return values
+
+        with mock.patch.object(cache, 'get_many', get_many):
+            analytics.flush_view_counts()
+        self.assertEqual(analytics.flush_view_counts(), 1)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].view_count, 2)
+
+    def test_detail_view_beacons_count_and_feed_the_popular_widget(self):
+        # Rendering doesn't count, so edge-cached copies are counted the same way.
+        response = self.client.get(reverse('blog:blog_detail', args=[self.posts[2].slug]))
+        self.assertEqual(analytics.flush_view_counts(), 0)
+        url = analytics.beacon_url(self.posts[2])
+        self.assertContains(response, url)
+        self.assertContains(self.client.get(reverse('portfolio:portfolio_detail', args=[self.project.slug])),
+                            analytics.beacon_url(self.project))
+
+        for ip in ['10.0.0.1', '10.0.0.2']:
+            self.assertEqual(self.client.post(url, REMOTE_ADDR=ip).status_code, 204)
+        self.client.post(analytics.beacon_url(self.project))
+        self.assertEqual(analytics.flush_view_counts(), 3)
+
+        response = self.client.get(reverse('blog:blog_list'))
+        self.assertEqual(response.context['popular_posts'], [self.posts[2]])
+
+    def test_repeated_beacons_from_one_client_count_once(self):
+        url = analytics.beacon_url(self.posts[0])
+        self.client.post(url)
+        self.client.post(url, REMOTE_ADDR='10.0.0.9')
+        # Repeats are dropped before any query.
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertEqual(self.client.post(url).status_code, 204)
+        self.assertEqual(analytics.flush_view_counts(), 2)
+
+    def test_view_beacon_rejects_unknown_objects(self):
+        self.assertEqual(self.client.get(analytics.beacon_url(self.posts[0])).status_code, 405)
+        self.assertEqual(self.client.post(reverse('core:view_beacon', args=['auth.user', 1])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('core:view_beacon', args=['blog.blogpost', 999])).status_code, 404)
+        self.assertEqual(analytics.flush_view_counts(), 0)
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+    def test_first_hit_in_an_interval_flushes(self):
+        analytics.record_view(self.posts[0])
+        analytics.record_view(self.posts[0])
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].view_count, 1)
+
+
+@override_settings(EDGE_CACHE_MAX_AGE=300, EDGE_CACHE_STALE_WHILE_REVALIDATE=600, VIEW_COUNT_FLUSH_INTERVAL=0)
+class EdgeCacheTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        from blog.models import BlogPost
+        cache.clear()
+        self.post = BlogPost.objects.create(title='Edge', content='Text', published=True)
+        self.detail_url = reverse('blog:blog_detail', args=[self.post.slug])
+
+    def test_anonymous_pages_are_shared_and_tagged(self):
+        response = self.client.get(reverse('blog:blog_list'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0, s-maxage=300, stale-while-revalidate=600')
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertEqual(response['Surrogate-Key'], 'blog.blogpost')
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['Surrogate-Key'], f'blog.blogpost:{self.post.pk}')
+
+    def test_forms_messages_and_sessions_stay_private(self):
+        from django.contrib.auth.models import User
+
+        response = self.client.get(reverse('core:contact'))
+        self.assertEqual(response['Cache-Control'], 'private')
+
+        self.client.cookies['messages'] = 'pending'
+        self.assertEqual(self.client.get(reverse('blog:blog_list'))['Cache-Control'], 'private')
+        del self.client.cookies['messages']
+
+        self.client.force_login(User.objects.create_user('reader', password='pw'))
+        response = self.client.get(reverse('blog:blog_list'))
+        self.assertEqual(response['Cache-Control'], 'private')
+        self.assertNotIn('Surrogate-Key', response)
+
+    def test_saving_purges_the_stand_in_edge(self):
+        from portfolio.models import Project
+        Project.objects.create(title='Tool', description='d', short_description='s', technology_stack='Go')
+        now = [0]
+        with LocalEdgeCache(self.client, clock=lambda: now[0]) as stand_in, \
+                override_settings(EDGE_PURGER='core.edge.HTTPPurger', EDGE_PURGE_URL=stand_in.purge_url):
+            portfolio_url = reverse('portfolio:portfolio_list')
+            self.assertEqual(stand_in.get(self.detail_url)['X-Cache'], 'MISS')
+            self.assertEqual(stand_in.get(portfolio_url)['X-Cache'], 'MISS')
+            self.assertEqual(stand_in.get(self.detail_url)['X-Cache'], 'HIT')
+
+            self.post.title = 'Edge, edited'
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post.save()
+            self.assertEqual(stand_in.purges, [sorted([f'blog.blogpost:{self.post.pk}', 'blog.blogpost'])])
+
+            response = stand_in.get(self.detail_url)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertContains(response, 'Edge, edited')
+            self.assertEqual(stand_in.get(portfolio_url)['X-Cache'], 'HIT')
+
+            now[0] = 400
+            self.assertEqual(stand_in.get(portfolio_url)['X-Cache'], 'STALE')
+            self.assertEqual(stand_in.get(portfolio_url)['X-Cache'], 'HIT')
+            self.assertEqual(stand_in.fetches, 4)
+
+    def test_failed_purge_is_logged(self):
+        with override_settings(EDGE_PURGER='core.edge.HTTPPurger', EDGE_PURGE_URL='http://127.0.0.1:9/'), \
+                self.assertLogs('core.edge', 'ERROR'):
+            edge.purge(['blog.blogpost'])
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class WarmCacheTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        from blog.models import BlogPost
+        from portfolio.models import Project
+        cache.clear()
+        self.post = BlogPost.objects.create(title='Warm', content='Text', published=True)
+        self.project = Project.objects.create(title='Tool', description='d', short_description='s', technology_stack='Go')
+
+    def test_public_urls_come_from_the_urlconf_and_models(self):
+        urls = warmup.public_urls()
+        created = self.post.created_at
+        for url in [
+            '/', '/blog/', '/profile/press/', '/profile/speaking/calendar.ics',
+            f'/blog/{self.post.slug}/', f'/blog/{created.year}/{created.month}/', f'/portfolio/{self.project.slug}/',
+            '/profile/speaking/calendar/conference.ics',
+        ]:
+            self.assertIn(url, urls)
+        self.assertNotIn('/profile/newsletter-signup/', urls)
+        self.assertFalse([url for url in urls if url.startswith('/admin/')])
+
+    def test_warm_renders_every_page_without_counting_views(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from core.cache import versioned_key
+
+        results = warmup.warm(warmup.public_urls(), threads=1)
+        self.assertEqual({r.status for r in results}, {200})
+        self.assertIsNotNone(cache.get(versioned_key('portfolio', 'cards')))
+        self.assertIsNotNone(cache.get(versioned_key('blog-archive', 'months')))
+        self.assertEqual(analytics.flush_view_counts(), 0)
+
+        out = StringIO()
+        call_command('warm_cache', threads=1, top=2, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+        self.assertIn(f'Warmed {len(results)} pages', out.getvalue())
+
+
+@override_settings(SOCIAL_CARD_FORMAT='png', VIEW_COUNT_FLUSH_INTERVAL=0)
+class SocialCardTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make_post(self, **kwargs):
+        from blog.models import BlogPost
+        return BlogPost.objects.create(content='Text', published=True, **kwargs)
+
+    def test_cards_are_rendered_on_save_and_keyed_by_their_fields(self):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        post = self.make_post(title='Caching at the edge', tags='django, cdn')
+        name = social.card_name(social.card_key(post.social_card_fields()))
+        self.assertFalse(default_storage.exists(name))
+        run_tasks()
+        with default_storage.open(name) as f:
+            image = Image.open(f)
+            self.assertEqual((image.format, image.size), ('PNG', (1200, 630)))
+
+        post.excerpt = 'Not drawn on the card'
+        post.save()
+        self.assertEqual(social.card_name(social.card_key(post.social_card_fields())), name)
+        self.assertFalse(Task.objects.filter(status=Task.QUEUED).exists())
+
+        post.title = 'Caching at the edge, revisited'
+        post.save()
+        run_tasks()
+        renamed = social.card_name(social.card_key(post.social_card_fields()))
+        self.assertNotEqual(renamed, name)
+        self.assertTrue(default_storage.exists(renamed))
+
+    def test_detail_pages_emit_og_image_and_render_lazily(self):
+        from django.core.files.storage import default_storage
+
+        post = self.make_post(title='Lazy card')
+        name = social.card_name(social.card_key(post.social_card_fields()))
+        default_storage.delete(name)
+        cache.clear()
+
+        response = self.client.get(reverse('blog:blog_detail', args=[post.slug]))
+        self.assertTrue(default_storage.exists(name))
+        self.assertContains(response, f'<meta property="og:image" content="http://localhost:8000/media/{name}">', html=True)
+        self.assertContains(response, '<meta property="og:type" content="article">', html=True)
+        self.assertContains(response, '<meta name="twitter:card" content="summary_large_image">', html=True)
+
+    def test_backfill_renders_missing_cards_and_prunes_orphans(self):
+        from io import StringIO
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+
+        posts = [self.make_post(title=f'Post {i}') for i in range(3)]
+        run_tasks()
+        names = [social.card_name(social.card_key(p.social_card_fields())) for p in posts]
+        default_storage.delete(names[0])
+        orphan = default_storage.save(f'{social.CARD_DIR}/00/orphan.png', ContentFile(b'old'))
+
+        out = StringIO()
+        call_command('render_social_cards', workers=2, prune=True, stdout=out)
+        self.assertIn('Rendered 1 of 3 cards with 2 worker(s)', out.getvalue())
+        self.assertIn('pruned 1', out.getvalue())
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        self.assertFalse(default_storage.exists(orphan))
+
+
+calls = []
+
+
+@taskqueue.task(name='core.tests.flaky', max_attempts=3)
+def flaky(failures):
+    calls.append(failures)
+    if len(calls) <= failures:
+        raise ConnectionError('relay down')
+
+
+@taskqueue.task(name='core.tests.nap')
+def nap(seconds):
+    time.sleep(seconds)
+
+
+@override_settings(TASK_RETRY_BASE_DELAY=10, TASK_RETRY_MAX_DELAY=60)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def make_due(self):
+        Task.objects.filter(status=Task.QUEUED).update(run_at=timezone.now())
+
+    def test_failures_are_retried_with_backoff_then_succeed(self):
+        task = flaky.defer(2)
+        run_tasks()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+        self.assertIn('ConnectionError: relay down', task.last_error)
+        # First retry waits 5-10s (base delay with jitter); nothing runs before then.
+        self.assertGreater(task.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertEqual(run_tasks().processed, 0)
+
+        self.make_due()
+        run_tasks()
+        self.make_due()
+        worker = run_tasks()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, task.last_error), (Task.DONE, 3, ''))
+        self.assertEqual(worker.processed, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        task = flaky.defer(5)
+        for _ in range(3):
+            self.make_due()
+            run_tasks()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 3))
+        self.assertEqual(len(calls), 3)
+
+    def test_claims_are_disjoint_and_expired_leases_are_requeued(self):
+        for i in range(10):
+            nap.defer(0)
+        with taskqueue.Worker(pool='inline', batch_size=4) as first, taskqueue.Worker(pool='inline', batch_size=4) as second:
+            first.worker_id, second.worker_id = 'first', 'second'
+            a, b = first.claim(), second.claim()
+            self.assertEqual(len(a), 4)
+            self.assertEqual(len(b), 4)
+            self.assertFalse({t.pk for t in a} & {t.pk for t in b})
+
+            # The first worker dies; once its lease runs out its tasks go back in the queue.
+            Task.objects.filter(claimed_by__startswith='first').update(locked_until=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(second.reap(), 4)
+        self.assertEqual(Task.objects.filter(status=Task.QUEUED).count(), 6)
+
+    def test_run_worker_command_reports_latency(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        nap.defer(0)
+        nap.defer(0)
+        out = StringIO()
+        with mock.patch('core.management.commands.run_worker.Worker', lambda *args: taskqueue.Worker(pool='inline')):
+            call_command('run_worker', burst=True, stdout=out)
+        self.assertIn('Ran 2 task(s), 0 failed attempt(s)', out.getvalue())
+        self.assertIn('pickup latency p50', out.getvalue())
+
+        out = StringIO()
+        call_command('task_stats', stdout=out)
+        self.assertIn('Done: 2', out.getvalue())
+        self.assertIn('wait: n=2', out.getvalue())
+
+    def test_run_worker_survives_database_errors_outside_tasks(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import OperationalError
+
+        results = iter([OperationalError('database is locked'), 1, 0])
+
+        def run_once(worker):
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        out = StringIO()
+        with mock.patch.object(taskqueue.Worker, 'run_once', run_once), \
+                mock.patch('core.management.commands.run_worker.time.sleep') as sleep, \
+                self.assertLogs('core.management.commands.run_worker', 'ERROR') as logs:
+            call_command('run_worker', burst=True, pool='inline', stdout=out)
+        self.assertIn('database is locked', logs.output[0])
+        sleep.assert_called_once()
+        self.assertIn('Ran 0 task(s)', out.getvalue())
+
+    def test_task_stats_warns_when_due_tasks_pile_up(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        nap.defer(0)
+        out, err = StringIO(), StringIO()
+        call_command('task_stats', stdout=out, stderr=err)
+        self.assertEqual(err.getvalue(), '')
+
+        Task.objects.update(run_at=timezone.now() - timedelta(minutes=10))
+        call_command('task_stats', stdout=out, stderr=err)
+        self.assertIn('Is a worker running?', err.getvalue())
+
+
+class TaskQueueConcurrencyTests(TransactionTestCase):
+    def test_thread_pool_runs_a_batch_concurrently(self):
+        for _ in range(8):
+            nap.defer(0.2)
+        started = time.monotonic()
+        with taskqueue.Worker(concurrency=8, pool='thread') as worker:
+            worker.run_once()
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 8)
+
+
+class SingleFlightCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    def render(self, value='fresh', seconds=0):
+        def compute():
+            self.renders += 1
+            time.sleep(seconds)
+            return value
+        return compute
+
+    def test_simultaneous_misses_render_once(self):
+        threads, results = 16, []
+        barrier = threading.Barrier(threads)
+        compute = self.render(seconds=0.2)
+
+        def request():
+            barrier.wait()
+            results.append(cached('listing', compute, 60))
+
+        workers = [threading.Thread(target=request) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(results, ['fresh'] * threads)
+
+    def test_expired_entry_is_served_stale_while_one_caller_refreshes(self):
+        cache.set('listing', Entry('old', time.time() - 1, 0.1), 300)
+        cache.add('listing:lock', 'someone-else', 30)
+        self.assertEqual(cached('listing', self.render(), 60), 'old')
+        self.assertEqual(self.renders, 0)
+
+        cache.delete('listing:lock')
+        self.assertEqual(cached('listing', self.render(), 60), 'fresh')
+        self.assertEqual(cached('listing', self.render('newer'), 60), 'fresh')
+        self.assertEqual(self.renders, 1)
+
+    def test_expensive_entries_are_refreshed_early(self):
+        # Ten seconds before expiry, an entry that takes 5s to build is
+        # refreshed by an unlucky draw; a cheap one is not.
+        with mock.patch('core.cache.random.random', return_value=0.99):
+            cache.set('cheap', Entry('old', time.time() + 10, 0.01), 300)
+            self.assertEqual(cached('cheap', self.render(), 60), 'old')
+            cache.set('costly', Entry('old', time.time() + 10, 5), 300)
+            self.assertEqual(cached('costly', self.render(), 60), 'fresh')
+        self.assertEqual(self.renders, 1)
+
+    def test_a_stuck_lock_does_not_block_a_miss_forever(self):
+        cache.add('listing:lock', 'crashed-worker', 30)
+        with mock.patch('core.cache.LOCK_WAIT', 0.1):
+            self.assertEqual(cached('listing', self.render(), 60), 'fresh')
+
+    def test_timeout_can_depend_on_the_value(self):
+        cached('listing', self.render(), lambda value: 5)
+        entry = cache.get('listing')
+        self.assertAlmostEqual(entry.expires, time.time() + 5, delta=1)
+
+
+class SessionTests(TestCase):
+    def test_expired_sessions_are_deleted_in_batches(self):
+        from io import StringIO
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i:03}', session_data='', expire_date=past) for i in range(25)]
+            + [Session(session_key=f'live{i:03}', session_data='', expire_date=future) for i in range(3)]
+        )
+        out = StringIO()
+        call_command('clear_expired_sessions', batch_size=10, stdout=out)
+        self.assertIn('Deleted 25 expired session(s) in 3 batch(es)', out.getvalue())
+        self.assertEqual(Session.objects.count(), 3)
+
+        out = StringIO()
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+            call_command('clear_expired_sessions', stdout=out)
+        self.assertIn('nothing to delete', out.getvalue())
+
+    def test_cached_sessions_are_read_without_a_query(self):
+        from django.contrib.auth.models import User
+
+        cache.clear()
+        self.client.force_login(User.objects.create_user('admin'))
+        url = reverse('public_profile:press_mentions')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q for q in queries.captured_queries if 'django_session' in q['sql']])
+
+
+class StartupTests(TestCase):
+    # Generous for slow CI machines: a cold import takes ~0.45s under
+    # -X importtime and ~45MB here. Crossing either means something heavy
+    # moved onto the boot path.
+    IMPORT_BUDGET = 1.5
+    RSS_BUDGET_MB = 64
+    LAZY = ['bleach', 'markdown', 'PIL', 'aiosmtplib', 'urllib.request']
+
+    def test_wsgi_import_stays_within_budget(self):
+        profile = startup.cold_start(path='')
+        self.assertEqual([m for m in self.LAZY if m in profile.modules], [])
+        self.assertLess(profile.import_seconds, self.IMPORT_BUDGET)
+        self.assertLess(profile.rss_kb / 1024, self.RSS_BUDGET_MB)
+        # Which package is slowest depends on the machine; the shape doesn't.
+        packages = profile.by_package()
+        durations = [us for _, us in packages]
+        self.assertGreater(dict(packages)['django'], 0)
+        self.assertTrue(all(us >= 0 for us in durations))
+        self.assertEqual(durations, sorted(durations, reverse=True))
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_INTERVAL=0.001)
+class ProfilingTests(TestCase):
+    def slow_about(self):
+        from django.shortcuts import render
+
+        def slow_render(*args, **kwargs):
+            time.sleep(0.05)
+            return render(*args, **kwargs)
+        return mock.patch('core.views.render', slow_render)
+
+    def test_only_sampled_or_signed_requests_are_profiled(self):
+        url = reverse('core:about')
+        self.client.get(url)
+        self.client.get(url, headers={'X-Profile': 'forged'})
+        self.assertFalse(RequestProfile.objects.exists())
+
+        with self.slow_about():
+            response = self.client.get(url, headers={'X-Profile': profiling.make_token()})
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+        self.assertEqual((profile.trigger, profile.path, profile.status_code), (RequestProfile.HEADER, url, 200))
+        self.assertGreater(profile.duration_ms, 50)
+        self.assertGreater(profile.sample_count, 0)
+        self.assertIn('about (core/views.py', profile.stacks)
+        templates = {t['name']: t for t in profile.templates}
+        self.assertEqual(templates['core/about.html']['count'], 1)
+        # base.html renders inside about.html, so it counts towards its total but not its self time.
+        self.assertGreaterEqual(templates['core/about.html']['total_ms'], templates['base.html']['total_ms'])
+
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            response = self.client.get(reverse('blog:blog_list'))
+        profile = RequestProfile.objects.latest('pk')
+        self.assertEqual(profile.trigger, RequestProfile.SAMPLED)
+        self.assertGreater(profile.query_count, 0)
+        self.assertNotIn('X-Profile-Id', response)
+
+    async def test_async_views_are_profiled(self):
+        await self.async_client.get(reverse('core:contact'), headers={'X-Profile': profiling.make_token()})
+        profile = await RequestProfile.objects.aget()
+        self.assertIn('core/contact.html', [t['name'] for t in profile.templates])
+
+    @override_settings(PROFILING_KEEP=2)
+    def test_admin_downloads_flamegraphs_and_old_profiles_are_pruned(self):
+        from django.contrib.auth.models import User
+
+        with self.slow_about():
+            for _ in range(3):
+                self.client.get(reverse('core:about'), headers={'X-Profile': profiling.make_token()})
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        profile = RequestProfile.objects.latest('pk')
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.get(reverse('admin:core_requestprofile_collapsed', args=[profile.pk]))
+        lines = response.content.decode().splitlines()
+        self.assertEqual(sum(int(line.rpartition(' ')[2]) for line in lines), profile.sample_count)
+
+        response = self.client.get(reverse('admin:core_requestprofile_speedscope', args=[profile.pk]))
+        data = json.loads(response.content)
+        sampled = data['profiles'][0]
+        self.assertEqual(len(sampled['samples']), len(lines))
+        self.assertAlmostEqual(sum(sampled['weights']), profile.sample_count * profile.sample_interval_ms)
+        frames = data['shared']['frames']
+        self.assertIn('about', [frames[i]['name'] for i in sampled['samples'][0]])
+
+        response = self.client.get(reverse('admin:core_requestprofile_change', args=[profile.pk]))
+        self.assertContains(response, 'core/about.html')
+
+
+class SlowQueryLogTests(TestCase):
+    def test_fingerprints_ignore_literals_and_in_list_lengths(self):
+        self.assertEqual(
+            querylog.fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND name = \'a\' LIMIT 21'),
+            querylog.fingerprint('SELECT  *  FROM t WHERE id IN (%s, %s, %s) AND name = \'bb\' LIMIT 5'),
+        )
+        self.assertEqual(querylog.params_shape(list(range(10)), False), '(int x 10)')
+        self.assertEqual(querylog.params_shape(['x', 1], False), '(str, int)')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_scans_are_logged_once_per_shape_with_their_plan(self):
+        from portfolio.models import Project
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for term in ['django', 'react', 'go']:
+                list(Project.objects.filter(technology_stack__icontains=term))
+        row = SlowQuery.objects.get(sql__contains='"technology_stack" LIKE')
+        self.assertEqual(row.count, 3)
+        self.assertEqual(row.params_shape, '(str)')
+        self.assertEqual(row.vendor, 'sqlite')
+        self.assertIn('SCAN portfolio_project', row.explain)
+        self.assertRegex(row.origin, r'^core/tests.py:\d+ in test_scans_are_logged')
+        # The log's own queries are not logged.
+        self.assertFalse(SlowQuery.objects.filter(sql__contains='core_slowquery').exists())
+
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.get(reverse('admin:core_slowquery_change', args=[row.pk]))
+        self.assertContains(response, 'SCAN portfolio_project')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_queries_are_attributed_to_their_view(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('portfolio:portfolio_list'))
+        row = SlowQuery.objects.get(sql__startswith='SELECT', sql__contains='FROM "portfolio_project"')
+        self.assertEqual(row.view, 'portfolio:portfolio_list')
+        self.assertEqual(row.origin.split(':')[0], 'portfolio/views.py')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_ANALYZE=True)
+    def test_explain_analyze_runs_on_the_worker(self):
+        from portfolio.models import Project
+
+        with self.captureOnCommitCallbacks(execute=True):
+            list(Project.objects.filter(technology_stack__icontains='django', created_at__lte=timezone.now()))
+        row = SlowQuery.objects.get(sql__contains='"technology_stack" LIKE')
+        task = Task.objects.get(name='core.tasks.explain_slow_query')
+        self.assertEqual(task.args[0], row.fingerprint)
+
+        SlowQuery.objects.filter(pk=row.pk).update(explain='', explained_at=None)
+        run_tasks()
+        row.refresh_from_db()
+        self.assertIn('SCAN portfolio_project', row.explain)
+        self.assertIsNotNone(row.explained_at)
+
+    def test_fast_queries_are_not_logged(self):
+        from portfolio.models import Project
+
+        with self.captureOnCommitCallbacks(execute=True):
+            list(Project.objects.all())
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_changelist_counts_are_cached(self):
+        ContactSubmission.objects.create(name='A', email='a@example.com', subject='Hi', message='Hello')
+        queryset = ContactSubmission.objects.all()
+        self.assertEqual(admin_scaling.EstimatedCountPaginator(queryset, 10).count, 1)
+        ContactSubmission.objects.create(name='B', email='b@example.com', subject='Hi', message='Hello')
+        with self.assertNumQueries(0):
+            self.assertEqual(admin_scaling.EstimatedCountPaginator(queryset, 10).count, 1)
+        # A different filter is a different count.
+        self.assertEqual(admin_scaling.EstimatedCountPaginator(queryset.filter(name='B'), 10).count, 1)
+        # SQLite has no planner estimate to read.
+        self.assertIsNone(admin_scaling.estimated_count(queryset))
+
+    def test_contact_search_matches_email_name_or_subject_prefix_in_any_case(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        ContactSubmission.objects.create(name='Ada Lovelace', email='Ada@Example.com', subject='Engines', message='Hello')
+        ContactSubmission.objects.create(name='Grace', email='grace@example.com', subject='Compilers', message='Hello')
+        url = reverse('admin:core_contactsubmission_changelist')
+        for term, expected in [('ada@ex', 'Ada Lovelace'), ('ADA LOVE', 'Ada Lovelace'), ('compil', 'Grace')]:
+            results = self.client.get(url, {'q': term}).context['cl'].result_list
+            self.assertEqual([s.name for s in results], [expected])
+
+    def test_free_text_filter_choices_are_cached(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = reverse('admin:core_task_changelist')
+        Task.objects.create(name='first')
+        self.client.get(url)
+        Task.objects.create(name='second')
+        response = self.client.get(url)
+        self.assertContains(response, '?name=first')
+        self.assertNotContains(response, '?name=second')
+
+
+class RetentionTests(TestCase):
+    def submission(self, days, read):
+        submission = ContactSubmission.objects.create(name='A', email='a@example.com', subject='Hi', message='Hello', read=read)
+        ContactSubmission.objects.filter(pk=submission.pk).update(submitted_at=timezone.now() - timedelta(days=days))
+        return submission.pk
+
+    @override_settings(RETENTION_CONTACT_READ_DAYS=180, RETENTION_CONTACT_DAYS=730)
+    def test_old_and_read_submissions_move_to_the_archive_table(self):
+        gone = [self.submission(200, True), self.submission(800, False), self.submission(900, True)]
+        kept = [self.submission(200, False), self.submission(10, True)]
+
+        run = retention.apply(retention.POLICIES['contact_submissions'], archive='table', batch_size=2)
+
+        self.assertEqual((run.rows, run.batches), (3, 2))
+        self.assertEqual(sorted(ContactSubmission.objects.values_list('pk', flat=True)), kept)
+        batches = ArchiveBatch.objects.order_by('first_pk')
+        self.assertEqual([(b.first_pk, b.last_pk, b.rows) for b in batches], [(gone[0], gone[1], 2), (gone[2], gone[2], 1)])
+        lines = [json.loads(line) for b in batches for line in gzip.decompress(b.data).splitlines()]
+        self.assertEqual([line['pk'] for line in lines], gone)
+
+        # A batch restores with loaddata.
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'batch.jsonl.gz'
+            path.write_bytes(bytes(batches[0].data))
+            call_command('loaddata', str(path), verbosity=0)
+        self.assertEqual(ContactSubmission.objects.filter(pk__in=gone[:2]).count(), 2)
+
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.assertContains(self.client.get(reverse('admin:core_archivebatch_changelist')), 'contact_submissions')
+        response = self.client.get(reverse('admin:core_archivebatch_download', args=[batches[0].pk]))
+        self.assertEqual(response.content, bytes(batches[0].data))
+
+    @override_settings(RETENTION_INACTIVE_SUBSCRIBER_DAYS=90)
+    def test_inactive_subscribers_move_to_a_file_with_their_deliveries(self):
+        from public_profile.models import Campaign, CampaignDelivery, NewsletterSubscriber
+
+        campaign = Campaign.objects.create(subject='News', body_text='Hello')
+        inactive = NewsletterSubscriber.objects.create(email='gone@example.com', active=False)
+        NewsletterSubscriber.objects.create(email='active@example.com')
+        NewsletterSubscriber.objects.create(email='recent@example.com', active=False)
+        long_ago = timezone.now() - timedelta(days=100)
+        NewsletterSubscriber.objects.update(subscribed_at=long_ago)
+        # Age counts from unsubscribing, not from signing up.
+        NewsletterSubscriber.objects.filter(email='gone@example.com').update(unsubscribed_at=long_ago)
+        CampaignDelivery.objects.create(campaign=campaign, subscriber=inactive)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(RETENTION_ARCHIVE_DIR=directory):
+            run = retention.apply(retention.POLICIES['inactive_subscribers'], archive='file')
+            with gzip.open(run.path, 'rt') as f:
+                models = [json.loads(line)['model'] for line in f]
+
+        self.assertEqual((run.rows, run.related_rows), (1, 1))
+        self.assertEqual(models, ['public_profile.newslettersubscriber', 'public_profile.campaigndelivery'])
+        self.assertFalse(NewsletterSubscriber.objects.filter(email='gone@example.com').exists())
+        self.assertEqual(NewsletterSubscriber.objects.count(), 2)
+        self.assertFalse(CampaignDelivery.objects.exists())
+
+    @override_settings(RETENTION_INACTIVE_SUBSCRIBER_DAYS=1, NEWSLETTER_CONFIRM_MAX_AGE=7 * 86400)
+    def test_subscribers_outlive_their_confirmation_links(self):
+        from public_profile.models import NewsletterSubscriber
+
+        subscriber = NewsletterSubscriber.objects.create(email='gone@example.com', active=False)
+        self.assertIsNotNone(subscriber.unsubscribed_at)
+        policy = retention.POLICIES['inactive_subscribers']
+        self.assertEqual(retention.apply(policy, now=timezone.now() + timedelta(days=2)).rows, 0)
+        self.assertEqual(retention.apply(policy, now=timezone.now() + timedelta(days=8)).rows, 1)
+
+    @override_settings(RETENTION_TASK_DAYS=14)
+    def test_old_finished_tasks_are_pruned(self):
+        old = timezone.now() - timedelta(days=20)
+        done = Task.objects.create(name='done', status=Task.DONE, finished_at=old)
+        Task.objects.create(name='failed', status=Task.FAILED, finished_at=old)
+        Task.objects.create(name='recent', status=Task.DONE, finished_at=timezone.now())
+        Task.objects.create(name='queued')
+
+        run = retention.apply(retention.POLICIES['finished_tasks'], archive='none')
+
+        self.assertEqual(run.rows, 1)
+        self.assertFalse(Task.objects.filter(pk=done.pk).exists())
+        self.assertEqual(Task.objects.count(), 3)
+
+    @override_settings(RETENTION_CONTACT_READ_DAYS=None, RETENTION_CONTACT_DAYS=None)
+    def test_empty_settings_disable_a_policy(self):
+        self.submission(5000, True)
+        self.assertEqual(retention.apply(retention.POLICIES['contact_submissions']).rows, 0)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    @override_settings(RETENTION_CONTACT_READ_DAYS=180)
+    def test_command_reports_rows_per_second(self):
+        self.submission(200, True)
+        out = io.StringIO()
+        call_command('apply_retention', 'contact_submissions', '--dry-run', stdout=out)
+        self.assertIn('contact_submissions: 1 row(s) would be removed.', out.getvalue())
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+        out = io.StringIO()
+        call_command('apply_retention', 'contact_submissions', '--archive', 'table', '--analyze', stdout=out)
+        self.assertRegex(out.getvalue(), r'moved 1 row\(s\) .* \d+ rows/s')
+        self.assertIn('Ran ANALYZE "core_contactsubmission"', out.getvalue())
+        self.assertFalse(ContactSubmission.objects.exists())
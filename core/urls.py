@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
+    path('views/<str:label>/<int:pk>/', views.view_beacon, name='view_beacon'),
 ]
 
 
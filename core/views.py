@@ -1,9 +1,22 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import render
-from django.core.mail import send_mail
+from django.http import HttpResponse
 from django.contrib import messages
-from django.conf import settings
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from . import spam
+from .analytics import record_view, tracked_model
 from .models import ContactSubmission
 from .forms import ContactForm
+from .tasks import send_contact_email
+
+
+# Templates may touch lazy, DB-backed context (e.g. ``user`` in the cached
+# chrome keys), so async views render off the event loop.
+arender = sync_to_async(render)
 
 
 def home(request):
@@ -16,36 +29,43 @@ def about(request):
     return render(request, 'core/about.html')
 
 
-def contact(request):
-    """Contact page view with form handling."""
+async def contact(request):
+    """Contact page view with form handling; the notification email is sent by a background task."""
     if request.method == 'POST':
+        # Cheapest check first: turn floods away before parsing or validating anything.
+        if await spam.arate_limited(spam.client_ip(request)):
+            return HttpResponse('Too many messages. Please try again later.', status=429, content_type='text/plain')
+        
         form = ContactForm(request.POST)
-        if form.is_valid():
+        # Validation may (re)train the spam model from the database, so run it off the event loop.
+        if await sync_to_async(form.is_valid)():
             # Save to database
-            contact_submission = form.save()
+            await form.instance.asave()
             
-            # Send email
-            try:
-                send_mail(
-                    subject=f"Contact Form: {form.cleaned_data['subject']}",
-                    message=f"""
-Name: {form.cleaned_data['name']}
-Email: {form.cleaned_data['email']}
-Subject: {form.cleaned_data['subject']}
-
-Message:
-{form.cleaned_data['message']}
-                    """,
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[settings.EMAIL_HOST_USER],
-                    fail_silently=False,
-                )
-                messages.success(request, 'Thank you for your message! I\'ll get back to you soon.')
-            except Exception as e:
-                messages.error(request, 'There was an error sending your message. Please try again.')
+            # The email goes out from the task worker, with retries if the relay is down.
+            await send_contact_email.adefer(form.instance.pk)
+            messages.success(request, 'Thank you for your message! I\'ll get back to you soon.')
             
-            return render(request, 'core/contact.html', {'form': ContactForm()})
+            return await arender(request, 'core/contact.html', {'form': ContactForm()})
     else:
         form = ContactForm()
     
-    return render(request, 'core/contact.html', {'form': form})
\ No newline at end of file
+    return await arender(request, 'core/contact.html', {'form': form})
+
+
+@never_cache
+@csrf_exempt
+@require_POST
+def view_beacon(request, label, pk):
+    """
+    Count a view of a detail page; sent by the page, so copies served by the
+    edge count too. One client's views of a page count once per
+    ``VIEW_COUNT_DEDUPE_WINDOW``, checked before touching the database.
+    """
+    if not cache.add(f'views:seen:{spam.client_ip(request)}:{label}:{pk}', 1, settings.VIEW_COUNT_DEDUPE_WINDOW):
+        return HttpResponse(status=204)
+    model = tracked_model(label)
+    if model is None or not model.objects.filter(pk=pk).exists():
+        return HttpResponse(status=404)
+    record_view(model(pk=pk))
+    return HttpResponse(status=204)
@@ -0,0 +1,127 @@
+"""
+Cache warmup after a deploy or cache flush.
+
+``public_urls`` lists every public page: the parameterless GET routes found
+in the URLconf plus the detail, archive, pagination and feed URLs derived
+from the models. ``warm`` renders them in-process through the test client
+across a pool of threads, which fills the low-level caches, template
+fragments and iCalendar blocks exactly as the first anonymous visitors
+would. Views are counted by a beacon the browser sends (see
+``core.analytics``), which the test client never runs, so warmup doesn't
+count as views.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+# Namespaces whose pages are never public.
+EXCLUDED_NAMESPACES = {'admin'}
+
+
+@dataclass
+class Render:
+    url: str
+    status: int
+    seconds: float
+    size: int
+
+
+def _static_routes(patterns, namespace=None):
+    """Yield names of URLconf routes that take no arguments and answer GET."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in EXCLUDED_NAMESPACES or pattern.pattern.converters:
+                continue
+            inner = ':'.join(filter(None, [namespace, pattern.namespace]))
+            yield from _static_routes(pattern.url_patterns, inner or None)
+        elif isinstance(pattern, URLPattern) and pattern.name and not pattern.pattern.converters:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None and not hasattr(view_class, 'get'):
+                continue
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+def public_urls():
+    """Every public page, in URLconf order followed by the model-derived URLs."""
+    from blog.models import BlogPost
+    from blog.views import POSTS_PER_PAGE, archive_months
+    from portfolio.models import Project
+    from public_profile.models import SpeakingEngagement
+
+    urls = [reverse(name) for name in _static_routes(get_resolver().url_patterns)]
+
+    posts = BlogPost.objects.published()
+    # Listing pages after the first, at the list view's page size.
+    for number in range(2, Paginator(posts.only('pk'), POSTS_PER_PAGE).num_pages + 1):
+        urls.append(f"{reverse('blog:blog_list')}?page={number}")
+    urls += [reverse('blog:blog_detail', args=[slug]) for slug in posts.values_list('slug', flat=True).iterator()]
+    for year in archive_months():
+        urls.append(reverse('blog:blog_year_archive', args=[year['year']]))
+        urls += [reverse('blog:blog_month_archive', args=[m['date'].year, m['date'].month]) for m in year['months']]
+
+    urls += [reverse('portfolio:portfolio_detail', args=[slug]) for slug in Project.objects.values_list('slug', flat=True).iterator()]
+    urls += [
+        reverse('public_profile:speaking_calendar_type', args=[event_type])
+        for event_type, _ in SpeakingEngagement._meta.get_field('event_type').choices
+    ]
+    return list(dict.fromkeys(urls))
+
+
+async def _aconsume(chunks):
+    return b''.join([chunk async for chunk in chunks])
+
+
+def _render_all(urls, results):
+    # Imported here so importing this module doesn't pull in the test framework.
+    from django.test import Client
+
+    host = urlparse(settings.SITE_URL).hostname or 'localhost'
+    client = Client(raise_request_exception=False, HTTP_HOST=host)
+    while True:
+        try:
+            url = urls.get_nowait()
+        except queue.Empty:
+            return
+        started = time.perf_counter()
+        response = client.get(url)
+        # Streamed responses (feeds) only render as they are consumed.
+        if not response.streaming:
+            body = response.content
+        elif response.is_async:
+            body = async_to_sync(_aconsume)(response.streaming_content)
+        else:
+            body = b''.join(response.streaming_content)
+        results.append(Render(url, response.status_code, time.perf_counter() - started, len(body)))
+
+
+def _worker(urls, results):
+    try:
+        _render_all(urls, results)
+    finally:
+        # Each thread opened its own connections.
+        connections.close_all()
+
+
+def warm(urls, threads=4):
+    """Render ``urls`` across ``threads`` worker threads; return a ``Render`` per URL."""
+    pending = queue.SimpleQueue()
+    for url in urls:
+        pending.put(url)
+    results = []
+    if threads <= 1:
+        _render_all(pending, results)
+        return results
+    workers = [threading.Thread(target=_worker, args=(pending, results)) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
@@ -46,8 +46,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Removes itself unless PROFILING_ENABLED; first so it sees everything below.
+    "core.profiling.ProfilingMiddleware",
+    # Lets the slow query log name the view a query came from.
+    "core.querylog.QueryLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Async-capable WhiteNoise so the stack stays native under ASGI.
+    "core.middleware.AsyncWhiteNoiseMiddleware",
+    # Before session/CSRF/messages so it sees the cookies and Vary they add.
+    "core.edge.EdgeCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -58,23 +65,38 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "personal_website.urls"
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if not DEBUG:
+    # Parse each template once per process in production.
+    TEMPLATE_LOADERS = [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "core.context_processors.site_chrome",
             ],
+            "loaders": TEMPLATE_LOADERS,
         },
     },
 ]
 
+# Cached fragments for the shared base.html chrome (navigation, footer, scripts).
+# Bump CHROME_CACHE_VERSION when that markup changes to invalidate old fragments.
+CHROME_CACHE_TIMEOUT = config('CHROME_CACHE_TIMEOUT', default=0 if DEBUG else 3600, cast=int)
+CHROME_CACHE_VERSION = config('CHROME_CACHE_VERSION', default='1')
+
 WSGI_APPLICATION = "personal_website.wsgi.application"
+ASGI_APPLICATION = "personal_website.asgi.application"
 
 
 # Database
@@ -132,6 +154,45 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Media kit ZIP bundles, stored under a hash of their inputs (see public_profile/mediakit.py).
+MEDIA_KIT_ROOT = config('MEDIA_KIT_ROOT', default=str(MEDIA_ROOT / "media-kit"))
+MEDIA_KIT_HEADSHOTS = ["images/profile-photo.jpg", "images/about-photo.jpg"]
+
+# Open Graph card images for posts and projects (see core/social.py).
+# SOCIAL_CARD_FONT is an optional TrueType font; Pillow's built-in font is used otherwise.
+SOCIAL_CARD_MODELS = ['blog.BlogPost', 'portfolio.Project']
+SOCIAL_CARD_FORMAT = config('SOCIAL_CARD_FORMAT', default='png')  # png or webp
+SOCIAL_CARD_SITE_NAME = config('SOCIAL_CARD_SITE_NAME', default='Your Name')
+SOCIAL_CARD_FONT = config('SOCIAL_CARD_FONT', default='')
+
+# Cache
+# Use a shared backend (Redis/Memcached) in production so rate limits and
+# other cached state are consistent across gunicorn workers.
+CACHES = {
+    "default": {
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": config('CACHE_LOCATION', default='personal-website'),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith('LocMemCache'):
+    # The default of 300 entries is easily culled by per-IP and per-message keys.
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+# Entries built with core.cache.cached stay servable this many seconds past
+# their timeout while one request recomputes them.
+CACHE_STALE_TIMEOUT = config('CACHE_STALE_TIMEOUT', default=300, cast=int)
+
+# Sessions and flash messages
+# Only the admin needs a session. cached_db reads sessions from the cache and
+# writes through to the database; with a shared cache an admin request needs
+# no session query. signed_cookies needs neither, at the cost of sessions
+# that cannot be revoked server-side. Delete expired rows in batches with
+# `manage.py clear_expired_sessions`.
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=not DEBUG, cast=bool)
+# Flash messages travel in a signed cookie and never create a session; the
+# default fallback storage spills into the session when the cookie is full.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -140,7 +201,110 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
+# Public base URL used in links that leave the site (e.g. campaign emails)
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+
+# Contact form spam filtering (see core/spam.py)
+CONTACT_RATE_LIMIT = config('CONTACT_RATE_LIMIT', default=5, cast=int)  # submissions per IP per window
+CONTACT_RATE_WINDOW = config('CONTACT_RATE_WINDOW', default=600, cast=int)  # seconds
+CONTACT_TRUST_X_FORWARDED_FOR = config('CONTACT_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+CONTACT_MIN_SUBMIT_SECONDS = config('CONTACT_MIN_SUBMIT_SECONDS', default=3, cast=float)
+CONTACT_MAX_FORM_AGE = config('CONTACT_MAX_FORM_AGE', default=86400, cast=int)  # seconds
+CONTACT_DUPLICATE_WINDOW = config('CONTACT_DUPLICATE_WINDOW', default=86400, cast=int)  # seconds
+CONTACT_SPAM_THRESHOLD = config('CONTACT_SPAM_THRESHOLD', default=0.9, cast=float)
+CONTACT_SPAM_TRAINING_ROWS = config('CONTACT_SPAM_TRAINING_ROWS', default=10000, cast=int)
+
+# Upper bound for cached speaking engagement listings (they also expire when
+# the next upcoming event passes, and are invalidated on save).
+SPEAKING_CACHE_TIMEOUT = config('SPEAKING_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Cached blog archive month counts (invalidated when a post is published or unpublished).
+BLOG_ARCHIVE_CACHE_TIMEOUT = config('BLOG_ARCHIVE_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Page views are buffered in the cache and written to view_count in batches
+# at most once per interval (see core/analytics.py). 0 disables the automatic
+# flush; run `manage.py flush_view_counts` instead.
+VIEW_COUNT_MODELS = ['blog.BlogPost', 'portfolio.Project']
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=60, cast=int)
+VIEW_COUNT_DEDUPE_WINDOW = config('VIEW_COUNT_DEDUPE_WINDOW', default=1800, cast=int)  # seconds one client's views of a page count once
+POPULAR_POSTS_CACHE_TIMEOUT = config('POPULAR_POSTS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Cached portfolio card list and card fragments (invalidated when a project is saved).
+PORTFOLIO_CACHE_TIMEOUT = config('PORTFOLIO_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Cached press archive pages and facet counts (invalidated when a mention is saved).
+PRESS_CACHE_TIMEOUT = config('PRESS_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Cached VEVENT blocks are keyed by updated_at, so they never go stale; the
+# timeout only bounds how long blocks of deleted events linger.
+ICAL_BLOCK_CACHE_TIMEOUT = config('ICAL_BLOCK_CACHE_TIMEOUT', default=7 * 86400, cast=int)
+
+# Admin changelists of large tables (see core/admin_scaling.py): unfiltered
+# PostgreSQL tables past the threshold are counted from the planner's
+# estimate; other changelist counts and free-text filter choices are cached.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100_000, cast=int)
+ADMIN_COUNT_CACHE_TIMEOUT = config('ADMIN_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+ADMIN_FILTER_CACHE_TIMEOUT = config('ADMIN_FILTER_CACHE_TIMEOUT', default=300, cast=int)
+
+# Retention (see core/retention.py; run `manage.py apply_retention`): rows
+# past these ages are archived and deleted. Leave a setting empty to keep
+# those rows. RETENTION_ARCHIVE is 'table' (ArchiveBatch rows), 'file'
+# (JSON Lines .gz under RETENTION_ARCHIVE_DIR) or 'none'.
+_days = lambda v: int(v) if v not in ('', None) else None
+RETENTION_CONTACT_READ_DAYS = config('RETENTION_CONTACT_READ_DAYS', default=180, cast=_days)
+RETENTION_CONTACT_DAYS = config('RETENTION_CONTACT_DAYS', default=730, cast=_days)
+RETENTION_INACTIVE_SUBSCRIBER_DAYS = config('RETENTION_INACTIVE_SUBSCRIBER_DAYS', default=90, cast=_days)
+RETENTION_TASK_DAYS = config('RETENTION_TASK_DAYS', default=14, cast=_days)
+RETENTION_ARCHIVE = config('RETENTION_ARCHIVE', default='table')
+RETENTION_ARCHIVE_DIR = config('RETENTION_ARCHIVE_DIR', default=str(BASE_DIR / "archive"))
+
+# Request profiling (see core/profiling.py). When enabled, a fraction of
+# requests, plus those with a signed X-Profile header from
+# `manage.py profiling_token`, are sampled every PROFILING_INTERVAL seconds
+# and stored for download from the admin.
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+PROFILING_TOKEN_MAX_AGE = config('PROFILING_TOKEN_MAX_AGE', default=86400, cast=int)
+PROFILING_KEEP = config('PROFILING_KEEP', default=500, cast=int)
+
+# Slow query log (see core/querylog.py): statements slower than this are
+# recorded per SQL fingerprint, with a query plan, and listed in the admin.
+# Leave empty to disable.
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=lambda v: float(v) if v not in ('', None) else None)
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+# EXPLAIN ANALYZE re-runs the query, so it is opt-in and runs on the task worker.
+SLOW_QUERY_EXPLAIN_ANALYZE = config('SLOW_QUERY_EXPLAIN_ANALYZE', default=False, cast=bool)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = config('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', default=5000, cast=int)
+
+# Newsletter campaign delivery
+NEWSLETTER_FROM_EMAIL = config('NEWSLETTER_FROM_EMAIL', default=EMAIL_HOST_USER)
+NEWSLETTER_SMTP_CONNECTIONS = config('NEWSLETTER_SMTP_CONNECTIONS', default=4, cast=int)
+NEWSLETTER_BATCH_SIZE = config('NEWSLETTER_BATCH_SIZE', default=500, cast=int)
+NEWSLETTER_MAX_RATE = config('NEWSLETTER_MAX_RATE', default=0, cast=float)  # messages/second, 0 = unlimited
+NEWSLETTER_CONFIRM_MAX_AGE = config('NEWSLETTER_CONFIRM_MAX_AGE', default=7 * 86400, cast=int)  # seconds a confirmation link stays valid
+NEWSLETTER_CONFIRM_INTERVAL = config('NEWSLETTER_CONFIRM_INTERVAL', default=3600, cast=int)  # seconds between confirmation emails to one address
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Shared (CDN / reverse proxy) caching of anonymous pages (see core/edge.py).
+# EDGE_CACHE_MAX_AGE is the s-maxage in seconds; 0 leaves responses alone.
+# Saves purge Surrogate-Keys through EDGE_PURGER, e.g. core.edge.HTTPPurger
+# sending PURGE to EDGE_PURGE_URL.
+EDGE_CACHE_MAX_AGE = config('EDGE_CACHE_MAX_AGE', default=0 if DEBUG else 300, cast=int)
+EDGE_CACHE_STALE_WHILE_REVALIDATE = config('EDGE_CACHE_STALE_WHILE_REVALIDATE', default=86400, cast=int)
+EDGE_PURGER = config('EDGE_PURGER', default='core.edge.NullPurger')
+EDGE_PURGE_URL = config('EDGE_PURGE_URL', default='')
+EDGE_PURGE_TIMEOUT = config('EDGE_PURGE_TIMEOUT', default=2, cast=float)
+
+# Background tasks (see core/taskqueue.py; run `manage.py run_worker`).
+# Failed tasks are retried after TASK_RETRY_BASE_DELAY * 2**(attempt - 1)
+# seconds (with jitter, capped at TASK_RETRY_MAX_DELAY). A task whose worker
+# dies is requeued once its TASK_LEASE_SECONDS lease expires.
+TASK_MAX_ATTEMPTS = config('TASK_MAX_ATTEMPTS', default=5, cast=int)
+TASK_RETRY_BASE_DELAY = config('TASK_RETRY_BASE_DELAY', default=10, cast=float)
+TASK_RETRY_MAX_DELAY = config('TASK_RETRY_MAX_DELAY', default=3600, cast=float)
+TASK_LEASE_SECONDS = config('TASK_LEASE_SECONDS', default=300, cast=int)
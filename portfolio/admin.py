@@ -1,12 +1,18 @@
 from django.contrib import admin
-from .models import Project
+from .models import Project, Technology
 
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
-    list_display = ['title', 'featured', 'order', 'created_at']
+    list_display = ['title', 'featured', 'order', 'view_count', 'created_at']
     list_filter = ['featured', 'created_at']
     search_fields = ['title', 'description', 'technology_stack']
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ['featured', 'order']
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name']
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def parse_stacks(apps, schema_editor):
+    """Create Technology rows from every project's stack and score related projects."""
+    Project = apps.get_model('portfolio', 'Project')
+    Technology = apps.get_model('portfolio', 'Technology')
+    RelatedProject = apps.get_model('portfolio', 'RelatedProject')
+    
+    stacks = {}
+    names = {}
+    for pk, text in Project.objects.values_list('pk', 'technology_stack').iterator():
+        stack = set()
+        for name in (text or '').split(','):
+            name = name.strip()
+            slug = slugify(name.replace('+', 'p').replace('#', 'sharp'))
+            if slug:
+                names.setdefault(slug, name[:100])
+                stack.add(slug)
+        stacks[pk] = stack
+    
+    Technology.objects.bulk_create([Technology(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True)
+    technology_ids = dict(Technology.objects.values_list('slug', 'pk'))
+    Through = Project.technologies.through
+    Through.objects.bulk_create(
+        [Through(project_id=pk, technology_id=technology_ids[slug]) for pk, stack in stacks.items() for slug in stack],
+        batch_size=1000,
+    )
+    
+    related = []
+    pks = sorted(stacks)
+    for i, a in enumerate(pks):
+        for b in pks[i + 1:]:
+            shared = len(stacks[a] & stacks[b])
+            if shared:
+                score = shared / len(stacks[a] | stacks[b])
+                related.append(RelatedProject(project_id=a, related_id=b, score=score))
+                related.append(RelatedProject(project_id=b, related_id=a, score=score))
+    RelatedProject.objects.bulk_create(related, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='technologies',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='portfolio.technology'),
+        ),
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_scores', to='portfolio.project')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='portfolio.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', '-score'], name='portfolio_r_project_ae9017_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'related'), name='unique_related_project')],
+            },
+        ),
+        migrations.RunPython(parse_stacks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0002_technologies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,7 +1,42 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 
 
+def technology_slug(name):
+    """Slug identifying a technology; keeps "C++" and "C#" apart from "C"."""
+    return slugify(name.replace('+', 'p').replace('#', 'sharp'))
+
+
+def parse_technologies(text):
+    """Map slug -> display name for each distinct technology in a comma-separated stack."""
+    technologies = {}
+    for name in (text or '').split(','):
+        name = name.strip()
+        slug = technology_slug(name)
+        if slug and slug not in technologies:
+            technologies[slug] = name[:100]
+    return technologies
+
+
+def jaccard(a, b):
+    """Overlap of two sets: |a & b| / |a | b|."""
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class Technology(models.Model):
+    """A technology used by portfolio projects, parsed from their stacks."""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Technologies"
+    
+    def __str__(self):
+        return self.name
+
+
 class Project(models.Model):
     """Model for portfolio projects."""
     title = models.CharField(max_length=200)
@@ -9,6 +44,7 @@ class Project(models.Model):
     description = models.TextField()
     short_description = models.CharField(max_length=300)
     technology_stack = models.TextField(help_text="Technologies used in the project")
+    technologies = models.ManyToManyField(Technology, related_name='projects', blank=True, editable=False)
     github_url = models.URLField(blank=True)
     live_url = models.URLField(blank=True)
     featured_image = models.ImageField(upload_to='portfolio/', blank=True, null=True)
@@ -16,6 +52,7 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     featured = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['order', '-created_at']
@@ -26,6 +63,7 @@ class Project(models.Model):
         if not self.slug:
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
+        self.sync_technologies()
     
     def __str__(self):
         return self.title
@@ -35,4 +73,67 @@ class Project(models.Model):
         """Return technology stack as a list."""
         if self.technology_stack:
             return [tech.strip() for tech in self.technology_stack.split(',')]
-        return []
\ No newline at end of file
+        return []
+    
+    def social_card_fields(self):
+        """What the Open Graph card draws (see core.social)."""
+        return {
+            'kicker': 'Project',
+            'title': self.title,
+            'labels': list(parse_technologies(self.technology_stack).values()),
+        }
+    
+    def sync_technologies(self):
+        """Point ``technologies`` at the parsed stack and rescore related projects if it changed."""
+        parsed = parse_technologies(self.technology_stack)
+        current = set(self.technologies.values_list('slug', flat=True))
+        if current == set(parsed):
+            return
+        with transaction.atomic():
+            Technology.objects.bulk_create(
+                [Technology(slug=slug, name=name) for slug, name in parsed.items()],
+                ignore_conflicts=True,
+            )
+            self.technologies.set(Technology.objects.filter(slug__in=parsed))
+            RelatedProject.rebuild_for(self)
+
+
+class RelatedProject(models.Model):
+    """
+    Precomputed Jaccard overlap between the technology sets of two projects.
+
+    Rows are stored in both directions and rebuilt whenever a project's stack
+    changes, so the detail page reads its related projects from an index.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='related_scores')
+    related = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'related'], name='unique_related_project'),
+        ]
+        indexes = [
+            models.Index(fields=['project', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.project} ~ {self.related} ({self.score:.2f})"
+    
+    @classmethod
+    def rebuild_for(cls, project):
+        """Recompute every pair involving ``project`` from the technology through table."""
+        through = Project.technologies.through
+        own = set(through.objects.filter(project_id=project.pk).values_list('technology_id', flat=True))
+        candidates = through.objects.filter(technology_id__in=own).exclude(project_id=project.pk).values('project_id')
+        stacks = {}
+        for project_id, technology_id in through.objects.filter(project_id__in=candidates).values_list('project_id', 'technology_id'):
+            stacks.setdefault(project_id, set()).add(technology_id)
+        
+        rows = []
+        for other_id, stack in stacks.items():
+            score = jaccard(own, stack)
+            rows.append(cls(project_id=project.pk, related_id=other_id, score=score))
+            rows.append(cls(project_id=other_id, related_id=project.pk, score=score))
+        cls.objects.filter(models.Q(project=project) | models.Q(related=project)).delete()
+        cls.objects.bulk_create(rows)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate
+from core.edge import purge_instance_on_commit
+from core.social import queue_render
+from .models import Project
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_portfolio_cache(sender, instance, **kwargs):
+    invalidate('portfolio')
+    purge_instance_on_commit(sender, instance)
+
+
+@receiver(post_save, sender=Project)
+def render_social_card(sender, instance, **kwargs):
+    queue_render(sender, instance)
@@ -1,3 +1,86 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from core.testing import TemporaryMediaMixin
 
-# Create your tests here.
+from .models import Project, RelatedProject, Technology, parse_technologies
+
+
+def make_project(title, stack, **kwargs):
+    return Project.objects.create(
+        title=title, description='Description', short_description='Short', technology_stack=stack, **kwargs)
+
+
+class TechnologyIndexTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.shop = make_project('Shop', 'Django, React, PostgreSQL')
+        self.chat = make_project('Chat', 'Django, Redis, PostgreSQL')
+        self.cli = make_project('CLI', 'Go')
+
+    def test_parse_keeps_distinct_technologies(self):
+        self.assertEqual(
+            parse_technologies(' Go, go, C++, C#, C, , Vue.js'),
+            {'go': 'Go', 'cpp': 'C++', 'csharp': 'C#', 'c': 'C', 'vuejs': 'Vue.js'},
+        )
+
+    def test_save_links_technologies(self):
+        self.assertEqual(set(self.shop.technologies.values_list('slug', flat=True)), {'django', 'react', 'postgresql'})
+        self.assertEqual(Technology.objects.filter(slug='django').count(), 1)
+
+    def test_related_projects_are_ranked_by_jaccard_overlap(self):
+        # 'Go' no longer matches 'Django' as a substring.
+        self.assertFalse(RelatedProject.objects.filter(project=self.cli).exists())
+        score = RelatedProject.objects.get(project=self.shop, related=self.chat).score
+        self.assertAlmostEqual(score, 2 / 4)
+
+        api = make_project('API', 'Django, React, PostgreSQL, Docker')
+        response = self.client.get(reverse('portfolio:portfolio_detail', args=[self.shop.slug]))
+        self.assertEqual(response.context['related_projects'], [api, self.chat])
+
+    def test_scores_are_rebuilt_when_the_stack_changes(self):
+        self.chat.technology_stack = 'Elixir'
+        self.chat.save()
+        self.assertFalse(RelatedProject.objects.filter(related=self.chat).exists())
+
+        self.cli.title = 'Renamed'
+        with self.assertNumQueries(3):
+            # The UPDATE, queueing the new social card and a read of the
+            # current technologies; no rescoring.
+            self.cli.save()
+
+    def test_list_facets_filter_and_count(self):
+        url = reverse('portfolio:portfolio_list')
+        response = self.client.get(url)
+        counts = {row['slug']: row['count'] for row in response.context['technology_counts']}
+        self.assertEqual(counts, {'django': 2, 'postgresql': 2, 'react': 1, 'redis': 1, 'go': 1})
+
+        response = self.client.get(url, {'tech': ['django', 'redis']})
+        self.assertEqual(list(response.context['projects']), [self.chat])
+        counts = {row['slug']: row['count'] for row in response.context['technology_counts']}
+        self.assertEqual(counts, {'django': 1, 'postgresql': 1, 'redis': 1})
+
+
+class PortfolioListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('portfolio:portfolio_list')
+        for i in range(12):
+            make_project(f'Project {i}', 'Django, Python', featured=i < 3)
+
+    def test_list_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'tech': 'django'})
+        self.assertEqual(len(response.context['featured_projects']), 3)
+        self.assertEqual(len(response.context['projects']), 12)
+        self.assertNotIn('description', response.context['projects'][0].__dict__)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_saving_a_project_refreshes_its_card(self):
+        self.client.get(self.url)
+        project = Project.objects.get(title='Project 4')
+        project.short_description = 'Now with a new summary'
+        project.save()
+        self.assertContains(self.client.get(self.url), 'Now with a new summary')
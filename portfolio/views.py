@@ -1,15 +1,68 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from .models import Project
+from core.analytics import beacon_url
+from core.cache import cached, versioned_key
+from core.edge import tag
+from core.social import card_meta
+from .models import Project, parse_technologies
+
+# Everything the list cards render; the long ``description`` is left out.
+CARD_FIELDS = [
+    'title', 'slug', 'short_description', 'technology_stack', 'github_url', 'live_url',
+    'featured_image', 'featured', 'order', 'created_at', 'updated_at',
+]
+
+
+def _project_cards():
+    """All projects with their card fields and parsed technologies, from one query, cached."""
+    def compute():
+        projects = list(Project.objects.only(*CARD_FIELDS))
+        for project in projects:
+            project.technology_slugs = parse_technologies(project.technology_stack)
+        return projects
+
+    return cached(versioned_key('portfolio', 'cards'), compute, settings.PORTFOLIO_CACHE_TIMEOUT)
 
 
 def portfolio_list(request):
-    """List view for portfolio projects."""
-    projects = Project.objects.all()
-    featured_projects = projects.filter(featured=True)
+    """List view for portfolio projects, filterable by one or more technologies."""
+    projects = _project_cards()
+    tag(request, Project)
+    
+    names = {}
+    for project in projects:
+        for slug, name in project.technology_slugs.items():
+            names.setdefault(slug, name)
+    selected = [slug for slug in dict.fromkeys(request.GET.getlist('tech')) if slug in names]
+    projects = [p for p in projects if all(slug in p.technology_slugs for slug in selected)]
+    
+    # Split and facet the single result list in Python rather than with more queries.
+    featured_projects = [p for p in projects if p.featured]
+    counts = {}
+    for project in projects:
+        for slug in project.technology_slugs:
+            counts[slug] = counts.get(slug, 0) + 1
+    technology_counts = []
+    for slug, count in sorted(counts.items(), key=lambda item: (-item[1], names[item[0]].lower())):
+        is_selected = slug in selected
+        # Each facet link toggles its technology in the current selection.
+        toggled = [s for s in selected if s != slug] if is_selected else selected + [slug]
+        technology_counts.append({
+            'name': names[slug],
+            'slug': slug,
+            'count': count,
+            'selected': is_selected,
+            'query': urlencode({'tech': toggled}, doseq=True),
+        })
     
     context = {
         'projects': projects,
         'featured_projects': featured_projects,
+        'technology_counts': technology_counts,
+        'selected_technologies': selected,
+        'card_cache_timeout': settings.PORTFOLIO_CACHE_TIMEOUT,
     }
     return render(request, 'portfolio/portfolio_list.html', context)
 
@@ -17,14 +70,17 @@ def portfolio_list(request):
 def portfolio_detail(request, slug):
     """Detail view for individual portfolio projects."""
     project = get_object_or_404(Project, slug=slug)
-    
-    # Get related projects (same technologies)
-    related_projects = Project.objects.filter(
-        technology_stack__icontains=project.technology_stack.split(',')[0]
-    ).exclude(id=project.id)[:3]
+    # Related projects by technology overlap, precomputed when projects are saved.
+    related_projects = [
+        score.related
+        for score in project.related_scores.select_related('related').order_by('-score', 'related__order')[:3]
+    ]
+    tag(request, project, *related_projects)
     
     context = {
         'project': project,
         'related_projects': related_projects,
+        'social_card': card_meta(project),
+        'view_beacon_url': beacon_url(project),
     }
-    return render(request, 'portfolio/portfolio_detail.html', context)
\ No newline at end of file
+    return render(request, 'portfolio/portfolio_detail.html', context)
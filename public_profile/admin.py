@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import SpeakingEngagement, NewsletterSubscriber, PressMention
+from django.db.models.functions import Lower
+from core.admin_scaling import LargeTableAdmin
+from .models import SpeakingEngagement, NewsletterSubscriber, Publication, PressMention, Campaign, CampaignDelivery, normalize_email
 
 
 @admin.register(SpeakingEngagement)
@@ -12,17 +14,52 @@ class SpeakingEngagementAdmin(admin.ModelAdmin):
 
 
 @admin.register(NewsletterSubscriber)
-class NewsletterSubscriberAdmin(admin.ModelAdmin):
-    list_display = ['email', 'active', 'subscribed_at']
+class NewsletterSubscriberAdmin(LargeTableAdmin, admin.ModelAdmin):
+    list_display = ['email', 'active', 'subscribed_at', 'confirmed_at']
     list_filter = ['active', 'subscribed_at']
-    search_fields = ['email']
+    # Served by the unique LOWER(email) index.
+    prefix_search_fields = [Lower('email')]
+    search_help_text = "Email starting with"
     list_editable = ['active']
-    readonly_fields = ['subscribed_at']
+    readonly_fields = ['subscribed_at', 'confirmed_at', 'unsubscribed_at']
+    
+    def get_search_results(self, request, queryset, search_term):
+        return super().get_search_results(request, queryset, normalize_email(search_term))
+
+
+@admin.register(Publication)
+class PublicationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'mention_count']
+    search_fields = ['name']
+    readonly_fields = ['mention_count']
 
 
 @admin.register(PressMention)
-class PressMentionAdmin(admin.ModelAdmin):
+class PressMentionAdmin(LargeTableAdmin, admin.ModelAdmin):
     list_display = ['title', 'publication', 'published_date']
-    list_filter = ['published_date', 'publication']
+    # Filtering on the outlet FK lists the Publication table instead of
+    # running a DISTINCT over every mention.
+    list_filter = ['published_date', 'outlet']
     search_fields = ['title', 'publication', 'description']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['subject']
+    readonly_fields = ['status', 'created_at', 'started_at', 'finished_at']
+
+
+@admin.register(CampaignDelivery)
+class CampaignDeliveryAdmin(LargeTableAdmin, admin.ModelAdmin):
+    list_display = ['campaign', 'subscriber', 'status', 'attempts', 'sent_at']
+    list_filter = ['status', 'campaign']
+    prefix_search_fields = [Lower('subscriber__email')]
+    search_help_text = "Subscriber email starting with"
+    raw_id_fields = ['subscriber']
+    readonly_fields = ['attempts', 'error', 'sent_at']
+    
+    def get_search_results(self, request, queryset, search_term):
+        return super().get_search_results(request, queryset, normalize_email(search_term))
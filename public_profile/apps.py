@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PublicProfileConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "public_profile"
+
+    def ready(self):
+        from . import signals  # noqa: F401
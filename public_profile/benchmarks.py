@@ -0,0 +1,223 @@
+import datetime
+import itertools
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmark import Result, register, timed
+from .models import PressMention, Publication, SpeakingEngagement
+
+# Large enough for every cached VEVENT block of the benchmark.
+BIG_LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+        'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+    }
+}
+
+
+@register('ical_feed')
+def ical_feed(scale):
+    """Full iCalendar feed at 50k events: cold cache, warm block cache, and a conditional GET."""
+    count = int(50_000 * scale)
+    types = [value for value, _ in SpeakingEngagement._meta.get_field('event_type').choices]
+    start = datetime.date(2000, 1, 1)
+    SpeakingEngagement.objects.bulk_create(
+        [
+            SpeakingEngagement(
+                title=f'Talk {i}', slug=f'talk-{i}', event_date=start + datetime.timedelta(days=i % 9000),
+                location='Online', event_type=types[i % len(types)], description='About scaling things. ' * 5,
+            )
+            for i in range(count)
+        ],
+        batch_size=2000,
+    )
+    url = reverse('public_profile:speaking_calendar')
+    client = AsyncClient()
+
+    async def fetch(headers=None):
+        response = await client.get(url, headers=headers)
+        size = 0
+        if response.status_code == 200:
+            async for chunk in response.streaming_content:
+                size += len(chunk)
+        return response, size
+
+    def timed_fetch(label, headers=None):
+        started = time.perf_counter()
+        response, size = async_to_sync(fetch)(headers)
+        return response, Result(label, 1, time.perf_counter() - started, status=response.status_code, bytes=size, events=count)
+
+    results = []
+    with override_settings(CACHES=BIG_LOCMEM):
+        cache.clear()
+        response, result = timed_fetch('cold (serialize every VEVENT)')
+        results.append(result)
+        response, result = timed_fetch('warm (concatenate cached blocks)')
+        results.append(result)
+        _, result = timed_fetch('conditional GET (If-None-Match)', {'If-None-Match': response['ETag']})
+        results.append(result)
+    return results
+
+
+@register('press_facets')
+def press_facets(scale):
+    """Press archive at 200k mentions: facet queries, deep cursor vs OFFSET pages, cached page."""
+    from django.test import Client
+    from .views import PRESS_PER_PAGE
+
+    count = int(200_000 * scale)
+    publications = Publication.objects.bulk_create([Publication(name=f'Outlet {i}', slug=f'outlet-{i}') for i in range(300)])
+    start = datetime.date(2000, 1, 1)
+    PressMention.objects.bulk_create(
+        [
+            PressMention(
+                title=f'Mention {i}', publication=publications[i % 300].name, outlet=publications[i % 300],
+                published_date=start + datetime.timedelta(days=i % 9000),
+            )
+            for i in range(count)
+        ],
+        batch_size=5000,
+    )
+    Publication.refresh_counts([p.pk for p in publications])
+    depth = count // 2
+    last = PressMention.objects.order_by('-published_date', '-id').values_list('published_date', 'pk')[depth]
+    cursor = f'{last[0].isoformat()}.{last[1]}'
+
+    results = [
+        timed('publication facet: DISTINCT over mentions', 5, lambda: list(
+            PressMention.objects.order_by('publication').values_list('publication', flat=True).distinct())),
+        timed('publication facet: GROUP BY outlet', 5, PressMention.objects.publication_counts),
+        timed('publication facet: denormalized mention_count', 5, lambda: list(
+            Publication.objects.filter(mention_count__gt=0).order_by('-mention_count', 'name').values('name', 'slug', 'mention_count'))),
+        timed('year facet: GROUP BY year (ExtractYear)', 5, lambda: list(
+            PressMention.objects.annotate(year=ExtractYear('published_date')).values('year').annotate(count=Count('id')))),
+        timed('year facet: GROUP BY published_date, folded', 5, PressMention.objects.year_counts),
+        timed(f'page at offset {depth}: OFFSET', 5, lambda: list(
+            PressMention.objects.order_by('-published_date', '-id')[depth:depth + PRESS_PER_PAGE])),
+        timed(f'page at offset {depth}: cursor', 5, lambda: list(
+            PressMention.objects.filter(published_date__lte=last[0]).exclude(published_date=last[0], pk__gte=last[1])
+            .order_by('-published_date', '-id')[:PRESS_PER_PAGE])),
+    ]
+    client = Client()
+    url = reverse('public_profile:press_mentions')
+    cache.clear()
+    results.append(timed('GET /press/ (cold cache)', 1, lambda: client.get(url)))
+    results.append(timed('GET /press/ (cached facets and page)', 50, lambda: client.get(url)))
+    return results
+
+
+@register('admin_changelist')
+def admin_changelist(scale):
+    """Subscriber changelist at 1M rows: stock ModelAdmin vs LargeTableAdmin (counts, deep pages, search)."""
+    from django.contrib import admin
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from .models import NewsletterSubscriber
+
+    count = int(1_000_000 * scale)
+    for start in range(0, count, 50_000):
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=f'reader{i}@example.com') for i in range(start, min(start + 50_000, count))],
+            batch_size=5000,
+        )
+    user = User.objects.create_superuser('bench', 'bench@example.com', 'pw')
+    factory = RequestFactory()
+    scaled = admin.site._registry[NewsletterSubscriber]
+
+    class StockAdmin(admin.ModelAdmin):
+        list_display = scaled.list_display
+        list_filter = scaled.list_filter
+        list_editable = scaled.list_editable
+        search_fields = ['email']
+
+    stock = StockAdmin(NewsletterSubscriber, admin.site)
+
+    def changelist(label, repeat, model_admin, params=None, clear=False):
+        # Rendering the page's 100 editable rows costs the same either way;
+        # sql_ms is the part that grows with the table.
+        seconds = sql = 0.0
+        for _ in range(repeat):
+            if clear:
+                cache.clear()
+            request = factory.get('/', params or {})
+            request.user = user
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                model_admin.changelist_view(request).render()
+                seconds += time.perf_counter() - started
+            sql += sum(float(query['time']) for query in queries)
+        return Result(label, repeat, seconds, sql_ms=f'{sql / repeat * 1000:.1f}')
+
+    depth = count // 2
+    last = NewsletterSubscriber.objects.order_by('-subscribed_at', '-id').values_list('subscribed_at', 'pk')[depth - 1]
+    cursor = f'{last[0].isoformat()}.{last[1]}'
+    page = depth // scaled.list_per_page + 1
+    return [
+        changelist('first page: stock (exact COUNT twice)', 3, stock),
+        changelist('first page: large-table (count not cached)', 3, scaled, clear=True),
+        changelist('first page: large-table (count cached)', 10, scaled),
+        changelist(f'page {page}: stock (OFFSET {depth})', 3, stock, {'p': page}),
+        changelist(f'page {page}: large-table (cursor)', 10, scaled, {'after': cursor}),
+        changelist("search 'reader5': stock (LIKE '%reader5%')", 3, stock, {'q': 'reader5'}),
+        changelist("search 'reader5': large-table (email range)", 3, scaled, {'q': 'reader5'}, clear=True),
+    ]
+
+
+@register('subscriber_lookup')
+def subscriber_lookup(scale):
+    """Case-insensitive subscriber lookup at 1M rows: iexact scan vs the LOWER(email) index, and confirming a signup."""
+    import random
+
+    from .models import NewsletterSubscriber
+
+    count = int(1_000_000 * scale)
+    for start in range(0, count, 50_000):
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=f'lookup{i}@example.com') for i in range(start, min(start + 50_000, count))],
+            batch_size=5000,
+        )
+    rng = random.Random(0)
+    emails = [f'Lookup{rng.randrange(count)}@Example.com' for _ in range(1000)]
+    cycle = itertools.cycle(emails)
+    tokens = itertools.cycle([NewsletterSubscriber.confirmation_token(f'new{i}@example.com') for i in range(2000)])
+    return [
+        timed('email__iexact (scan)', 5, lambda: NewsletterSubscriber.objects.filter(email__iexact=next(cycle)).first()),
+        timed('by_email (LOWER(email) index)', 10_000, lambda: NewsletterSubscriber.objects.by_email(next(cycle)).first()),
+        timed('by_email, active exists (signup check)', 10_000, lambda: NewsletterSubscriber.objects.by_email(next(cycle)).filter(active=True).exists()),
+        timed('confirm token: verify + insert', 2000, lambda: NewsletterSubscriber.confirm(next(tokens))),
+        timed('confirm token: verify + already subscribed', 2000, lambda: NewsletterSubscriber.confirm(next(tokens))),
+    ]
+
+
+@register('campaign')
+def campaign_throughput(scale):
+    """Messages per second sending a campaign to 2000 subscribers through a local SMTP server, by pool size and relay latency."""
+    from core.testing import LocalSMTPServer
+    from .campaigns import CampaignSender
+    from .models import Campaign, NewsletterSubscriber
+
+    count = int(2000 * scale)
+    NewsletterSubscriber.objects.bulk_create(
+        [NewsletterSubscriber(email=f'campaign{i}@example.com') for i in range(count)], batch_size=5000,
+    )
+    results = []
+    for latency in (0, 0.005):
+        for connections in (1, 4, 8):
+            campaign = Campaign.objects.create(subject='Benchmark', body_text='News.\n\nUnsubscribe: {unsubscribe_url}')
+            with LocalSMTPServer(latency=latency) as server:
+                stats = CampaignSender(campaign, connections=connections, rate=0, connection_factory=server.get_connection).run()
+            results.append(Result(
+                f'{connections} connection(s), {latency * 1000:.0f}ms relay latency', stats['sent'], stats['elapsed'],
+                failed=stats['failed'], smtp_connections=server.connections,
+            ))
+    return results
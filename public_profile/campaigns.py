@@ -0,0 +1,217 @@
+"""Batched newsletter delivery over a pool of reused SMTP connections."""
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Campaign, CampaignDelivery, NewsletterSubscriber
+
+
+class RateLimiter:
+    """Spread sends evenly so all worker threads together stay under ``rate`` per second."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def iter_subscriber_batches(batch_size):
+    """Yield ``(pk, email)`` batches of active subscribers using a keyset cursor."""
+    last_pk = 0
+    while True:
+        batch = list(
+            NewsletterSubscriber.objects.filter(active=True, pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'email')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def unsubscribe_url(subscriber):
+    """Absolute unsubscribe URL for a subscriber."""
+    path = reverse('public_profile:newsletter_unsubscribe', args=[subscriber.unsubscribe_token()])
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def confirmation_url(email):
+    """Absolute double opt-in URL for an address."""
+    path = reverse('public_profile:newsletter_confirm', args=[NewsletterSubscriber.confirmation_token(email)])
+    return settings.SITE_URL.rstrip('/') + path
+
+
+class CampaignSender:
+    """
+    Send a campaign to every active subscriber.
+
+    The main thread streams subscribers, records delivery state and owns all
+    database access; worker threads only build and send messages, each over
+    its own SMTP connection that stays open for the whole run.
+    """
+
+    def __init__(self, campaign, connections=None, batch_size=None, rate=None, connection_factory=None):
+        self.campaign = campaign
+        self.connections = connections or settings.NEWSLETTER_SMTP_CONNECTIONS
+        self.batch_size = batch_size or settings.NEWSLETTER_BATCH_SIZE
+        self.limiter = RateLimiter(rate if rate is not None else settings.NEWSLETTER_MAX_RATE)
+        self.connection_factory = connection_factory or mail.get_connection
+        self.from_email = settings.NEWSLETTER_FROM_EMAIL or settings.DEFAULT_FROM_EMAIL
+        self.sent = 0
+        self.failed = 0
+
+    def run(self):
+        """Deliver all pending messages and return a stats dict."""
+        started = time.monotonic()
+        campaign = self.campaign
+        campaign.status = Campaign.STATUS_SENDING
+        campaign.started_at = campaign.started_at or timezone.now()
+        campaign.save(update_fields=['status', 'started_at'])
+
+        work = queue.Queue(maxsize=self.batch_size * 2)
+        results = queue.Queue()
+        workers = [
+            threading.Thread(target=self._worker, args=(work, results), daemon=True)
+            for _ in range(self.connections)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for batch in iter_subscriber_batches(self.batch_size):
+                for item in self._prepare_batch(batch):
+                    work.put(item)
+                self._record(results)
+        finally:
+            for _ in workers:
+                work.put(None)
+            for worker in workers:
+                worker.join()
+            self._record(results)
+
+        # Deliveries to subscribers who have since unsubscribed are never
+        # retried, so they don't hold the campaign open.
+        remaining = (
+            campaign.deliveries.filter(subscriber__active=True)
+            .exclude(status=CampaignDelivery.STATUS_SENT)
+            .exists()
+        )
+        if not remaining:
+            campaign.status = Campaign.STATUS_SENT
+            campaign.finished_at = timezone.now()
+            campaign.save(update_fields=['status', 'finished_at'])
+
+        elapsed = time.monotonic() - started
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'elapsed': elapsed,
+            'rate': self.sent / elapsed if elapsed else 0.0,
+        }
+
+    def _prepare_batch(self, batch):
+        """Create missing delivery rows and return the ones not yet sent."""
+        emails = dict(batch)
+        CampaignDelivery.objects.bulk_create(
+            [CampaignDelivery(campaign=self.campaign, subscriber_id=pk) for pk in emails],
+            ignore_conflicts=True,
+        )
+        pending = (
+            CampaignDelivery.objects.filter(campaign=self.campaign, subscriber_id__in=list(emails))
+            .exclude(status=CampaignDelivery.STATUS_SENT)
+            .values_list('pk', 'subscriber_id')
+        )
+        return [(delivery_pk, subscriber_pk, emails[subscriber_pk]) for delivery_pk, subscriber_pk in pending]
+
+    def _record(self, results):
+        """Flush finished deliveries from the worker threads to the database."""
+        sent = []
+        failed = {}
+        while True:
+            try:
+                delivery_pk, error = results.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                sent.append(delivery_pk)
+            else:
+                failed.setdefault(error, []).append(delivery_pk)
+
+        if sent:
+            CampaignDelivery.objects.filter(pk__in=sent).update(
+                status=CampaignDelivery.STATUS_SENT,
+                sent_at=timezone.now(),
+                attempts=F('attempts') + 1,
+                error='',
+            )
+            self.sent += len(sent)
+        for error, pks in failed.items():
+            CampaignDelivery.objects.filter(pk__in=pks).update(
+                status=CampaignDelivery.STATUS_FAILED,
+                attempts=F('attempts') + 1,
+                error=error,
+            )
+            self.failed += len(pks)
+
+    def _worker(self, work, results):
+        connection = self.connection_factory()
+        try:
+            while True:
+                item = work.get()
+                if item is None:
+                    break
+                delivery_pk, subscriber_pk, email = item
+                self.limiter.wait()
+                try:
+                    message = self._build_message(subscriber_pk, email, connection)
+                    # Open explicitly so send_messages() keeps the connection alive.
+                    connection.open()
+                    connection.send_messages([message])
+                except Exception as e:
+                    results.put((delivery_pk, str(e)[:300] or e.__class__.__name__))
+                    # Drop the broken connection; the next send reopens it.
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                else:
+                    results.put((delivery_pk, None))
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _build_message(self, subscriber_pk, email, connection):
+        url = unsubscribe_url(NewsletterSubscriber(pk=subscriber_pk, email=email))
+        message = mail.EmailMultiAlternatives(
+            subject=self.campaign.subject,
+            body=self.campaign.body_text.replace('{unsubscribe_url}', url),
+            from_email=self.from_email,
+            to=[email],
+            connection=connection,
+            headers={
+                'List-Unsubscribe': f'<{url}>',
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+        )
+        if self.campaign.body_html:
+            message.attach_alternative(self.campaign.body_html.replace('{unsubscribe_url}', url), 'text/html')
+        return message
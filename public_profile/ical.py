@@ -0,0 +1,115 @@
+"""
+iCalendar (RFC 5545) feeds for speaking engagements.
+
+Each engagement's VEVENT block is rendered once and cached under its
+primary key and ``updated_at``, so a feed is assembled by concatenating
+cached blocks; only new or edited events are serialized again. Feeds are
+streamed in keyset-paginated chunks.
+"""
+import datetime
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import SpeakingEngagement
+
+CHUNK_SIZE = 1000
+CRLF = '\r\n'
+
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets without splitting a UTF-8 character."""
+    if len(line.encode()) <= 75:
+        return line + CRLF
+    parts, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append(current)
+            # Continuation lines start with a space, which counts towards the limit.
+            current, size = ' ', 1
+        current += char
+        size += width
+    parts.append(current)
+    return CRLF.join(parts) + CRLF
+
+
+def block_key(pk, updated_at):
+    return f'ical:vevent:{pk}:{updated_at.timestamp()}'
+
+
+def render_vevent(engagement):
+    """Serialize one engagement as an all-day VEVENT block."""
+    host = urlparse(settings.SITE_URL).hostname or 'localhost'
+    description = engagement.description
+    for label, url in (('Slides', engagement.slides_url), ('Video', engagement.video_url)):
+        if url:
+            description += f'\n{label}: {url}'
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:speaking-{engagement.pk}@{host}',
+        f"DTSTAMP:{engagement.updated_at.astimezone(datetime.timezone.utc):%Y%m%dT%H%M%SZ}",
+        f'DTSTART;VALUE=DATE:{engagement.event_date:%Y%m%d}',
+        f'DTEND;VALUE=DATE:{engagement.event_date + datetime.timedelta(days=1):%Y%m%d}',
+        f'SUMMARY:{escape_text(engagement.title)}',
+        f'LOCATION:{escape_text(engagement.location)}',
+        f'CATEGORIES:{escape_text(engagement.get_event_type_display())}',
+    ]
+    if description.strip():
+        lines.append(f'DESCRIPTION:{escape_text(description.strip())}')
+    if engagement.event_url:
+        lines.append(f'URL:{engagement.event_url}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def calendar_header(name):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{urlparse(settings.SITE_URL).hostname or "localhost"}//Speaking Engagements//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+async def astream_calendar(queryset, name):
+    """Yield the feed for ``queryset`` chunk by chunk, reusing cached VEVENT blocks."""
+    yield calendar_header(name)
+    last_pk = 0
+    while True:
+        rows = [
+            row async for row in queryset.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'updated_at')[:CHUNK_SIZE]
+        ]
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        keys = {pk: block_key(pk, updated_at) for pk, updated_at in rows}
+        # BaseCache.aget_many() awaits one thread hop per key; fetch the chunk in a single hop.
+        blocks = await sync_to_async(cache.get_many)(list(keys.values()))
+        missing = [pk for pk, key in keys.items() if key not in blocks]
+        if missing:
+            fresh = {}
+            async for engagement in SpeakingEngagement.objects.filter(pk__in=missing):
+                fresh[keys[engagement.pk]] = render_vevent(engagement)
+            await sync_to_async(cache.set_many)(fresh, settings.ICAL_BLOCK_CACHE_TIMEOUT)
+            blocks.update(fresh)
+        yield ''.join(blocks[keys[pk]] for pk, _ in rows if keys[pk] in blocks)
+    yield 'END:VCALENDAR' + CRLF
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from public_profile import mediakit
+
+
+class Command(BaseCommand):
+    help = 'Build any media kit bundles whose inputs changed since they were last built'
+
+    def handle(self, *args, **options):
+        for size in mediakit.SIZES:
+            started = time.monotonic()
+            path, _ = mediakit.bundle_path(size)
+            self.stdout.write(
+                f'{size:>8}: {path.name} ({path.stat().st_size / 1024:.1f} KiB, {time.monotonic() - started:.2f}s)'
+            )
+        self.stdout.write(self.style.SUCCESS('Media kit bundles are up to date.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from public_profile.campaigns import CampaignSender
+from public_profile.models import Campaign
+
+
+class Command(BaseCommand):
+    help = 'Send a newsletter campaign to all active subscribers, resuming any interrupted send'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--connections', type=int, help='Number of SMTP connections (one per worker thread)')
+        parser.add_argument('--batch-size', type=int, help='Subscribers fetched per keyset page')
+        parser.add_argument('--rate', type=float, help='Maximum messages per second across all connections (0 = unlimited)')
+
+    def handle(self, *args, **options):
+        try:
+            campaign = Campaign.objects.get(pk=options['campaign_id'])
+        except Campaign.DoesNotExist:
+            raise CommandError(f"Campaign {options['campaign_id']} does not exist")
+        
+        if campaign.status == Campaign.STATUS_SENT:
+            self.stdout.write(f'Campaign "{campaign}" has already been sent.')
+            return
+        
+        self.stdout.write(f'Sending campaign "{campaign}"...')
+        sender = CampaignSender(
+            campaign,
+            connections=options['connections'],
+            batch_size=options['batch_size'],
+            rate=options['rate'],
+        )
+        stats = sender.run()
+        
+        self.stdout.write(
+            f"Sent {stats['sent']} messages ({stats['failed']} failed) "
+            f"in {stats['elapsed']:.2f}s - {stats['rate']:.1f} msg/s"
+        )
+        if stats['failed']:
+            self.stdout.write(self.style.WARNING('Some deliveries failed; run the command again to retry them.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Campaign delivered.'))
@@ -0,0 +1,152 @@
+"""
+Downloadable media-kit bundles.
+
+A bundle is a ZIP of the headshots listed in ``MEDIA_KIT_HEADSHOTS``
+(scaled to the bundle's size), the short and long bios and a CSV summary
+of press mentions. Archives are written to ``MEDIA_KIT_ROOT`` under a hash
+of those inputs, so a bundle is built once and served from disk until a
+headshot, a bio or the press list changes. Entries are streamed into the
+archive file one at a time and images are stored rather than deflated
+(they are already compressed), so building never holds the archive, or
+more than one image, in memory.
+"""
+import csv
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import render_to_string
+
+from core.cache import cached, versioned_key
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; None ships the files as they are.
+SIZES = {'web': 1024, 'print': 3000, 'original': None}
+BIOS = {'short': 'public_profile/bios/short.txt', 'long': 'public_profile/bios/long.txt'}
+# Bump when the archive layout changes so existing bundles are rebuilt.
+FORMAT_VERSION = '1'
+
+_file_digests = {}
+
+
+def bios():
+    """The bios as lists of paragraphs, for the media kit page."""
+    return {
+        name: [p.strip() for p in render_to_string(template).split('\n\n') if p.strip()]
+        for name, template in BIOS.items()
+    }
+
+
+def press_summary():
+    """Press mentions as CSV, newest first, cached until a mention changes."""
+    def compute():
+        from .models import PressMention
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['date', 'publication', 'title', 'url'])
+        for row in PressMention.objects.values_list('published_date', 'publication', 'title', 'url').iterator():
+            writer.writerow(row)
+        return out.getvalue()
+
+    return cached(versioned_key('press', 'media-kit-csv'), compute, settings.PRESS_CACHE_TIMEOUT)
+
+
+def _file_digest(path):
+    # Headshots are hashed once per process per (size, mtime).
+    stat = os.stat(path)
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(key)
+    if digest is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest = _file_digests[key] = digest.hexdigest()
+    return digest
+
+
+def _headshots():
+    paths = []
+    for name in settings.MEDIA_KIT_HEADSHOTS:
+        path = finders.find(name)
+        if path is None:
+            logger.warning('Media kit headshot %s not found', name)
+        else:
+            paths.append(Path(path))
+    return paths
+
+
+def _inputs():
+    texts = {f'bio-{name}.txt': render_to_string(template) for name, template in BIOS.items()}
+    texts['press-mentions.csv'] = press_summary()
+    return _headshots(), texts
+
+
+def bundle_digest(size, headshots, texts):
+    digest = hashlib.sha256(f'{FORMAT_VERSION}:{size}:{SIZES[size]}'.encode())
+    for path in headshots:
+        digest.update(f'\0{path.name}:{_file_digest(path)}'.encode())
+    for name, text in sorted(texts.items()):
+        digest.update(f'\0{name}\0{text}'.encode())
+    return digest.hexdigest()
+
+
+def _write_image(archive, path, max_edge):
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((max_edge, max_edge))
+            image = image.convert('RGB')
+    except (UnidentifiedImageError, OSError):
+        logger.warning('Media kit headshot %s is not a readable image; skipped', path)
+        return
+    info = zipfile.ZipInfo(f'headshots/{path.stem}-{max_edge}.jpg', date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    with archive.open(info, 'w') as entry:
+        image.save(entry, 'JPEG', quality=90, optimize=True)
+
+
+def write_bundle(dest, size, headshots, texts):
+    """Stream the bundle for ``size`` into the open binary file ``dest``."""
+    with zipfile.ZipFile(dest, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, text in texts.items():
+            archive.writestr(name, text)
+        for path in headshots:
+            if SIZES[size] is None:
+                archive.write(path, f'headshots/{path.name}', compress_type=zipfile.ZIP_STORED)
+            else:
+                _write_image(archive, path, SIZES[size])
+
+
+def bundle_path(size):
+    """Return ``(path, digest)`` of the current bundle for ``size``, building it if its inputs changed."""
+    headshots, texts = _inputs()
+    digest = bundle_digest(size, headshots, texts)
+    root = Path(settings.MEDIA_KIT_ROOT)
+    path = root / f'media-kit-{size}-{digest[:20]}.zip'
+    if path.exists():
+        return path, digest
+
+    root.mkdir(parents=True, exist_ok=True)
+    # Build beside the final name and rename, so a concurrent request never
+    # sees a partial archive; two builders simply produce the same file.
+    with tempfile.NamedTemporaryFile(dir=root, prefix=f'.{size}-', suffix='.zip', delete=False) as tmp:
+        try:
+            write_bundle(tmp, size, headshots, texts)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+    for old in root.glob(f'media-kit-{size}-*.zip'):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path, digest
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('body_text', models.TextField(help_text='Plain text body. {unsubscribe_url} is replaced per recipient.')),
+                ('body_html', models.TextField(blank=True, help_text='Optional HTML body. {unsubscribe_url} is replaced per recipient.')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('sending', 'Sending'), ('sent', 'Sent')], default='draft', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Campaign',
+                'verbose_name_plural': 'Campaigns',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=300)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='public_profile.campaign')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='public_profile.newslettersubscriber')),
+            ],
+            options={
+                'verbose_name': 'Campaign Delivery',
+                'verbose_name_plural': 'Campaign Deliveries',
+                'ordering': ['campaign', 'subscriber'],
+                'indexes': [models.Index(fields=['campaign', 'status'], name='public_prof_campaig_a42510_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'subscriber'), name='unique_campaign_subscriber')],
+            },
+        ),
+    ]
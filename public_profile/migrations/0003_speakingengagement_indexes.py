@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0002_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='speakingengagement',
+            index=models.Index(fields=['event_type', 'event_date'], name='public_prof_event_t_0ad330_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='speakingengagement',
+            index=models.Index(fields=['event_date'], name='public_prof_event_d_8a61a8_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def link_publications(apps, schema_editor):
+    """Create a Publication per distinct name and point existing mentions at it."""
+    Publication = apps.get_model('public_profile', 'Publication')
+    PressMention = apps.get_model('public_profile', 'PressMention')
+    counts = PressMention.objects.order_by().values('publication').annotate(count=Count('id'))
+    slugs = set()
+    for row in counts.iterator():
+        name = row['publication'].strip()
+        base = slugify(name)[:190] or 'publication'
+        slug, n = base, 1
+        while slug in slugs:
+            n += 1
+            slug = f'{base}-{n}'
+        slugs.add(slug)
+        publication, created = Publication.objects.get_or_create(name=name, defaults={'slug': slug})
+        PressMention.objects.filter(publication=row['publication']).update(publication=name, outlet=publication)
+        Publication.objects.filter(pk=publication.pk).update(
+            mention_count=PressMention.objects.filter(outlet=publication).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0003_speakingengagement_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='pressmention',
+            options={'ordering': ['-published_date', '-id'], 'verbose_name': 'Press Mention', 'verbose_name_plural': 'Press Mentions'},
+        ),
+        migrations.CreateModel(
+            name='Publication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('slug', models.SlugField(blank=True, max_length=200, unique=True)),
+                ('mention_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-mention_count', 'name'], name='public_prof_mention_48d805_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='pressmention',
+            name='outlet',
+            field=models.ForeignKey(editable=False, help_text='Resolved from the publication name on save.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mentions', to='public_profile.publication'),
+        ),
+        migrations.RunPython(link_publications, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pressmention',
+            index=models.Index(fields=['outlet', '-published_date', '-id'], name='public_prof_outlet__9ff1c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pressmention',
+            index=models.Index(fields=['-published_date', '-id'], name='public_prof_publish_738177_idx'),
+        ),
+    ]
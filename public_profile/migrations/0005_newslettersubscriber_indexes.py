@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0004_publications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['-subscribed_at', '-id'], name='public_prof_subscri_951f6b_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0005_newslettersubscriber_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newslettersubscriber',
+            name='confirmed_at',
+            field=models.DateTimeField(blank=True, help_text='When the address was last confirmed by double opt-in', null=True),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:49
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def normalize_email(email):
+    # Frozen copy of public_profile.models.normalize_email. Done in Python
+    # rather than with SQL LOWER/TRIM, which on SQLite only fold ASCII and
+    # only strip spaces, so stored addresses match what by_email looks up.
+    return (email or '').strip().lower()
+
+
+def dedupe_emails(apps, schema_editor):
+    """
+    Merge subscribers whose addresses normalize to the same one into the
+    oldest of them, then store every address normalized. Works in batches,
+    each its own transaction, so the table is never locked for the whole
+    migration; an interrupted run can be run again.
+    """
+    Subscriber = apps.get_model('public_profile', 'NewsletterSubscriber')
+    Delivery = apps.get_model('public_profile', 'CampaignDelivery')
+
+    # One pass over (pk, email) to find the groups; keeps one pk per address.
+    groups = {}
+    rows = Subscriber.objects.order_by('pk').values_list('pk', 'email')
+    for pk, email in rows.iterator(chunk_size=BATCH_SIZE * 10):
+        groups.setdefault(normalize_email(email), []).append(pk)
+    duplicated = [pks for pks in groups.values() if len(pks) > 1]
+    del groups
+
+    for start in range(0, len(duplicated), BATCH_SIZE):
+        with transaction.atomic():
+            for pks in duplicated[start:start + BATCH_SIZE]:
+                keep, *duplicates = Subscriber.objects.filter(pk__in=pks).order_by('pk')
+                ids = [row.pk for row in duplicates]
+                # Keep one delivery per campaign: move those of campaigns the
+                # survivor hasn't got yet, one duplicate at a time as two of
+                # them may share a campaign. The rest go with the duplicates.
+                received = Delivery.objects.filter(subscriber=keep).values('campaign')
+                for pk in ids:
+                    Delivery.objects.filter(subscriber=pk).exclude(campaign__in=received).update(subscriber=keep)
+                confirmed = [row.confirmed_at for row in duplicates + [keep] if row.confirmed_at]
+                Subscriber.objects.filter(pk=keep.pk).update(
+                    active=any(row.active for row in duplicates + [keep]),
+                    subscribed_at=min(row.subscribed_at for row in duplicates + [keep]),
+                    confirmed_at=max(confirmed) if confirmed else None,
+                )
+                Subscriber.objects.filter(pk__in=ids).delete()
+
+    last_pk = 0
+    while True:
+        batch = list(Subscriber.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'email')[:BATCH_SIZE * 10])
+        if not batch:
+            break
+        changed = []
+        for row in batch:
+            email = normalize_email(row.email)
+            if email != row.email:
+                row.email = email
+                changed.append(row)
+        Subscriber.objects.bulk_update(changed, ['email'], batch_size=BATCH_SIZE)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    # Batches commit as they go; see dedupe_emails.
+    atomic = False
+
+    dependencies = [
+        ('public_profile', '0006_newslettersubscriber_confirmed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:49
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0007_newslettersubscriber_dedupe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newslettersubscriber',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddConstraint(
+            model_name='newslettersubscriber',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='newsletter_subscriber_email_ci_unique'),
+        ),
+    ]
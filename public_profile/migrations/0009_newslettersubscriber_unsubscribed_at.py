@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:04
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_unsubscribed_at(apps, schema_editor):
+    """
+    When existing subscribers unsubscribed is unknown; count their retention
+    from now rather than deleting them on the next run.
+    """
+    Subscriber = apps.get_model('public_profile', 'NewsletterSubscriber')
+    Subscriber.objects.filter(active=False, unsubscribed_at__isnull=True).update(unsubscribed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_profile', '0008_newslettersubscriber_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newslettersubscriber',
+            name='unsubscribed_at',
+            field=models.DateTimeField(blank=True, help_text='When the subscriber last became inactive; retention counts from here', null=True),
+        ),
+        migrations.RunPython(backfill_unsubscribed_at, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,35 @@
-from django.db import models
+import datetime
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, ExtractYear, Lower
+from django.db.models.lookups import Exact
+from django.utils import timezone
 from django.utils.text import slugify
 
 
+class SpeakingEngagementQuerySet(models.QuerySet):
+    def upcoming(self, today):
+        """Engagements on or after ``today``, soonest first."""
+        return self.filter(event_date__gte=today).order_by('event_date')
+    
+    def past(self, today):
+        """Engagements before ``today``, most recent first."""
+        return self.filter(event_date__lt=today).order_by('-event_date')
+    
+    def year_counts(self):
+        """Number of engagements per year, from a single GROUP BY query."""
+        return (
+            self.annotate(year=ExtractYear('event_date'))
+            .values('year')
+            .annotate(count=Count('id'))
+            .order_by('-year')
+        )
+
+
 class SpeakingEngagement(models.Model):
     """Model for speaking engagements and events."""
     title = models.CharField(max_length=200)
@@ -27,10 +55,16 @@ class SpeakingEngagement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SpeakingEngagementQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-event_date']
         verbose_name = "Speaking Engagement"
         verbose_name_plural = "Speaking Engagements"
+        indexes = [
+            models.Index(fields=['event_type', 'event_date']),
+            models.Index(fields=['event_date']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -41,34 +75,291 @@ class SpeakingEngagement(models.Model):
         return f"{self.title} - {self.location}"
 
 
+UNSUBSCRIBE_SALT = 'public_profile.newsletter.unsubscribe'
+CONFIRM_SALT = 'public_profile.newsletter.confirm'
+
+
+def normalize_email(email):
+    """The form an address is stored and looked up in: trimmed and lower case."""
+    return (email or '').strip().lower()
+
+
+class NewsletterSubscriberQuerySet(models.QuerySet):
+    def by_email(self, email):
+        """Case-insensitive match, served by the unique ``LOWER(email)`` index."""
+        return self.filter(Exact(Lower('email'), normalize_email(email)))
+
+
 class NewsletterSubscriber(models.Model):
-    """Model for newsletter subscribers."""
-    email = models.EmailField(unique=True)
+    """
+    Model for newsletter subscribers.
+    
+    Signing up creates no row: it emails a signed confirmation link (double
+    opt-in), and the subscriber is created, or reactivated, when it is
+    followed.
+    """
+    email = models.EmailField()
     subscribed_at = models.DateTimeField(auto_now_add=True)
     active = models.BooleanField(default=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True, help_text="When the address was last confirmed by double opt-in")
+    unsubscribed_at = models.DateTimeField(null=True, blank=True, help_text="When the subscriber last became inactive; retention counts from here")
+    
+    objects = NewsletterSubscriberQuerySet.as_manager()
     
     class Meta:
         ordering = ['-subscribed_at']
         verbose_name = "Newsletter Subscriber"
         verbose_name_plural = "Newsletter Subscribers"
+        constraints = [
+            # Emails are normalized on save; this also catches writes that
+            # bypass it (bulk_create, update, raw SQL).
+            models.UniqueConstraint(Lower('email'), name='newsletter_subscriber_email_ci_unique'),
+        ]
+        indexes = [
+            # Keyset pages of the admin changelist.
+            models.Index(fields=['-subscribed_at', '-id']),
+        ]
     
     def __str__(self):
         return self.email
+    
+    def clean(self):
+        self.email = normalize_email(self.email)
+    
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        # Covers every way active is flipped: the unsubscribe link, the
+        # admin's list_editable and a reconfirmation.
+        if self.active:
+            self.unsubscribed_at = None
+        elif self.unsubscribed_at is None:
+            self.unsubscribed_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'active' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'unsubscribed_at'}
+        super().save(*args, **kwargs)
+    
+    def unsubscribe_token(self):
+        """Return a signed, stateless token identifying this subscriber."""
+        return signing.dumps(self.pk, salt=UNSUBSCRIBE_SALT)
+    
+    @classmethod
+    def from_unsubscribe_token(cls, token):
+        """Resolve an unsubscribe token, or return None if it is invalid."""
+        try:
+            pk = signing.loads(token, salt=UNSUBSCRIBE_SALT)
+        except signing.BadSignature:
+            return None
+        return cls.objects.filter(pk=pk).first()
+    
+    @staticmethod
+    def confirmation_token(email):
+        """Return a signed token carrying the address and when it was issued."""
+        return signing.dumps([normalize_email(email), int(time.time())], salt=CONFIRM_SALT, compress=True)
+    
+    @staticmethod
+    def read_confirmation_token(token):
+        """Return ``(email, issued_at)`` from a confirmation token, or None if it is invalid or expired."""
+        try:
+            email, issued = signing.loads(token, salt=CONFIRM_SALT, max_age=settings.NEWSLETTER_CONFIRM_MAX_AGE)
+        except (signing.BadSignature, ValueError):
+            return None
+        return email, datetime.datetime.fromtimestamp(issued, tz=datetime.timezone.utc)
+    
+    @classmethod
+    def confirm(cls, token):
+        """
+        Subscribe the address in a confirmation token. Returns ``(subscriber,
+        confirmed)``, or ``(None, False)`` for an invalid or expired token.
+        
+        A link followed again after unsubscribing does not resubscribe: only
+        a token issued after the last confirmation reactivates.
+        """
+        payload = cls.read_confirmation_token(token)
+        if payload is None:
+            return None, False
+        email, issued_at = payload
+        now = timezone.now()
+        subscriber = cls.objects.by_email(email).first()
+        if subscriber is None:
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(email=email, active=True, confirmed_at=now), True
+            except IntegrityError:
+                # The link was followed twice at once.
+                return cls.objects.by_email(email).first(), False
+        if subscriber.active or (subscriber.confirmed_at and subscriber.confirmed_at >= issued_at):
+            return subscriber, False
+        subscriber.active, subscriber.confirmed_at = True, now
+        subscriber.save(update_fields=['active', 'confirmed_at'])
+        return subscriber, True
+
+
+class Publication(models.Model):
+    """
+    Outlet that press mentions appear in.
+
+    ``mention_count`` is denormalized from PressMention so the publication
+    facet is a read of this small table rather than a scan of every mention.
+    """
+    name = models.CharField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=200, unique=True, blank=True)
+    mention_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-mention_count', 'name']),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            base = slugify(self.name)[:190] or 'publication'
+            slug, n = base, 1
+            while Publication.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+                n += 1
+                slug = f'{base}-{n}'
+            self.slug = slug
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def refresh_counts(cls, pks):
+        """Recount the mentions of the given publications in one UPDATE."""
+        pks = [pk for pk in pks if pk is not None]
+        if not pks:
+            return
+        mentions = (
+            PressMention.objects.filter(outlet=OuterRef('pk'))
+            .order_by()
+            .values('outlet')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        cls.objects.filter(pk__in=pks).update(mention_count=Coalesce(Subquery(mentions), 0))
+
+
+class PressMentionQuerySet(models.QuerySet):
+    def year_counts(self):
+        """
+        Number of mentions per year, newest first.
+
+        Grouping on the indexed date column and folding days into years here
+        avoids evaluating a year extraction for every row in the database.
+        """
+        counts = {}
+        rows = self.order_by().values_list('published_date').annotate(count=Count('id'))
+        for published_date, count in rows:
+            counts[published_date.year] = counts.get(published_date.year, 0) + count
+        return [{'year': year, 'count': counts[year]} for year in sorted(counts, reverse=True)]
+    
+    def publication_counts(self):
+        """Number of mentions per publication from one GROUP BY on the outlet key, largest first."""
+        counts = dict(self.order_by().values_list('outlet').annotate(count=Count('id')))
+        publications = Publication.objects.filter(pk__in=[pk for pk in counts if pk is not None]).values('pk', 'name', 'slug')
+        rows = [{'name': p['name'], 'slug': p['slug'], 'count': counts[p['pk']]} for p in publications]
+        return sorted(rows, key=lambda row: (-row['count'], row['name']))
 
 
 class PressMention(models.Model):
     """Model for press mentions and media coverage."""
     title = models.CharField(max_length=200)
     publication = models.CharField(max_length=200)
+    outlet = models.ForeignKey(
+        Publication, on_delete=models.PROTECT, null=True, editable=False, related_name='mentions',
+        help_text="Resolved from the publication name on save.",
+    )
     url = models.URLField(blank=True)
     published_date = models.DateField()
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = PressMentionQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-published_date']
+        ordering = ['-published_date', '-id']
         verbose_name = "Press Mention"
         verbose_name_plural = "Press Mentions"
+        indexes = [
+            models.Index(fields=['outlet', '-published_date', '-id']),
+            models.Index(fields=['-published_date', '-id']),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.publication = self.publication.strip()
+        previous = self.outlet_id
+        self.outlet, _ = Publication.objects.get_or_create(name=self.publication)
+        super().save(*args, **kwargs)
+        Publication.refresh_counts({previous, self.outlet_id})
+    
+    def __str__(self):
+        return f"{self.title} - {self.publication}"
+
+
+class Campaign(models.Model):
+    """Model for newsletter campaigns sent to active subscribers."""
+    STATUS_DRAFT = 'draft'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    
+    subject = models.CharField(max_length=200)
+    body_text = models.TextField(help_text="Plain text body. {unsubscribe_url} is replaced per recipient.")
+    body_html = models.TextField(blank=True, help_text="Optional HTML body. {unsubscribe_url} is replaced per recipient.")
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (STATUS_DRAFT, 'Draft'),
+            (STATUS_SENDING, 'Sending'),
+            (STATUS_SENT, 'Sent'),
+        ],
+        default=STATUS_DRAFT
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Campaign"
+        verbose_name_plural = "Campaigns"
+    
+    def __str__(self):
+        return self.subject
+
+
+class CampaignDelivery(models.Model):
+    """Per-recipient delivery state, used to resume interrupted sends."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='deliveries')
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_SENT, 'Sent'),
+            (STATUS_FAILED, 'Failed'),
+        ],
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=300, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['campaign', 'subscriber']
+        verbose_name = "Campaign Delivery"
+        verbose_name_plural = "Campaign Deliveries"
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'subscriber'], name='unique_campaign_subscriber'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status']),
+        ]
     
     def __str__(self):
-        return f"{self.title} - {self.publication}"
\ No newline at end of file
+        return f"{self.campaign} -> {self.subscriber} ({self.status})"
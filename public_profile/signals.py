@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate
+from core.edge import purge_instance_on_commit
+from .models import PressMention, Publication, SpeakingEngagement
+
+
+@receiver([post_save, post_delete], sender=SpeakingEngagement)
+def invalidate_speaking_cache(sender, **kwargs):
+    invalidate('speaking')
+
+
+@receiver(post_save, sender=PressMention)
+def invalidate_press_cache(sender, **kwargs):
+    invalidate('press')
+
+
+@receiver(post_delete, sender=PressMention)
+def press_mention_deleted(sender, instance, **kwargs):
+    Publication.refresh_counts([instance.outlet_id])
+    invalidate('press')
+
+
+@receiver(post_save, sender=Publication)
+def publication_renamed(sender, instance, created, **kwargs):
+    if not created:
+        # Keep the denormalized name on each mention in step with the outlet.
+        PressMention.objects.filter(outlet=instance).exclude(publication=instance.name).update(publication=instance.name)
+        invalidate('press')
+
+
+@receiver([post_save, post_delete], sender=SpeakingEngagement)
+@receiver([post_save, post_delete], sender=PressMention)
+@receiver([post_save, post_delete], sender=Publication)
+def purge_edge_cache(sender, instance, **kwargs):
+    purge_instance_on_commit(sender, instance)
@@ -0,0 +1,23 @@
+"""Deferred work for the public_profile app, run by ``manage.py run_worker``."""
+from django.conf import settings
+from core.async_mail import asend_mail
+from core.taskqueue import task
+from .campaigns import confirmation_url
+
+
+@task
+async def send_newsletter_confirmation(email):
+    """Send the double opt-in link; the subscriber is created when it is followed."""
+    days = settings.NEWSLETTER_CONFIRM_MAX_AGE // 86400
+    await asend_mail(
+        subject="Confirm your newsletter subscription",
+        message=f"""
+Thanks for signing up! Please confirm your subscription by opening this link:
+
+{confirmation_url(email)}
+
+The link is valid for {days} day{'s' if days != 1 else ''}. If you didn't sign up, ignore this email and you won't hear from us again.
+        """,
+        from_email=settings.NEWSLETTER_FROM_EMAIL or settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[email],
+    )
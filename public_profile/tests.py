@@ -1,3 +1,544 @@
-from django.test import TestCase
+import datetime
+import io
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core.testing import LocalSMTPServer, run_tasks
+from . import ical, mediakit
+from .campaigns import CampaignSender
+from .models import NewsletterSubscriber, Campaign, CampaignDelivery, PressMention, Publication, SpeakingEngagement
+from .views import PRESS_PER_PAGE, _seconds_until_passed
+
+
+class CampaignSenderTests(TestCase):
+    def setUp(self):
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=f'reader{i}@example.com') for i in range(25)]
+            + [NewsletterSubscriber(email=f'gone{i}@example.com', active=False) for i in range(3)]
+        )
+        self.campaign = Campaign.objects.create(
+            subject='Hello',
+            body_text='News.\n\nUnsubscribe: {unsubscribe_url}',
+        )
+
+    def test_sends_to_active_subscribers_over_reused_connections(self):
+        with LocalSMTPServer() as server:
+            stats = CampaignSender(
+                self.campaign, connections=3, batch_size=7, rate=0,
+                connection_factory=server.get_connection,
+            ).run()
+
+        self.assertEqual(stats['sent'], 25)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(len(server.messages), 25)
+        self.assertLessEqual(server.connections, 3)
+        self.assertIn(b'/profile/newsletter/unsubscribe/', server.messages[0][2])
+        self.assertFalse(self.campaign.deliveries.exclude(status=CampaignDelivery.STATUS_SENT).exists())
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.STATUS_SENT)
+
+    def test_resume_skips_already_sent_deliveries(self):
+        done = NewsletterSubscriber.objects.filter(active=True).order_by('pk')[:10]
+        CampaignDelivery.objects.bulk_create([
+            CampaignDelivery(campaign=self.campaign, subscriber=s, status=CampaignDelivery.STATUS_SENT)
+            for s in done
+        ])
+        with LocalSMTPServer() as server:
+            stats = CampaignSender(
+                self.campaign, connections=2, batch_size=10, rate=0,
+                connection_factory=server.get_connection,
+            ).run()
+
+        self.assertEqual(stats['sent'], 15)
+        self.assertEqual(len(server.messages), 15)
+
+    def test_failed_delivery_to_an_unsubscriber_does_not_hold_the_campaign_open(self):
+        subscriber = NewsletterSubscriber.objects.filter(active=True).first()
+        CampaignDelivery.objects.create(campaign=self.campaign, subscriber=subscriber, status=CampaignDelivery.STATUS_FAILED)
+        subscriber.active = False
+        subscriber.save()
+        with LocalSMTPServer() as server:
+            stats = CampaignSender(self.campaign, connections=2, rate=0, connection_factory=server.get_connection).run()
+
+        self.assertEqual(stats['sent'], 24)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.STATUS_SENT)
+
+    def test_unreachable_server_marks_deliveries_failed(self):
+        with LocalSMTPServer() as server:
+            factory = server.get_connection
+        stats = CampaignSender(self.campaign, connections=2, rate=0, connection_factory=factory).run()
+
+        self.assertEqual(stats['failed'], 25)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.STATUS_SENDING)
+
+
+class NewsletterSignupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def confirmation_link(self):
+        run_tasks()
+        return re.search(r'https?://[^/]+(/\S+/newsletter/confirm/\S+)', mail.outbox[-1].body).group(1)
+
+    async def test_async_signup_sends_a_confirmation_instead_of_storing(self):
+        url = reverse('public_profile:newsletter_signup')
+
+        response = await self.async_client.post(url, {'email': ' Reader@Example.com '})
+        invalid = await self.async_client.post(url, {'email': 'not-an-email'})
+
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(invalid.json()['success'])
+        self.assertEqual(await NewsletterSubscriber.objects.acount(), 0)
+
+    def test_confirmation_link_subscribes_once(self):
+        self.client.post(reverse('public_profile:newsletter_signup'), {'email': 'Reader@Example.com'})
+        link = self.confirmation_link()
+        self.assertEqual(mail.outbox[-1].to, ['reader@example.com'])
+
+        # Mail scanners GET every link: that only asks.
+        response = self.client.get(link)
+        self.assertContains(response, '<form method="post"')
+        self.assertContains(response, 'reader@example.com')
+        self.assertFalse(NewsletterSubscriber.objects.exists())
+
+        first = self.client.post(link)
+        second = self.client.post(link)
+
+        self.assertContains(first, 'Thanks for confirming')
+        self.assertNotContains(second, 'Thanks for confirming')
+        subscriber = NewsletterSubscriber.objects.get()
+        self.assertEqual(subscriber.email, 'reader@example.com')
+        self.assertTrue(subscriber.active)
+        self.assertIsNotNone(subscriber.confirmed_at)
+
+        response = self.client.post(reverse('public_profile:newsletter_signup'), {'email': 'READER@example.com'})
+        self.assertEqual(response.json()['message'], 'Email already subscribed')
+
+    def test_old_link_does_not_resubscribe_after_unsubscribing(self):
+        self.client.post(reverse('public_profile:newsletter_signup'), {'email': 'reader@example.com'})
+        link = self.confirmation_link()
+        self.client.post(link)
+        NewsletterSubscriber.objects.update(active=False)
+
+        response = self.client.post(link)
+
+        self.assertContains(response, 'Link already')
+        self.assertFalse(NewsletterSubscriber.objects.get().active)
+        # Signing up again, once the interval has passed, issues a newer link, which does.
+        cache.clear()
+        with mock.patch('time.time', return_value=time.time() + 5):
+            self.client.post(reverse('public_profile:newsletter_signup'), {'email': 'reader@example.com'})
+            link = self.confirmation_link()
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + datetime.timedelta(seconds=10)):
+            self.client.post(link)
+        self.assertTrue(NewsletterSubscriber.objects.get().active)
+        self.assertIsNone(NewsletterSubscriber.objects.get().unsubscribed_at)
+
+    @override_settings(CONTACT_RATE_LIMIT=3)
+    def test_signups_are_throttled(self):
+        url = reverse('public_profile:newsletter_signup')
+        self.client.post(url, {'email': 'reader@example.com'})
+        self.client.post(url, {'email': 'READER@example.com'})
+        run_tasks()
+        # One confirmation per address per interval.
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.client.post(url, {'email': 'other@example.com'})
+        response = self.client.post(url, {'email': 'another@example.com'})
+        self.assertEqual(response.status_code, 429)
+        run_tasks()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_expired_or_forged_links_are_rejected(self):
+        token = NewsletterSubscriber.confirmation_token('reader@example.com')
+        with override_settings(NEWSLETTER_CONFIRM_MAX_AGE=-1):
+            response = self.client.get(reverse('public_profile:newsletter_confirm', args=[token]))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('public_profile:newsletter_confirm', args=[token[:-2] + 'xx']))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('public_profile:newsletter_confirm', args=[token[:-2] + 'xx']))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(NewsletterSubscriber.objects.exists())
+
+    def test_emails_are_unique_regardless_of_case(self):
+        NewsletterSubscriber.objects.create(email='Reader@Example.com')
+        self.assertEqual(NewsletterSubscriber.objects.by_email('READER@example.COM ').get().email, 'reader@example.com')
+        with self.assertRaises(IntegrityError):
+            NewsletterSubscriber.objects.bulk_create([NewsletterSubscriber(email='READER@EXAMPLE.COM')])
+
+
+class NewsletterSubscriberAdminTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=f'reader{i}@example.com') for i in range(25)]
+        )
+        # Ties on subscribed_at are broken by id.
+        NewsletterSubscriber.objects.filter(email__startswith='reader1').update(subscribed_at=timezone.now())
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.url = reverse('admin:public_profile_newslettersubscriber_changelist')
+        cache.clear()
+
+    @mock.patch('public_profile.admin.NewsletterSubscriberAdmin.list_per_page', 10)
+    def test_next_page_links_walk_every_row_once_in_order(self):
+        seen, url = [], self.url
+        while url:
+            response = self.client.get(url)
+            cl = response.context['cl']
+            self.assertIsNone(cl.full_result_count)
+            self.assertEqual(cl.result_count, 25)
+            seen.extend(obj.email for obj in cl.result_list)
+            url = cl.next_page_url and self.url + cl.next_page_url
+        expected = list(NewsletterSubscriber.objects.order_by('-subscribed_at', '-id').values_list('email', flat=True))
+        self.assertEqual(seen, expected)
+
+    @mock.patch('public_profile.admin.NewsletterSubscriberAdmin.list_per_page', 10)
+    def test_cursor_pages_do_not_use_offset(self):
+        first = self.client.get(self.url).context['cl']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + first.next_page_url)
+        self.assertContains(response, 'First page')
+        page = [q['sql'] for q in queries if 'FROM "public_profile_newslettersubscriber"' in q['sql']]
+        self.assertTrue(page)
+        self.assertFalse([sql for sql in page if 'OFFSET' in sql])
+        # Filter links start again from the first page.
+        self.assertNotIn('after=', response.context['cl'].get_query_string({'active__exact': 1}))
+
+    def test_sorting_by_a_column_falls_back_to_page_numbers(self):
+        cl = self.client.get(self.url, {'o': '1'}).context['cl']
+        self.assertIsNone(cl.keyset)
+        self.assertEqual(cl.result_count, 25)
+
+    def test_search_matches_email_prefixes(self):
+        NewsletterSubscriber.objects.create(email='other-reader1@example.com')
+        cl = self.client.get(self.url, {'q': 'reader1'}).context['cl']
+        self.assertEqual(
+            sorted(obj.email for obj in cl.result_list),
+            sorted(f'reader{i}@example.com' for i in [1, *range(10, 20)]),
+        )
+
+
+class NewsletterUnsubscribeTests(TestCase):
+    def test_signed_token_deactivates_subscriber_on_post(self):
+        subscriber = NewsletterSubscriber.objects.create(email='reader@example.com')
+        url = reverse('public_profile:newsletter_unsubscribe', args=[subscriber.unsubscribe_token()])
+
+        # Link scanners and prefetchers only GET: that asks, it doesn't act.
+        response = self.client.get(url)
+        self.assertContains(response, '<form method="post"')
+        subscriber.refresh_from_db()
+        self.assertTrue(subscriber.active)
+
+        response = self.client.post(url, {'List-Unsubscribe': 'One-Click'})
+
+        self.assertContains(response, 'unsubscribed')
+        subscriber.refresh_from_db()
+        self.assertFalse(subscriber.active)
+        self.assertIsNotNone(subscriber.unsubscribed_at)
+
+    def test_tampered_token_is_rejected(self):
+        response = self.client.get(reverse('public_profile:newsletter_unsubscribe', args=['1:forged']))
+        self.assertEqual(response.status_code, 400)
+
+
+class SpeakingEngagementsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        self.url = reverse('public_profile:speaking_engagements')
+        self.upcoming = SpeakingEngagement.objects.create(
+            title='Next talk', event_date=today + datetime.timedelta(days=3), location='Paris', event_type='meetup')
+        self.today = SpeakingEngagement.objects.create(
+            title='Today talk', event_date=today, location='Berlin', event_type='conference')
+        self.past = SpeakingEngagement.objects.create(
+            title='Old talk', event_date=datetime.date(2020, 5, 1), location='Rome', event_type='workshop')
+
+    def test_splits_upcoming_and_past(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['upcoming'], [self.today, self.upcoming])
+        self.assertEqual(list(response.context['past_page']), [self.past])
+
+    def test_filters_by_type_and_year(self):
+        response = self.client.get(self.url, {'type': 'workshop'})
+        self.assertEqual(response.context['upcoming'], [])
+        self.assertEqual(list(response.context['past_page']), [self.past])
+
+        response = self.client.get(self.url, {'year': '2020'})
+        self.assertEqual(list(response.context['past_page']), [self.past])
+        self.assertEqual(response.context['upcoming'], [])
+
+        # Out of range years are ignored rather than a server error.
+        response = self.client.get(self.url, {'year': '99999'})
+        self.assertIsNone(response.context['selected_year'])
+        # As are digits int() doesn't take, and page numbers likewise.
+        response = self.client.get(self.url, {'year': '²', 'page': '²'})
+        self.assertIsNone(response.context['selected_year'])
+        self.assertEqual(response.context['past_page'].number, 1)
+
+    def test_year_counts_use_one_query(self):
+        with self.assertNumQueries(1):
+            counts = list(SpeakingEngagement.objects.year_counts())
+        self.assertIn({'year': 2020, 'count': 1}, counts)
+
+    def test_listing_is_cached_and_invalidated_on_save(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        self.past.title = 'Renamed talk'
+        self.past.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['past_page'][0].title, 'Renamed talk')
+
+    def test_cache_expires_at_midnight_after_next_event(self):
+        self.assertLessEqual(_seconds_until_passed(timezone.localdate()), 86400)
+        self.assertGreater(_seconds_until_passed(timezone.localdate() + datetime.timedelta(days=1)), 86400)
+
+
+class PressMentionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('public_profile:press_mentions')
+        self.old = PressMention.objects.create(title='Old', publication='Daily News', published_date=datetime.date(2019, 3, 1))
+        self.recent = PressMention.objects.create(title='Recent', publication='Daily News', published_date=datetime.date(2024, 6, 1))
+        self.other = PressMention.objects.create(title='Other', publication=' Tech Weekly ', published_date=datetime.date(2024, 2, 1))
+
+    def test_publications_are_denormalized_on_save_and_delete(self):
+        daily = Publication.objects.get(name='Daily News')
+        self.assertEqual(daily.mention_count, 2)
+        self.assertEqual(Publication.objects.get(slug='tech-weekly').mention_count, 1)
+
+        self.old.publication = 'Tech Weekly'
+        self.old.save()
+        self.assertEqual(Publication.objects.get(name='Daily News').mention_count, 1)
+        self.assertEqual(Publication.objects.get(name='Tech Weekly').mention_count, 2)
+
+        self.recent.delete()
+        self.assertEqual(Publication.objects.get(name='Daily News').mention_count, 0)
+
+    def test_renaming_a_publication_updates_its_mentions(self):
+        publication = Publication.objects.get(name='Daily News')
+        publication.name = 'The Daily News'
+        publication.save()
+        self.assertEqual(PressMention.objects.filter(publication='The Daily News').count(), 2)
+
+    def test_facets_and_year_grouping(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['year_counts'], [{'year': 2024, 'count': 2}, {'year': 2019, 'count': 1}])
+        self.assertEqual(
+            [(row['slug'], row['count']) for row in response.context['publication_counts']],
+            [('daily-news', 2), ('tech-weekly', 1)],
+        )
+        self.assertEqual(response.context['mentions'], [self.recent, self.other, self.old])
+
+        response = self.client.get(self.url, {'publication': 'daily-news', 'year': '2024'})
+        self.assertEqual(response.context['mentions'], [self.recent])
+        self.assertEqual(response.context['year_counts'], [{'year': 2024, 'count': 1}, {'year': 2019, 'count': 1}])
+        self.assertEqual(response.context['publication_counts'], [{'name': 'Daily News', 'slug': 'daily-news', 'count': 1}])
+
+        # A digit int() doesn't take is ignored rather than a server error.
+        response = self.client.get(self.url, {'year': '²'})
+        self.assertIsNone(response.context['selected_year'])
+
+    def test_cursor_pagination_walks_ties_without_gaps(self):
+        same_day = datetime.date(2018, 1, 1)
+        for i in range(PRESS_PER_PAGE + 5):
+            PressMention.objects.create(title=f'Tie {i}', publication='Daily News', published_date=same_day)
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(response.context['mentions'])
+            if not response.context['next_cursor']:
+                break
+            params = {'after': response.context['next_cursor']}
+        self.assertEqual(seen, list(PressMention.objects.order_by('-published_date', '-id')))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(self.url, {'after': 'nonsense'})
+        self.assertTrue(response.context['is_first_page'])
+        self.assertEqual(len(response.context['mentions']), 3)
+
+    def test_listing_is_cached_and_invalidated_on_save(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        PressMention.objects.create(title='New', publication='Radio', published_date=datetime.date(2025, 1, 1))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['mentions'][0].title, 'New')
+        self.assertIn('Radio', [row['name'] for row in response.context['publication_counts']])
+
+
+class SpeakingCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.talk = SpeakingEngagement.objects.create(
+            title='Scaling Django; lessons, learned', event_date=datetime.date(2025, 3, 14),
+            location='Yaoundé', event_type='conference', description='A long description ' * 10)
+        self.meetup = SpeakingEngagement.objects.create(
+            title='Meetup', event_date=datetime.date(2025, 4, 1), location='Online', event_type='meetup')
+
+    async def get_feed(self, url, headers=None):
+        response = await self.async_client.get(url, headers=headers)
+        body = b''.join([chunk async for chunk in response.streaming_content]) if response.status_code == 200 else b''
+        return response, body.decode()
+
+    async def test_feed_contains_folded_escaped_events(self):
+        response, body = await self.get_feed(reverse('public_profile:speaking_calendar'))
+
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertIn('SUMMARY:Scaling Django\\; lessons\\, learned', body)
+        self.assertIn('DTSTART;VALUE=DATE:20250314', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+    async def test_per_type_feed(self):
+        _, body = await self.get_feed(reverse('public_profile:speaking_calendar_type', args=['meetup']))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn('SUMMARY:Meetup', body)
+
+        response = await self.async_client.get(reverse('public_profile:speaking_calendar_type', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_conditional_get(self):
+        response, _ = await self.get_feed(reverse('public_profile:speaking_calendar'))
+        etag = response['ETag']
+
+        response, _ = await self.get_feed(reverse('public_profile:speaking_calendar'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        await self.meetup.asave()
+        response, _ = await self.get_feed(reverse('public_profile:speaking_calendar'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_only_changed_events_are_reserialized(self):
+        url = reverse('public_profile:speaking_calendar')
+        await self.get_feed(url)
+        self.meetup.title = 'Renamed meetup'
+        await self.meetup.asave()
+
+        with mock.patch.object(ical, 'render_vevent', wraps=ical.render_vevent) as render:
+            _, body = await self.get_feed(url)
+
+        self.assertEqual([call.args[0].pk for call in render.call_args_list], [self.meetup.pk])
+        self.assertIn('SUMMARY:Renamed meetup', body)
+
+
+class MediaKitBundleTests(TestCase):
+    def setUp(self):
+        from PIL import Image
+        cache.clear()
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        (self.tmp / 'static' / 'images').mkdir(parents=True)
+        Image.new('RGB', (2000, 1000), 'navy').save(self.tmp / 'static' / 'images' / 'headshot.jpg')
+        # A placeholder that isn't an image is left out of scaled bundles.
+        (self.tmp / 'static' / 'images' / 'placeholder.jpg').write_text('not an image')
+        settings = override_settings(
+            STATICFILES_DIRS=[self.tmp / 'static'],
+            MEDIA_KIT_ROOT=str(self.tmp / 'kit'),
+            MEDIA_KIT_HEADSHOTS=['images/headshot.jpg', 'images/placeholder.jpg'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        PressMention.objects.create(title='Profile', publication='Daily', published_date=datetime.date(2024, 5, 1))
+        self.url = reverse('public_profile:media_kit_bundle', args=['web'])
+
+    def test_bundle_contents_and_rebuild_on_change(self):
+        from PIL import Image
+
+        with self.assertLogs('public_profile.mediakit', 'WARNING') as logs:
+            response = self.client.get(self.url)
+        self.assertIn('placeholder.jpg is not a readable image', logs.output[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ['bio-long.txt', 'bio-short.txt', 'headshots/headshot-1024.jpg', 'press-mentions.csv'],
+        )
+        self.assertEqual(Image.open(archive.open('headshots/headshot-1024.jpg')).size, (1024, 512))
+        self.assertIn('Daily,Profile', archive.read('press-mentions.csv').decode())
+        first = list((self.tmp / 'kit').iterdir())
+
+        with mock.patch.object(mediakit, 'write_bundle') as write_bundle:
+            self.client.get(self.url)
+        write_bundle.assert_not_called()
+
+        PressMention.objects.create(title='Interview', publication='Weekly', published_date=datetime.date(2024, 6, 1))
+        with self.assertLogs('public_profile.mediakit', 'WARNING'):
+            self.client.get(self.url)
+        second = list((self.tmp / 'kit').iterdir())
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first, second)
+
+    def test_original_bundle_ships_files_unchanged(self):
+        response = self.client.get(reverse('public_profile:media_kit_bundle', args=['original']))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.read('headshots/placeholder.jpg'), b'not an image')
+
+    def test_range_requests(self):
+        with self.assertLogs('public_profile.mediakit', 'WARNING'):
+            full = b''.join(self.client.get(self.url).streaming_content)
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(full)}')
+        self.assertEqual(b''.join(response.streaming_content), full[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), full[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(full)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(full)}')
+
+        # A stale If-Range gets the whole (changed) file instead of a mismatched slice.
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bundle_replaced_during_a_download(self):
+        with self.assertLogs('public_profile.mediakit', 'WARNING'):
+            full = b''.join(self.client.get(self.url).streaming_content)
+        path, _ = mediakit.bundle_path('web')
+
+        # Replaced after the response opened it: the open handle still serves it.
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        path.unlink()
+        self.assertEqual(b''.join(response.streaming_content), full[10:20])
+
+        # Replaced before it was opened: the view looks the bundle up again.
+        real = mediakit.bundle_path
+        paths = iter([(self.tmp / 'kit' / 'gone.zip', 'gone')])
+        with mock.patch.object(mediakit, 'bundle_path', lambda size: next(paths, None) or real(size)), \
+                self.assertLogs('public_profile.mediakit', 'WARNING'):
+            response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), full)
+
+    def test_unknown_size_is_404(self):
+        self.assertEqual(self.client.get(reverse('public_profile:media_kit_bundle', args=['huge'])).status_code, 404)
+
+    def test_media_kit_page_links_bundles(self):
+        response = self.client.get(reverse('public_profile:media_kit'))
+        self.assertContains(response, self.url)
+        self.assertContains(response, 'active speaker at technology conferences')
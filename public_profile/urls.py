@@ -5,9 +5,14 @@ app_name = 'public_profile'
 
 urlpatterns = [
     path('media-kit/', views.media_kit, name='media_kit'),
+    path('media-kit/<slug:size>.zip', views.media_kit_bundle, name='media_kit_bundle'),
     path('speaking/', views.speaking_engagements, name='speaking_engagements'),
+    path('speaking/calendar.ics', views.speaking_calendar, name='speaking_calendar'),
+    path('speaking/calendar/<slug:event_type>.ics', views.speaking_calendar, name='speaking_calendar_type'),
     path('press/', views.press_mentions, name='press_mentions'),
     path('newsletter-signup/', views.NewsletterSignupView.as_view(), name='newsletter_signup'),
+    path('newsletter/confirm/<str:token>/', views.newsletter_confirm, name='newsletter_confirm'),
+    path('newsletter/unsubscribe/<str:token>/', views.newsletter_unsubscribe, name='newsletter_unsubscribe'),
 ]
 
 
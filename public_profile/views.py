@@ -1,65 +1,333 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.validators import slug_re, validate_email
+from django.db.models import Count, F, Max
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.views import View
-from .models import SpeakingEngagement, PressMention, NewsletterSubscriber
+from core import spam
+from core.cache import cached, versioned_key
+from core.edge import tag
+from core.downloads import ranged_file_response
+from . import ical, mediakit
+from .models import SpeakingEngagement, PressMention, Publication, NewsletterSubscriber, normalize_email
+from .tasks import send_newsletter_confirmation
+
+SPEAKING_PAST_PER_PAGE = 10
+PRESS_PER_PAGE = 20
 
 
 def media_kit(request):
     """Media kit page with downloadable assets."""
-    return render(request, 'public_profile/media_kit.html')
+    context = {
+        'bios': mediakit.bios(),
+        'bundle_sizes': mediakit.SIZES,
+    }
+    return render(request, 'public_profile/media_kit.html', context)
+
+
+def media_kit_bundle(request, size):
+    """Headshots, bios and press summary as one ZIP, built once per change of its inputs."""
+    if size not in mediakit.SIZES:
+        raise Http404('Unknown bundle size')
+    tag(request, PressMention)
+    path, digest = mediakit.bundle_path(size)
+    try:
+        return ranged_file_response(request, path, digest, 'application/zip', f'media-kit-{size}.zip')
+    except FileNotFoundError:
+        # A concurrent rebuild replaced the bundle before it was opened.
+        path, digest = mediakit.bundle_path(size)
+        return ranged_file_response(request, path, digest, 'application/zip', f'media-kit-{size}.zip')
+
+
+def _int_param(value, minimum=1, maximum=None):
+    """``value`` as an int within ``[minimum, maximum]``, or None if it isn't one."""
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    if number < minimum or (maximum is not None and number > maximum):
+        return None
+    return number
+
+
+def _seconds_until_passed(event_date):
+    """Seconds until midnight after ``event_date``, when it stops being upcoming."""
+    midnight = timezone.make_aware(datetime.datetime.combine(event_date + datetime.timedelta(days=1), datetime.time.min))
+    return max(1, int((midnight - timezone.now()).total_seconds()))
+
+
+def _speaking_timeout(data):
+    # Saves and deletes bump the namespace version; otherwise the listing only
+    # changes when the next upcoming event slides into the past at midnight.
+    upcoming = data['upcoming']
+    timeout = _seconds_until_passed(upcoming[0].event_date) if upcoming else settings.SPEAKING_CACHE_TIMEOUT
+    return min(timeout, settings.SPEAKING_CACHE_TIMEOUT)
+
+
+def _speaking_listing(event_type, year, page_number):
+    """Upcoming list, one page of the past archive and per-year counts, cached."""
+    def compute():
+        today = timezone.localdate()
+        engagements = SpeakingEngagement.objects.all()
+        if event_type:
+            engagements = engagements.filter(event_type=event_type)
+        year_counts = list(engagements.year_counts())
+        if year:
+            engagements = engagements.filter(event_date__year=year)
+
+        upcoming = list(engagements.upcoming(today))
+        past_page = Paginator(engagements.past(today), SPEAKING_PAST_PER_PAGE).get_page(page_number)
+        return {
+            'upcoming': upcoming,
+            'past': list(past_page.object_list),
+            'past_count': past_page.paginator.count,
+            'page_number': past_page.number,
+            'year_counts': year_counts,
+        }
+
+    return cached(versioned_key('speaking', event_type, year, page_number), compute, _speaking_timeout)
 
 
 def speaking_engagements(request):
-    """List of speaking engagements."""
-    engagements = SpeakingEngagement.objects.all()
+    """Upcoming and past speaking engagements, filterable by type and year."""
+    event_types = SpeakingEngagement._meta.get_field('event_type').choices
+    event_type = request.GET.get('type', '')
+    if event_type not in dict(event_types):
+        event_type = ''
+    year = _int_param(request.GET.get('year', ''), maximum=9999)
+    page_number = _int_param(request.GET.get('page', '')) or 1
+    
+    data = _speaking_listing(event_type, year, page_number)
+    tag(request, SpeakingEngagement)
+    # The archive page is cached as a plain list; rebuild a Page around it
+    # without re-counting (a range stands in for the full object list).
+    paginator = Paginator(range(data['past_count']), SPEAKING_PAST_PER_PAGE)
+    past_page = Page(data['past'], data['page_number'], paginator)
+    
+    filter_query = ''
+    if event_type:
+        filter_query += f'&type={event_type}'
+    if year:
+        filter_query += f'&year={year}'
     
     context = {
-        'engagements': engagements,
+        'upcoming': data['upcoming'],
+        'past_page': past_page,
+        'year_counts': data['year_counts'],
+        'event_types': event_types,
+        'selected_type': event_type,
+        'selected_year': year,
+        'filter_query': filter_query,
     }
     return render(request, 'public_profile/speaking_engagements.html', context)
 
 
+async def speaking_calendar(request, event_type=None):
+    """Streamed iCalendar feed of speaking engagements, optionally for one event type."""
+    event_types = dict(SpeakingEngagement._meta.get_field('event_type').choices)
+    engagements = SpeakingEngagement.objects.all()
+    name = 'Speaking Engagements'
+    if event_type is not None:
+        if event_type not in event_types:
+            raise Http404('Unknown event type')
+        engagements = engagements.filter(event_type=event_type)
+        name = f'{name} - {event_types[event_type]}'
+    tag(request, SpeakingEngagement)
+    
+    # Any insert, edit or delete changes the count or the latest updated_at.
+    stats = await engagements.aaggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest']
+    version = f"{event_type or 'all'}:{stats['count']}:{latest.timestamp() if latest else 0}"
+    etag = quote_etag(hashlib.md5(version.encode()).hexdigest())
+    last_modified = int(latest.timestamp()) if latest else None
+    
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = StreamingHttpResponse(
+            ical.astream_calendar(engagements, name),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'inline; filename="speaking-{event_type or "all"}.ics"'
+    if request.method in ('GET', 'HEAD'):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _parse_press_cursor(value):
+    """Decode an ``after`` cursor of the form ``<published_date>.<pk>``."""
+    date, _, pk = value.partition('.')
+    try:
+        return datetime.date.fromisoformat(date), int(pk)
+    except ValueError:
+        return None
+
+
+def _press_listing(publication_slug, year, cursor):
+    """One page of mentions plus year and publication facet counts, cached."""
+    def compute():
+        mentions = PressMention.objects.all()
+        publication = None
+        if publication_slug:
+            publication = Publication.objects.filter(slug=publication_slug).values('pk', 'name', 'slug').first()
+            if publication:
+                mentions = mentions.filter(outlet=publication['pk'])
+        year_counts = mentions.year_counts()
+        if year:
+            mentions = mentions.filter(published_date__year=year)
+
+        if year or publication:
+            publication_counts = mentions.publication_counts()
+        else:
+            # Unfiltered counts come straight from the denormalized table.
+            publication_counts = list(
+                Publication.objects.filter(mention_count__gt=0)
+                .order_by('-mention_count', 'name')
+                .values('name', 'slug', count=F('mention_count'))
+            )
+        if cursor:
+            date, pk = cursor
+            # Written as a range plus an exclusion so the (published_date, id) index
+            # is used; an OR of the two conditions is not.
+            mentions = mentions.filter(published_date__lte=date).exclude(published_date=date, pk__gte=pk)
+        page = list(mentions.order_by('-published_date', '-id')[:PRESS_PER_PAGE + 1])
+        next_cursor = None
+        if len(page) > PRESS_PER_PAGE:
+            page = page[:PRESS_PER_PAGE]
+            next_cursor = f'{page[-1].published_date.isoformat()}.{page[-1].pk}'
+        return {
+            'mentions': page,
+            'next_cursor': next_cursor,
+            'publication': publication,
+            'year_counts': year_counts,
+            'publication_counts': publication_counts,
+        }
+
+    key = versioned_key('press', publication_slug, year, '%s.%d' % cursor if cursor else '')
+    return cached(key, compute, settings.PRESS_CACHE_TIMEOUT)
+
+
 def press_mentions(request):
-    """List of press mentions."""
-    mentions = PressMention.objects.all()
+    """Press archive grouped by year, faceted by publication and year, with cursor pagination."""
+    publication_slug = request.GET.get('publication', '')
+    if not slug_re.fullmatch(publication_slug):
+        publication_slug = ''
+    year = _int_param(request.GET.get('year', ''), maximum=9999)
+    cursor = _parse_press_cursor(request.GET.get('after', ''))
+    
+    data = _press_listing(publication_slug, year, cursor)
+    tag(request, PressMention, Publication)
+    publication = data['publication']
+    
+    filter_query = ''
+    if publication:
+        filter_query += f"&publication={publication['slug']}"
+    if year:
+        filter_query += f'&year={year}'
     
     context = {
-        'mentions': mentions,
+        'mentions': data['mentions'],
+        'next_cursor': data['next_cursor'],
+        'is_first_page': cursor is None,
+        'year_counts': data['year_counts'],
+        'publication_counts': data['publication_counts'],
+        'selected_publication': publication['slug'] if publication else '',
+        'selected_year': year,
+        'filter_query': filter_query,
     }
     return render(request, 'public_profile/press_mentions.html', context)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class NewsletterSignupView(View):
-    """Newsletter signup view."""
+    """
+    Newsletter signup view (async, using the async ORM). Double opt-in:
+    nothing is stored until the emailed confirmation link is followed.
+    """
     
-    def post(self, request):
-        email = request.POST.get('email')
+    async def post(self, request):
+        # Each signup sends mail to the address given, so throttle it like the contact form.
+        if await spam.arate_limited(spam.client_ip(request)):
+            return JsonResponse({'success': False, 'message': 'Too many requests. Please try again later.'}, status=429)
+        email = normalize_email(request.POST.get('email'))
         
         if not email:
             return JsonResponse({'success': False, 'message': 'Email is required'})
+        try:
+            validate_email(email)
+        except ValidationError:
+            return JsonResponse({'success': False, 'message': 'Please enter a valid email address'})
         
         try:
-            subscriber, created = NewsletterSubscriber.objects.get_or_create(
-                email=email,
-                defaults={'active': True}
-            )
-            
-            if created:
-                return JsonResponse({
-                    'success': True, 
-                    'message': 'Successfully subscribed to newsletter!'
-                })
-            else:
+            if await NewsletterSubscriber.objects.by_email(email).filter(active=True).aexists():
                 return JsonResponse({
                     'success': False, 
                     'message': 'Email already subscribed'
                 })
+            # At most one confirmation per address per interval; the reply is
+            # the same either way.
+            if await cache.aadd(f'newsletter-confirm:{email}', 1, settings.NEWSLETTER_CONFIRM_INTERVAL):
+                await send_newsletter_confirmation.adefer(email)
+            return JsonResponse({
+                'success': True, 
+                'message': 'Almost done! Check your inbox for a link to confirm your subscription.'
+            })
         except Exception as e:
             return JsonResponse({
                 'success': False, 
                 'message': 'An error occurred. Please try again.'
-            })
\ No newline at end of file
+            })
+
+
+@never_cache
+@csrf_exempt
+def newsletter_confirm(request, token):
+    """
+    Complete a signup via the signed link in the confirmation email. GET
+    only checks the link and asks, since mail scanners follow every link;
+    the POST from that page subscribes.
+    """
+    if request.method != 'POST':
+        payload = NewsletterSubscriber.read_confirmation_token(token)
+        context = {'pending_email': payload[0] if payload else None}
+        return render(request, 'public_profile/newsletter_confirm.html', context, status=200 if payload else 400)
+    subscriber, confirmed = NewsletterSubscriber.confirm(token)
+    
+    context = {
+        'subscriber': subscriber,
+        'confirmed': confirmed,
+    }
+    return render(request, 'public_profile/newsletter_confirm.html', context, status=200 if subscriber else 400)
+
+
+@never_cache
+@csrf_exempt
+def newsletter_unsubscribe(request, token):
+    """
+    Unsubscribe via the signed link in campaign emails. GET only asks for
+    confirmation, since mail scanners follow every link; the POST from that
+    page, or the one-click POST of List-Unsubscribe-Post, unsubscribes.
+    """
+    subscriber = NewsletterSubscriber.from_unsubscribe_token(token)
+    if request.method == 'POST' and subscriber is not None and subscriber.active:
+        subscriber.active = False
+        subscriber.save(update_fields=['active'])
+    
+    context = {
+        'subscriber': subscriber,
+    }
+    return render(request, 'public_profile/unsubscribe.html', context, status=200 if subscriber else 400)